@@ -0,0 +1,64 @@
+"""
+Progress of the course imports, shared between the Studio views which receive the uploads and
+the celery tasks which import them.
+"""
+from django.core.cache import cache
+
+# How long the status of an import is kept after its last update, in seconds
+IMPORT_STATUS_TIMEOUT = 24 * 60 * 60
+
+
+class CourseImportStatus(object):
+    """
+    The status of the import of an uploaded file into a course by a user.
+
+    The stages are:
+        -X : Import unsuccessful due to some error with X as stage [0-3]
+        0 : No status info found (import done or upload still in progress)
+        1 : Extracting file
+        2 : Validating.
+        3 : Importing to mongo
+        4 : Import successful
+    """
+    def __init__(self, user_id, course_key, filename):
+        self.cache_key = u'course_import_status.{}.{}.{}'.format(user_id, course_key, filename)
+
+    def get(self):
+        """
+        Returns a dict of the `Stage`, the counts of `BlocksImported` and `AssetsImported`, and of
+        the `ErrMsg` of a failed import.
+        """
+        return cache.get(self.cache_key) or {'Stage': 0, 'BlocksImported': 0, 'AssetsImported': 0}
+
+    def update(self, **status):
+        """
+        Update some of the values of the status.
+        """
+        current = self.get()
+        current.update(status)
+        cache.set(self.cache_key, current, IMPORT_STATUS_TIMEOUT)
+
+    def set_stage(self, stage):
+        """
+        Move the import on to stage.
+        """
+        self.update(Stage=stage)
+
+    def fail(self, message, stage=None):
+        """
+        Mark the import as failed at stage (by default, the current one) with the given message.
+        """
+        stage = self.get()['Stage'] if stage is None else stage
+        self.update(Stage=-abs(stage), ErrMsg=message)
+
+    def progress(self, blocks_imported, assets_imported):
+        """
+        Record the counts of blocks and static files imported so far (an import_from_xml progress_callback).
+        """
+        self.update(BlocksImported=blocks_imported, AssetsImported=assets_imported)
+
+    def clear(self):
+        """
+        Forget the import, e.g. when a new upload of the file starts.
+        """
+        cache.delete(self.cache_key)
@@ -0,0 +1,28 @@
+"""
+Script for deleting the asset data (blobs) which is no longer referenced by any asset
+in a content addressed contentstore
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+from xmodule.contentstore.django import contentstore
+
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Delete unreferenced asset data from the contentstore and the trashcan
+    """
+    help = 'Delete the asset data no longer referenced by any asset in the contentstore or the trashcan'
+
+    def handle(self, *args, **options):
+        """
+        Execute the command
+        """
+        blobs_deleted = 0
+        for name in ('default', 'trashcan'):
+            blobs_deleted += contentstore(name).collect_garbage()
+
+        log.info(u"Total number of blobs deleted: {0}".format(blobs_deleted))
@@ -0,0 +1,75 @@
+"""
+Script for rewriting the history of split courses as full structure snapshots plus deltas
+"""
+import logging
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+
+
+log = logging.getLogger(__name__)
+
+# Default number of versions between the full snapshots kept in each line of history
+DEFAULT_SNAPSHOT_INTERVAL = 20
+
+
+class Command(BaseCommand):
+    """
+    Delta encode the stored structures of split courses
+    """
+    help = '''Rewrite the structure history of the given split courses (by default, all of them) as
+full snapshots every --interval versions plus deltas. Usage: compact_structure_history [--interval N] [course_id ...]'''
+
+    option_list = BaseCommand.option_list + (
+        make_option('--interval',
+                    action='store',
+                    dest='interval',
+                    type='int',
+                    default=DEFAULT_SNAPSHOT_INTERVAL,
+                    help='number of versions between full snapshots'),
+    )
+
+    def handle(self, *args, **options):
+        """
+        Execute the command
+        """
+        if options['interval'] < 1:
+            raise CommandError("--interval must be at least 1")
+
+        # pylint: disable=protected-access
+        split_store = modulestore()._get_modulestore_by_type(ModuleStoreEnum.Type.split)
+        if split_store is None:
+            raise CommandError("There is no split modulestore")
+
+        if args:
+            course_indexes = []
+            for course_id in args:
+                try:
+                    course_key = CourseKey.from_string(course_id)
+                except InvalidKeyError:
+                    raise CommandError("Invalid course_id: '{}'".format(course_id))
+                course_index = split_store.get_course_index(course_key)
+                if course_index is None:
+                    raise CommandError("Course not found in split: '{}'".format(course_id))
+                course_indexes.append(course_index)
+        else:
+            course_indexes = split_store.find_matching_course_indexes()
+
+        db_connection = split_store.db_connection
+        # the branches of a course usually share their history
+        original_versions = set()
+        for course_index in course_indexes:
+            for version in course_index['versions'].itervalues():
+                structure = db_connection.structures.find_one({'_id': version}, fields=['original_version'])
+                if structure is not None:
+                    original_versions.add(structure['original_version'])
+
+        compacted = 0
+        for original_version in original_versions:
+            compacted += db_connection.compact_structures(original_version, options['interval'])
+
+        log.info(u"Total number of structures delta encoded: {0}".format(compacted))
@@ -1,8 +1,11 @@
 """
 Script for exporting all courseware from Mongo to a directory and listing the courses which failed to export
 """
+import os
+from optparse import make_option
+
 from django.core.management.base import BaseCommand, CommandError
-from xmodule.modulestore.xml_exporter import export_to_xml
+from xmodule.modulestore.xml_exporter import export_to_xml, iter_export_to_tar
 from xmodule.modulestore.django import modulestore
 from xmodule.contentstore.django import contentstore
 
@@ -13,6 +16,11 @@ class Command(BaseCommand):
     """
     help = 'Export all courses from mongo to the specified data directory and list the courses which failed to export'
 
+    option_list = BaseCommand.option_list + (
+        make_option('--tar', action='store_true', dest='tar', default=False,
+                    help='Export each course to a .tar.gz file instead of a directory'),
+    )
+
     def handle(self, *args, **options):
         """
         Execute the command
@@ -21,7 +29,7 @@ class Command(BaseCommand):
             raise CommandError("export requires one argument: <output path>")
 
         output_path = args[0]
-        courses, failed_export_courses = export_courses_to_output_path(output_path)
+        courses, failed_export_courses = export_courses_to_output_path(output_path, tar=options.get('tar', False))
 
         print("=" * 80)
         print(u"=" * 30 + u"> Export summary")
@@ -32,9 +40,12 @@ class Command(BaseCommand):
         print("=" * 80)
 
 
-def export_courses_to_output_path(output_path):
+def export_courses_to_output_path(output_path, tar=False):
     """
     Export all courses to target directory and return the list of courses which failed to export
+
+    If tar is True, each course is written to a <course dir>.tar.gz file, streaming its assets into it
+    rather than writing them out as separate files.
     """
     content_store = contentstore()
     module_store = modulestore()
@@ -49,7 +60,12 @@ def export_courses_to_output_path(output_path):
         print(u"Exporting course id = {0} to {1}".format(course_id, output_path))
         try:
             course_dir = course_id.to_deprecated_string().replace('/', '...')
-            export_to_xml(module_store, content_store, course_id, root_dir, course_dir)
+            if tar:
+                with open(os.path.join(root_dir, course_dir + '.tar.gz'), 'wb') as tar_file:
+                    for chunk in iter_export_to_tar(module_store, content_store, course_id, course_dir):
+                        tar_file.write(chunk)
+            else:
+                export_to_xml(module_store, content_store, course_id, root_dir, course_dir)
         except Exception as err:  # pylint: disable=broad-except
             failed_export_courses.append(unicode(course_id))
             print(u"=" * 30 + u"> Oops, failed to export {0}".format(course_id))
@@ -1,7 +1,9 @@
 """
 Test for export all courses.
 """
+import os
 import shutil
+import tarfile
 from tempfile import mkdtemp
 
 from contentstore.management.commands.export_all_courses import export_courses_to_output_path
@@ -48,6 +50,20 @@ class ExportAllCourses(ModuleStoreTestCase):
         self.assertEqual(len(failed_export_courses), 1)
         self.assertEqual(failed_export_courses[0], unicode(second_course_id))
 
+    def test_export_all_courses_to_tar(self):
+        """
+        Test exporting each course to a tar.gz file
+        """
+        courses, failed_export_courses = export_courses_to_output_path(self.temp_dir, tar=True)
+        self.assertEqual(len(courses), 2)
+        self.assertEqual(len(failed_export_courses), 0)
+
+        course_dir = self.first_course.id.to_deprecated_string().replace('/', '...')
+        with tarfile.open(os.path.join(self.temp_dir, course_dir + '.tar.gz')) as tar_file:
+            names = tar_file.getnames()
+        self.assertIn(course_dir + '/course.xml', names)
+        self.assertIn(course_dir + '/policies/assets.json', names)
+
     def tearDown(self):
         """ Common cleanup. """
         shutil.rmtree(self.temp_dir)
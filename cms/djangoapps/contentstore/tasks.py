@@ -3,17 +3,32 @@ This file contains celery tasks for contentstore views
 """
 
 from celery.task import task
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import SuspiciousOperation
+from django.utils.translation import ugettext as _
 import json
 import logging
+import os
+import shutil
+from path import path
 from xmodule.modulestore.django import modulestore
+from xmodule.contentstore.django import contentstore
+from xmodule.contentstore.content import StaticContent
 from xmodule.course_module import CourseFields
+from xmodule.exceptions import NotFoundError
+from cache_toolbox.core import del_cached_content
 
 from xmodule.modulestore.exceptions import DuplicateCourseError, ItemNotFoundError
+from xmodule.modulestore.xml_importer import import_from_xml
 from course_action_state.models import CourseRerunState
+from contentstore.import_status import CourseImportStatus
 from contentstore.utils import initialize_permissions
+from extract_tar import safetar_extract_stream
 from opaque_keys.edx.keys import CourseKey
 
+log = logging.getLogger(__name__)
+
 
 @task()
 def rerun_course(source_course_key_string, destination_course_key_string, user_id, fields=None):
@@ -61,6 +76,104 @@ def rerun_course(source_course_key_string, destination_course_key_string, user_i
         return "exception: " + unicode(exc)
 
 
+@task()
+def generate_thumbnails(asset_key_strings):
+    """
+    Generates the thumbnails of already saved assets in a new celery task.
+    """
+    store = contentstore()
+    for asset_key_string in asset_key_strings:
+        asset_key = StaticContent.get_location_from_path(asset_key_string)
+        try:
+            __, thumbnail_location = store.generate_thumbnail_for_asset(asset_key)
+        except NotFoundError:
+            # the asset was deleted or replaced before its thumbnail could be generated
+            continue
+        # the asset is cached with its old thumbnail location, and the thumbnail may be a stale one
+        del_cached_content(thumbnail_location)
+        del_cached_content(asset_key)
+
+
+@task()
+def import_olx(user_id, course_key_string, archive_path, archive_name):
+    """
+    Extracts the uploaded course archive at archive_path and imports it into the course in a new celery task,
+    recording its progress in the CourseImportStatus for archive_name. The directory holding the archive
+    is removed once done.
+    """
+    course_key = CourseKey.from_string(course_key_string)
+    status = CourseImportStatus(user_id, course_key, archive_name)
+    course_dir = path(archive_path).dirname()
+    data_root = path(settings.GITHUB_REPO_ROOT)
+
+    try:
+        status.set_stage(1)
+        try:
+            with open(archive_path, 'rb') as archive:
+                safetar_extract_stream(archive, course_dir)
+        except SuspiciousOperation as exc:
+            status.fail(u'Unsafe tar file. Aborting import. {}'.format(exc.args[0]))
+            return 'unsafe'
+        os.remove(archive_path)
+
+        log.info("Course import %s: Uploaded file extracted", course_key)
+        status.set_stage(2)
+
+        dirpath = None
+        for candidate, __, filenames in os.walk(course_dir):
+            if 'course.xml' in filenames:
+                dirpath = candidate
+                break
+        if dirpath is None:
+            status.fail(_('Could not find the course.xml file in the package.'))
+            return 'no course.xml'
+
+        dirpath = os.path.relpath(dirpath, data_root)
+        log.info("Course import %s: Extracted file verified", course_key)
+        status.set_stage(3)
+
+        import_from_xml(
+            modulestore(),
+            user_id,
+            settings.GITHUB_REPO_ROOT,
+            [dirpath],
+            load_error_modules=False,
+            static_content_store=contentstore(),
+            target_course_id=course_key,
+            thumbnail_queue=enqueue_thumbnails if async_thumbnails_enabled() else None,
+            progress_callback=status.progress,
+        )
+
+        log.info("Course import %s: Course import successful", course_key)
+        status.set_stage(4)
+        return 'succeeded'
+
+    # catch all exceptions so the failure shows up in the import status
+    except Exception as exc:  # pylint: disable=broad-except
+        log.exception(u'Course import error')
+        status.fail(unicode(exc))
+        return "exception: " + unicode(exc)
+
+    finally:
+        if course_dir.isdir():
+            shutil.rmtree(course_dir)
+            log.info("Course import %s: Temp data cleared", course_key)
+
+
+def enqueue_thumbnails(asset_keys):
+    """
+    Queues the generation of the thumbnails of the given saved assets.
+    """
+    generate_thumbnails.delay([unicode(asset_key) for asset_key in asset_keys])
+
+
+def async_thumbnails_enabled():
+    """
+    Returns whether thumbnails should be generated in the background rather than during uploads and imports.
+    """
+    return settings.FEATURES.get('ENABLE_ASYNC_THUMBNAILS', False)
+
+
 def deserialize_fields(json_fields):
     fields = json.loads(json_fields)
     for field_name, value in fields.iteritems():
@@ -11,6 +11,7 @@ from django.test.utils import override_settings
 from contentstore import utils
 from contentstore.tests.utils import CourseTestCase
 from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.draft_and_published import publish_state_key
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
@@ -329,6 +330,16 @@ class ReleaseDateSourceTest(CourseTestCase):
         self._update_release_dates(self.date_one, self.date_two, self.date_two)
         self._verify_release_date_source(self.sequential, self.sequential)
 
+    def test_subtree_publish_info(self):
+        """Tests that the release date sources found for a whole course match find_release_date_source"""
+        self._update_release_dates(self.date_one, self.date_two, self.date_two)
+        publish_info = utils.get_subtree_publish_info(self.store.get_course(self.course.id, depth=None))
+        for item, expected_source in [
+                (self.chapter, self.chapter), (self.sequential, self.sequential), (self.vertical, self.sequential)
+        ]:
+            source = publish_info[publish_state_key(item.location)].release_date_source
+            self.assertEqual(source.location, expected_source.location)
+
 
 class StaffLockTest(CourseTestCase):
     """Base class for testing staff lock functions."""
@@ -408,6 +419,16 @@ class StaffLockSourceTest(StaffLockTest):
         self._update_staff_locks(False, False, False)
         self.assertIsNone(utils.find_staff_lock_source(self.vertical))
 
+    def test_subtree_publish_info(self):
+        """Tests that the staff lock sources found for a whole section match find_staff_lock_source"""
+        self._update_staff_locks(False, True, False)
+        publish_info = utils.get_subtree_publish_info(self.store.get_item(self.chapter.location))
+        self.assertIsNone(publish_info[publish_state_key(self.chapter.location)].staff_lock_source)
+        for item in (self.sequential, self.vertical):
+            source = publish_info[publish_state_key(item.location)].staff_lock_source
+            self.assertEqual(source.location, self.sequential.location)
+        self.assertNotIn(publish_state_key(self.orphan.location), publish_info)
+
 
 class InheritedStaffLockTest(StaffLockTest):
     """Tests for determining if an xblock inherits a staff lock."""
@@ -6,6 +6,7 @@ Common utility functions useful throughout the contentstore
 import copy
 import logging
 import re
+from collections import namedtuple
 from datetime import datetime
 from pytz import UTC
 
@@ -18,6 +19,7 @@ from django_comment_common.utils import seed_permissions_roles
 from xmodule.contentstore.content import StaticContent
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.draft_and_published import publish_state_key
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from opaque_keys.edx.keys import UsageKey, CourseKey
 from student.roles import CourseInstructorRole, CourseStaffRole
@@ -33,6 +35,11 @@ NOTES_PANEL = {"name": _("My Notes"), "type": "notes"}
 EDXNOTES_PANEL = {"name": _("Notes"), "type": "edxnotes"}
 EXTRA_TAB_PANELS = dict([(p['type'], p) for p in [OPEN_ENDED_PANEL, NOTES_PANEL, EDXNOTES_PANEL]])
 
+# The publish state of an xblock (see get_subtree_publish_info)
+XBlockPublishInfo = namedtuple(
+    'XBlockPublishInfo', ['has_changes', 'published', 'staff_lock_source', 'release_date_source']
+)
+
 
 def add_instructor(course_key, requesting_user, new_instructor):
     """
@@ -269,6 +276,44 @@ def ancestor_has_staff_lock(xblock, parent_xblock=None):
     return parent_xblock.visible_to_staff_only
 
 
+def get_subtree_publish_info(xblock):
+    """
+    Returns {publish_state_key(location): XBlockPublishInfo} for xblock and all of its descendants:
+    whether they have changes and have been published, from one pass of the modulestore over the
+    subtree, and their staff lock and release date sources (as found by find_staff_lock_source and
+    find_release_date_source), from one walk down it.
+    """
+    states = modulestore().get_subtree_publish_states(xblock)
+    publish_info = {}
+
+    def _add_publish_info(block, staff_lock_source, release_date_source):
+        """
+        Adds the publish info of block, given its sources, and of its descendants.
+        """
+        state = states[publish_state_key(block.location)]
+        publish_info[publish_state_key(block.location)] = XBlockPublishInfo(
+            state.has_changes, state.published, staff_lock_source, release_date_source
+        )
+        if block.has_children:
+            for child in block.get_children():
+                if child.fields['visible_to_staff_only'].is_set_on(child):
+                    child_staff_lock_source = child
+                elif child.category == 'chapter':
+                    child_staff_lock_source = None
+                else:
+                    child_staff_lock_source = staff_lock_source
+
+                if child.category == 'chapter' or child.start != block.start:
+                    child_release_date_source = child
+                else:
+                    child_release_date_source = release_date_source
+
+                _add_publish_info(child, child_staff_lock_source, child_release_date_source)
+
+    _add_publish_info(xblock, find_staff_lock_source(xblock), find_release_date_source(xblock))
+    return publish_info
+
+
 def add_extra_panel_tab(tab_type, course):
     """
     Used to add the panel tab to a course if it does not exist.
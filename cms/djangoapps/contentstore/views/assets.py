@@ -13,6 +13,7 @@ from django.conf import settings
 from edxmako.shortcuts import render_to_response
 from cache_toolbox.core import del_cached_content
 
+from contentstore.tasks import async_thumbnails_enabled, enqueue_thumbnails
 from contentstore.utils import reverse_course_url
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
@@ -264,23 +265,29 @@ def _upload_asset(request, course_key):
         content = sc_partial(upload_file.read())
         tempfile_path = None
 
-    # first let's see if a thumbnail can be created
-    (thumbnail_content, thumbnail_location) = contentstore().generate_thumbnail(
-        content,
-        tempfile_path=tempfile_path,
-    )
-
-    # delete cached thumbnail even if one couldn't be created this time (else
-    # the old thumbnail will continue to show)
-    del_cached_content(thumbnail_location)
-    # now store thumbnail location only if we could create it
-    if thumbnail_content is not None:
-        content.thumbnail_location = thumbnail_location
+    async_thumbnails = async_thumbnails_enabled()
+    if not async_thumbnails:
+        # first let's see if a thumbnail can be created
+        (thumbnail_content, thumbnail_location) = contentstore().generate_thumbnail(
+            content,
+            tempfile_path=tempfile_path,
+        )
+
+        # delete cached thumbnail even if one couldn't be created this time (else
+        # the old thumbnail will continue to show)
+        del_cached_content(thumbnail_location)
+        # now store thumbnail location only if we could create it
+        if thumbnail_content is not None:
+            content.thumbnail_location = thumbnail_location
 
     # then commit the content
     contentstore().save(content)
     del_cached_content(content.location)
 
+    if async_thumbnails and mime_type is not None and mime_type.split('/')[0] == 'image':
+        # the thumbnail will be generated from the saved content, and shows up once it's ready
+        enqueue_thumbnails([content.location])
+
     # readback the saved content - we need the database timestamp
     readback = contentstore().find(content.location)
     locked = getattr(content, 'locked', False)
@@ -19,7 +19,7 @@ from xblock.exceptions import NoSuchHandlerError
 from xblock.plugin import PluginMissingError
 from xblock.runtime import Mixologist
 
-from contentstore.utils import get_lms_link_for_item
+from contentstore.utils import get_lms_link_for_item, get_subtree_publish_info
 from contentstore.views.helpers import get_parent_xblock, is_unit, xblock_type_display_name
 from contentstore.views.item import create_xblock_info, add_container_page_publishing_info
 
@@ -183,11 +183,15 @@ def container_handler(request, usage_key_string):
             assert section is not None, "Could not determine ancestor section from unit " + unicode(unit.location)
 
             # Fetch the XBlock info for use by the container page. Note that it includes information
-            # about the block's ancestors and siblings for use by the Unit Outline.
-            xblock_info = create_xblock_info(xblock, include_ancestor_info=is_unit_page)
+            # about the block's ancestors and siblings for use by the Unit Outline, whose publish
+            # state is computed at once.
+            publish_info = get_subtree_publish_info(section)
+            xblock_info = create_xblock_info(
+                xblock, include_ancestor_info=is_unit_page, publish_info=publish_info
+            )
 
             if is_unit_page:
-                add_container_page_publishing_info(xblock, xblock_info)
+                add_container_page_publishing_info(xblock, xblock_info, publish_info=publish_info)
 
             # need to figure out where this item is in the list of children as the
             # preview will need this
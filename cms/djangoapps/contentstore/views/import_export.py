@@ -2,19 +2,16 @@
 These views handle all actions in Studio related to import and exporting of
 courses
 """
+import itertools
 import logging
 import os
 import re
 import shutil
-import tarfile
 from path import path
-from tempfile import mkdtemp
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.exceptions import SuspiciousOperation, PermissionDenied
-from django.core.files.temp import NamedTemporaryFile
-from django.core.servers.basehttp import FileWrapper
+from django.core.exceptions import PermissionDenied
 from django.http import HttpResponse, HttpResponseNotFound
 from django.utils.translation import ugettext as _
 from django.views.decorators.http import require_http_methods, require_GET
@@ -25,15 +22,15 @@ from xmodule.contentstore.django import contentstore
 from xmodule.exceptions import SerializationError
 from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.keys import CourseKey
-from xmodule.modulestore.xml_importer import import_from_xml
-from xmodule.modulestore.xml_exporter import export_to_xml
+from xmodule.modulestore.xml_exporter import iter_export_to_tar
 
 from student.auth import has_course_author_access
 
-from extract_tar import safetar_extractall
 from util.json_request import JsonResponse
 from util.views import ensure_valid_course_key
 
+from contentstore.import_status import CourseImportStatus
+from contentstore.tasks import import_olx
 from contentstore.utils import reverse_course_url, reverse_usage_url
 
 
@@ -58,220 +55,133 @@ def import_handler(request, course_key_string):
 
     GET
         html: return html page for import page
-        json: not supported
+        json: return the size of the part of the file `filename` uploaded so far
     POST or PUT
-        json: import a course via the .tar.gz file specified in request.FILES
+        json: upload a chunk of the .tar.gz file specified in request.FILES, and once the
+            whole file is uploaded, import the course from it in the import_olx task
     """
     course_key = CourseKey.from_string(course_key_string)
     if not has_course_author_access(request.user, course_key):
         raise PermissionDenied()
 
     if 'application/json' in request.META.get('HTTP_ACCEPT', 'application/json'):
-        if request.method == 'GET':
-            raise NotImplementedError('coming soon')
-        else:
-            # Do everything in a try-except block to make sure everything is properly cleaned up.
-            try:
-                data_root = path(settings.GITHUB_REPO_ROOT)
-                course_subdir = "{0}-{1}-{2}".format(course_key.org, course_key.course, course_key.run)
-                course_dir = data_root / course_subdir
-                filename = request.FILES['course-data'].name
-
-                # Use sessions to keep info about import progress
-                session_status = request.session.setdefault("import_status", {})
-                key = unicode(course_key) + filename
-                _save_request_status(request, key, 0)
-                if not filename.endswith('.tar.gz'):
-                    _save_request_status(request, key, -1)
-                    return JsonResponse(
-                        {
-                            'ErrMsg': _('We only support uploading a .tar.gz file.'),
-                            'Stage': -1
-                        },
-                        status=415
-                    )
+        data_root = path(settings.GITHUB_REPO_ROOT)
+        course_subdir = "{0}-{1}-{2}".format(course_key.org, course_key.course, course_key.run)
+        course_dir = data_root / course_subdir
 
-                temp_filepath = course_dir / filename
-                if not course_dir.isdir():
-                    os.mkdir(course_dir)
-
-                logging.debug('importing course to {0}'.format(temp_filepath))
-
-                # Get upload chunks byte ranges
-                try:
-                    matches = CONTENT_RE.search(request.META["HTTP_CONTENT_RANGE"])
-                    content_range = matches.groupdict()
-                except KeyError:    # Single chunk
-                    # no Content-Range header, so make one that will work
-                    content_range = {'start': 0, 'stop': 1, 'end': 2}
-
-                # stream out the uploaded files in chunks to disk
-                if int(content_range['start']) == 0:
-                    mode = "wb+"
-                else:
-                    mode = "ab+"
-                    size = os.path.getsize(temp_filepath)
-                    # Check to make sure we haven't missed a chunk
-                    # This shouldn't happen, even if different instances are handling
-                    # the same session, but it's always better to catch errors earlier.
-                    if size < int(content_range['start']):
-                        _save_request_status(request, key, -1)
-                        log.warning(
-                            "Reported range %s does not match size downloaded so far %s",
-                            content_range['start'],
-                            size
-                        )
-                        return JsonResponse(
-                            {
-                                'ErrMsg': _('File upload corrupted. Please try again'),
-                                'Stage': -1
-                            },
-                            status=409
-                        )
-                    # The last request sometimes comes twice. This happens because
-                    # nginx sends a 499 error code when the response takes too long.
-                    elif size > int(content_range['stop']) and size == int(content_range['end']):
-                        return JsonResponse({'ImportStatus': 1})
-
-                with open(temp_filepath, mode) as temp_file:
-                    for chunk in request.FILES['course-data'].chunks():
-                        temp_file.write(chunk)
+        if request.method == 'GET':
+            # Report how much of the file was received so far, so that an interrupted upload can be resumed
+            filename = os.path.basename(request.GET.get('filename', ''))
+            temp_filepath = course_dir / filename
+            size = os.path.getsize(temp_filepath) if filename and temp_filepath.isfile() else 0
+            return JsonResponse({"files": [{"name": filename, "size": size}]})
 
-                size = os.path.getsize(temp_filepath)
+        filename = request.FILES['course-data'].name
+        # Keep info about import progress where the import task can update it
+        status = CourseImportStatus(request.user.id, course_key, filename)
 
-                if int(content_range['stop']) != int(content_range['end']) - 1:
-                    # More chunks coming
-                    return JsonResponse({
-                        "files": [{
-                            "name": filename,
-                            "size": size,
-                            "deleteUrl": "",
-                            "deleteType": "",
-                            "url": reverse_course_url('import_handler', course_key),
-                            "thumbnailUrl": ""
-                        }]
-                    })
-            # Send errors to client with stage at which error occurred.
-            except Exception as exception:   # pylint: disable=broad-except
-                _save_request_status(request, key, -1)
-                if course_dir.isdir():
-                    shutil.rmtree(course_dir)
-                    log.info("Course import {0}: Temp data cleared".format(course_key))
-
-                log.exception(
-                    "error importing course"
-                )
+        # Do everything in a try-except block to make sure everything is properly cleaned up.
+        try:
+            if not filename.endswith('.tar.gz'):
+                status.fail(_('We only support uploading a .tar.gz file.'), stage=1)
                 return JsonResponse(
                     {
-                        'ErrMsg': str(exception),
+                        'ErrMsg': _('We only support uploading a .tar.gz file.'),
                         'Stage': -1
                     },
-                    status=400
+                    status=415
                 )
 
-            # try-finally block for proper clean up after receiving last chunk.
+            temp_filepath = course_dir / filename
+            if not course_dir.isdir():
+                os.mkdir(course_dir)
+
+            logging.debug('importing course to {0}'.format(temp_filepath))
+
+            # Get upload chunks byte ranges
             try:
-                # This was the last chunk.
-                log.info("Course import {0}: Upload complete".format(course_key))
-                _save_request_status(request, key, 1)
-
-                tar_file = tarfile.open(temp_filepath)
-                try:
-                    safetar_extractall(tar_file, (course_dir + '/').encode('utf-8'))
-                except SuspiciousOperation as exc:
-                    _save_request_status(request, key, -1)
-                    return JsonResponse(
-                        {
-                            'ErrMsg': 'Unsafe tar file. Aborting import.',
-                            'SuspiciousFileOperationMsg': exc.args[0],
-                            'Stage': -1
-                        },
-                        status=400
+                matches = CONTENT_RE.search(request.META["HTTP_CONTENT_RANGE"])
+                content_range = matches.groupdict()
+            except KeyError:    # Single chunk
+                # no Content-Range header, so make one that will work
+                content_range = {'start': 0, 'stop': 1, 'end': 2}
+
+            # stream out the uploaded files in chunks to disk
+            if int(content_range['start']) == 0:
+                mode = "wb+"
+                status.clear()
+            else:
+                mode = "ab+"
+                size = os.path.getsize(temp_filepath)
+                # Check to make sure we haven't missed a chunk
+                # This shouldn't happen, even if different instances are handling
+                # the same session, but it's always better to catch errors earlier.
+                if size < int(content_range['start']):
+                    status.fail(_('File upload corrupted. Please try again'), stage=1)
+                    log.warning(
+                        "Reported range %s does not match size downloaded so far %s",
+                        content_range['start'],
+                        size
                     )
-                finally:
-                    tar_file.close()
-
-                log.info("Course import {0}: Uploaded file extracted".format(course_key))
-                _save_request_status(request, key, 2)
-
-                # find the 'course.xml' file
-                def get_all_files(directory):
-                    """
-                    For each file in the directory, yield a 2-tuple of (file-name,
-                    directory-path)
-                    """
-                    for dirpath, _dirnames, filenames in os.walk(directory):
-                        for filename in filenames:
-                            yield (filename, dirpath)
-
-                def get_dir_for_fname(directory, filename):
-                    """
-                    Returns the dirpath for the first file found in the directory
-                    with the given name.  If there is no file in the directory with
-                    the specified name, return None.
-                    """
-                    for fname, dirpath in get_all_files(directory):
-                        if fname == filename:
-                            return dirpath
-                    return None
-
-                fname = "course.xml"
-                dirpath = get_dir_for_fname(course_dir, fname)
-                if not dirpath:
-                    _save_request_status(request, key, -2)
                     return JsonResponse(
                         {
-
-                            'ErrMsg': _('Could not find the course.xml file in the package.'),
-                            'Stage': -2
+                            'ErrMsg': _('File upload corrupted. Please try again'),
+                            'Stage': -1
                         },
-                        status=415
+                        status=409
                     )
-
-                dirpath = os.path.relpath(dirpath, data_root)
-                logging.debug('found course.xml at {0}'.format(dirpath))
-
-                log.info("Course import {0}: Extracted file verified".format(course_key))
-                _save_request_status(request, key, 3)
-
-                course_items = import_from_xml(
-                    modulestore(),
-                    request.user.id,
-                    settings.GITHUB_REPO_ROOT,
-                    [dirpath],
-                    load_error_modules=False,
-                    static_content_store=contentstore(),
-                    target_course_id=course_key,
-                )
-
-                new_location = course_items[0].location
-                logging.debug('new course at {0}'.format(new_location))
-
-                log.info("Course import {0}: Course import successful".format(course_key))
-                _save_request_status(request, key, 4)
-
-            # Send errors to client with stage at which error occurred.
-            except Exception as exception:   # pylint: disable=broad-except
-                log.exception(
-                    "error importing course"
-                )
-                return JsonResponse(
-                    {
-                        'ErrMsg': str(exception),
-                        'Stage': -session_status[key]
-                    },
-                    status=400
-                )
-
-            finally:
-                if course_dir.isdir():
-                    shutil.rmtree(course_dir)
-                    log.info("Course import {0}: Temp data cleared".format(course_key))
-                # set failed stage number with negative sign in case of unsuccessful import
-                if session_status[key] != 4:
-                    _save_request_status(request, key, -abs(session_status[key]))
-
-            return JsonResponse({'Status': 'OK'})
+                # The last request sometimes comes twice. This happens because
+                # nginx sends a 499 error code when the response takes too long.
+                elif size > int(content_range['stop']) and size == int(content_range['end']):
+                    return JsonResponse({'ImportStatus': 1})
+                # A chunk which was partially received before is being sent again (e.g. a resumed
+                # upload), so drop what we got of it
+                elif size > int(content_range['start']):
+                    with open(temp_filepath, 'r+b') as temp_file:
+                        temp_file.truncate(int(content_range['start']))
+
+            with open(temp_filepath, mode) as temp_file:
+                for chunk in request.FILES['course-data'].chunks():
+                    temp_file.write(chunk)
+
+            size = os.path.getsize(temp_filepath)
+
+            if int(content_range['stop']) != int(content_range['end']) - 1:
+                # More chunks coming
+                return JsonResponse({
+                    "files": [{
+                        "name": filename,
+                        "size": size,
+                        "deleteUrl": "",
+                        "deleteType": "",
+                        "url": reverse_course_url('import_handler', course_key),
+                        "thumbnailUrl": ""
+                    }]
+                })
+        # Send errors to client with stage at which error occurred.
+        except Exception as exception:   # pylint: disable=broad-except
+            status.fail(str(exception), stage=1)
+            if course_dir.isdir():
+                shutil.rmtree(course_dir)
+                log.info("Course import {0}: Temp data cleared".format(course_key))
+
+            log.exception(
+                "error importing course"
+            )
+            return JsonResponse(
+                {
+                    'ErrMsg': str(exception),
+                    'Stage': -1
+                },
+                status=400
+            )
+
+        # This was the last chunk: extract and import the file in the background, as this
+        # may take longer than any web request should.
+        log.info("Course import {0}: Upload complete".format(course_key))
+        status.set_stage(1)
+        import_olx.delay(request.user.id, unicode(course_key), temp_filepath, filename)
+        return JsonResponse({'ImportStatus': 1})
     elif request.method == 'GET':  # assume html
         course_module = modulestore().get_course(course_key)
         return render_to_response('import.html', {
@@ -283,18 +193,6 @@ def import_handler(request, course_key_string):
         return HttpResponseNotFound()
 
 
-def _save_request_status(request, key, status):
-    """
-    Save import status for a course in request session
-    """
-    session_status = request.session.get('import_status')
-    if session_status is None:
-        session_status = request.session.setdefault("import_status", {})
-
-    session_status[key] = status
-    request.session.save()
-
-
 # pylint: disable=unused-argument
 @require_GET
 @ensure_csrf_cookie
@@ -311,18 +209,20 @@ def import_status_handler(request, course_key_string, filename=None):
         3 : Importing to mongo
         4 : Import successful
 
+    along with the numbers of blocks and static files imported so far and, for failed imports,
+    the error message.
     """
     course_key = CourseKey.from_string(course_key_string)
     if not has_course_author_access(request.user, course_key):
         raise PermissionDenied()
 
-    try:
-        session_status = request.session["import_status"]
-        status = session_status[course_key_string + filename]
-    except KeyError:
-        status = 0
-
-    return JsonResponse({"ImportStatus": status})
+    status = CourseImportStatus(request.user.id, course_key, filename).get()
+    return JsonResponse({
+        "ImportStatus": status['Stage'],
+        "BlocksImported": status['BlocksImported'],
+        "AssetsImported": status['AssetsImported'],
+        "ErrMsg": status.get('ErrMsg', ''),
+    })
 
 
 # pylint: disable=unused-argument
@@ -357,15 +257,11 @@ def export_handler(request, course_key_string):
     export_url = reverse_course_url('export_handler', course_key) + '?_accept=application/x-tgz'
     if 'application/x-tgz' in requested_format:
         name = course_module.url_name
-        export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")
-        root_dir = path(mkdtemp())
+        export_chunks = iter_export_to_tar(modulestore(), contentstore(), course_module.id, name)
 
         try:
-            export_to_xml(modulestore(), contentstore(), course_module.id, root_dir, name)
-
-            logging.debug(u'tar file being generated at {0}'.format(export_file.name))
-            with tarfile.open(name=export_file.name, mode='w:gz') as tar_file:
-                tar_file.add(root_dir / name, arcname=name)
+            # the course's xml is exported before its first chunk, so any error is raised now
+            first_chunk = next(export_chunks)
         except SerializationError as exc:
             log.exception(u'There was an error exporting course %s', course_module.id)
             unit = None
@@ -403,13 +299,10 @@ def export_handler(request, course_key_string):
                 'course_home_url': reverse_course_url("course_handler", course_key),
                 'export_url': export_url
             })
-        finally:
-            shutil.rmtree(root_dir / name)
 
-        wrapper = FileWrapper(export_file)
-        response = HttpResponse(wrapper, content_type='application/x-tgz')
-        response['Content-Disposition'] = 'attachment; filename=%s' % os.path.basename(export_file.name.encode('utf-8'))
-        response['Content-Length'] = os.path.getsize(export_file.name)
+        # the static assets are streamed into the archive as it's sent out
+        response = HttpResponse(itertools.chain([first_chunk], export_chunks), content_type='application/x-tgz')
+        response['Content-Disposition'] = 'attachment; filename=%s.tar.gz' % name.encode('utf-8')
         return response
 
     elif 'text/html' in requested_format:
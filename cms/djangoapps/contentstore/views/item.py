@@ -29,7 +29,7 @@ from xmodule.modulestore import ModuleStoreEnum, EdxJSONEncoder
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError, InvalidLocationError
 from xmodule.modulestore.inheritance import own_metadata
-from xmodule.modulestore.draft_and_published import DIRECT_ONLY_CATEGORIES
+from xmodule.modulestore.draft_and_published import DIRECT_ONLY_CATEGORIES, publish_state_key
 from xmodule.x_module import PREVIEW_VIEWS, STUDIO_VIEW, STUDENT_VIEW
 
 from xmodule.course_module import DEFAULT_START_DATE
@@ -40,7 +40,7 @@ from util.json_request import expect_json, JsonResponse
 
 from student.auth import has_studio_write_access, has_studio_read_access
 from contentstore.utils import find_release_date_source, find_staff_lock_source, is_currently_visible_to_students, \
-    ancestor_has_staff_lock, has_children_visible_to_specific_content_groups
+    ancestor_has_staff_lock, has_children_visible_to_specific_content_groups, get_subtree_publish_info
 from contentstore.views.helpers import is_unit, xblock_studio_url, xblock_primary_child_category, \
     xblock_type_display_name, get_parent_xblock, create_xblock, usage_key_with_run
 from contentstore.views.preview import get_preview_fragment
@@ -731,7 +731,8 @@ def _get_module_info(xblock, rewrite_static_links=True, include_ancestor_info=Fa
 
 
 def create_xblock_info(xblock, data=None, metadata=None, include_ancestor_info=False, include_child_info=False,
-                       course_outline=False, include_children_predicate=NEVER, parent_xblock=None, graders=None):
+                       course_outline=False, include_children_predicate=NEVER, parent_xblock=None, graders=None,
+                       publish_info=None):
     """
     Creates the information needed for client-side XBlockInfo.
 
@@ -746,13 +747,22 @@ def create_xblock_info(xblock, data=None, metadata=None, include_ancestor_info=F
 
     In addition, an optional include_children_predicate argument can be provided to define whether or
     not a particular xblock should have its children included.
+
+    The publish state of the xblock is looked up in publish_info, as returned by get_subtree_publish_info,
+    if given and the xblock is in it. It's computed for the whole course outline at once.
     """
     is_library_block = isinstance(xblock.location, LibraryUsageLocator)
     is_xblock_unit = is_unit(xblock, parent_xblock)
+    if publish_info is None and course_outline and include_child_info and not is_library_block:
+        publish_info = get_subtree_publish_info(xblock)
+    xblock_publish_info = publish_info.get(publish_state_key(xblock.location)) if publish_info else None
     # this should not be calculated for Sections and Subsections on Unit page or for library blocks
     has_changes = None
     if (is_xblock_unit or course_outline) and not is_library_block:
-        has_changes = modulestore().has_changes(xblock)
+        if xblock_publish_info is not None:
+            has_changes = xblock_publish_info.has_changes
+        else:
+            has_changes = modulestore().has_changes(xblock)
 
     if graders is None:
         if not is_library_block:
@@ -771,6 +781,7 @@ def create_xblock_info(xblock, data=None, metadata=None, include_ancestor_info=F
             course_outline,
             graders,
             include_children_predicate=include_children_predicate,
+            publish_info=publish_info,
         )
     else:
         child_info = None
@@ -779,7 +790,12 @@ def create_xblock_info(xblock, data=None, metadata=None, include_ancestor_info=F
         visibility_state = _compute_visibility_state(xblock, child_info, is_xblock_unit and has_changes)
     else:
         visibility_state = None
-    published = modulestore().has_published_version(xblock) if not is_library_block else None
+    if is_library_block:
+        published = None
+    elif xblock_publish_info is not None:
+        published = xblock_publish_info.published
+    else:
+        published = modulestore().has_published_version(xblock)
 
     #instead of adding a new feature directly into xblock-info, we should add them into override_type.
     override_type = {}
@@ -812,7 +828,7 @@ def create_xblock_info(xblock, data=None, metadata=None, include_ancestor_info=F
     if metadata is not None:
         xblock_info["metadata"] = metadata
     if include_ancestor_info:
-        xblock_info['ancestor_info'] = _create_xblock_ancestor_info(xblock, course_outline)
+        xblock_info['ancestor_info'] = _create_xblock_ancestor_info(xblock, course_outline, publish_info)
     if child_info:
         xblock_info['child_info'] = child_info
     if visibility_state == VisibilityState.staff_only:
@@ -831,10 +847,10 @@ def create_xblock_info(xblock, data=None, metadata=None, include_ancestor_info=F
     return xblock_info
 
 
-def add_container_page_publishing_info(xblock, xblock_info):  # pylint: disable=invalid-name
+def add_container_page_publishing_info(xblock, xblock_info, publish_info=None):  # pylint: disable=invalid-name
     """
     Adds information about the xblock's publish state to the supplied
-    xblock_info for the container page.
+    xblock_info for the container page, using publish_info as in create_xblock_info.
     """
     def safe_get_username(user_id):
         """
@@ -857,10 +873,11 @@ def add_container_page_publishing_info(xblock, xblock_info):  # pylint: disable=
     xblock_info["published_by"] = safe_get_username(xblock.published_by)
     xblock_info["currently_visible_to_students"] = is_currently_visible_to_students(xblock)
     xblock_info["has_content_group_components"] = has_children_visible_to_specific_content_groups(xblock)
+    xblock_publish_info = publish_info.get(publish_state_key(xblock.location)) if publish_info else None
     if xblock_info["release_date"]:
-        xblock_info["release_date_from"] = _get_release_date_from(xblock)
+        xblock_info["release_date_from"] = _get_release_date_from(xblock, xblock_publish_info)
     if xblock_info["visibility_state"] == VisibilityState.staff_only:
-        xblock_info["staff_lock_from"] = _get_staff_lock_from(xblock)
+        xblock_info["staff_lock_from"] = _get_staff_lock_from(xblock, xblock_publish_info)
     else:
         xblock_info["staff_lock_from"] = None
 
@@ -934,7 +951,7 @@ def _compute_visibility_state(xblock, child_info, is_unit_with_changes):
         return VisibilityState.ready
 
 
-def _create_xblock_ancestor_info(xblock, course_outline):
+def _create_xblock_ancestor_info(xblock, course_outline, publish_info=None):
     """
     Returns information about the ancestors of an xblock. Note that the direct parent will also return
     information about all of its children.
@@ -951,7 +968,8 @@ def _create_xblock_ancestor_info(xblock, course_outline):
                 ancestor,
                 include_child_info=include_child_info,
                 course_outline=course_outline,
-                include_children_predicate=direct_children_only
+                include_children_predicate=direct_children_only,
+                publish_info=publish_info
             ))
             collect_ancestor_info(get_parent_xblock(ancestor))
     collect_ancestor_info(get_parent_xblock(xblock), include_child_info=True)
@@ -960,7 +978,7 @@ def _create_xblock_ancestor_info(xblock, course_outline):
     }
 
 
-def _create_xblock_child_info(xblock, course_outline, graders, include_children_predicate=NEVER):
+def _create_xblock_child_info(xblock, course_outline, graders, include_children_predicate=NEVER, publish_info=None):
     """
     Returns information about the children of an xblock, as well as about the primary category
     of xblock expected as children.
@@ -978,7 +996,8 @@ def _create_xblock_child_info(xblock, course_outline, graders, include_children_
                 child, include_child_info=True, course_outline=course_outline,
                 include_children_predicate=include_children_predicate,
                 parent_xblock=xblock,
-                graders=graders
+                graders=graders,
+                publish_info=publish_info
             ) for child in xblock.get_children()
         ]
     return child_info
@@ -992,18 +1011,25 @@ def _get_release_date(xblock):
     return get_default_time_display(xblock.start) if xblock.start != DEFAULT_START_DATE else None
 
 
-def _get_release_date_from(xblock):
+def _get_release_date_from(xblock, xblock_publish_info=None):
     """
     Returns a string representation of the section or subsection that sets the xblock's release date
     """
-    return _xblock_type_and_display_name(find_release_date_source(xblock))
+    if xblock_publish_info is not None:
+        source = xblock_publish_info.release_date_source
+    else:
+        source = find_release_date_source(xblock)
+    return _xblock_type_and_display_name(source)
 
 
-def _get_staff_lock_from(xblock):
+def _get_staff_lock_from(xblock, xblock_publish_info=None):
     """
     Returns a string representation of the section or subsection that sets the xblock's release date
     """
-    source = find_staff_lock_source(xblock)
+    if xblock_publish_info is not None:
+        source = xblock_publish_info.staff_lock_source
+    else:
+        source = find_staff_lock_source(xblock)
     return _xblock_type_and_display_name(source) if source else None
 
 
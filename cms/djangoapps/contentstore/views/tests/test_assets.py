@@ -241,6 +241,20 @@ class UploadTestCase(AssetsTestCase):
         })
         self.assertEquals(resp.status_code, status_code)
 
+    @mock.patch.dict('django.conf.settings.FEATURES', {'ENABLE_ASYNC_THUMBNAILS': True})
+    @mock.patch('contentstore.views.assets.enqueue_thumbnails')
+    def test_async_thumbnails(self, enqueue_thumbnails):
+        with mock.patch('xmodule.contentstore.mongo.MongoContentStore.generate_thumbnail') as generate_thumbnail:
+            resp = self.upload_asset(extension=".jpg")
+            self.assertFalse(generate_thumbnail.called)
+        self.assertEquals(resp.status_code, 200)
+        self.assertIsNone(json.loads(resp.content)['asset']['thumbnail'])
+        enqueue_thumbnails.assert_called_once_with([StaticContent.compute_location(self.course.id, 'asset-1.jpg')])
+
+        enqueue_thumbnails.reset_mock()
+        self.upload_asset()
+        self.assertFalse(enqueue_thumbnails.called)
+
 
 class DownloadTestCase(AssetsTestCase):
     """
@@ -9,12 +9,16 @@ import shutil
 import tarfile
 import tempfile
 from path import path
+from StringIO import StringIO
 from uuid import uuid4
 
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test.utils import override_settings
 from django.conf import settings
 from contentstore.utils import reverse_course_url
 
+from xmodule.contentstore.content import StaticContent
+from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.tests.factories import ItemFactory
 
 from contentstore.tests.utils import CourseTestCase
@@ -82,18 +86,25 @@ class ImportTestCase(CourseTestCase):
                     "name": self.bad_tar,
                     "course-data": [btar]
                 })
-        self.assertEquals(resp.status_code, 415)
+        self.assertEquals(resp.status_code, 200)
         # Check that `import_status` returns the appropriate stage (i.e., the
         # stage at which import failed).
+        status = self._import_status(self.bad_tar)
+        self.assertEquals(status["ImportStatus"], -2)
+        self.assertIn("course.xml", status["ErrMsg"])
+
+    def _import_status(self, tarpath):
+        """
+        Return the status of the import of the file at tarpath as reported by `import_status`.
+        """
         resp_status = self.client.get(
             reverse_course_url(
                 'import_status_handler',
                 self.course.id,
-                kwargs={'filename': os.path.split(self.bad_tar)[1]}
+                kwargs={'filename': os.path.split(tarpath)[1]}
             )
         )
-
-        self.assertEquals(json.loads(resp_status.content)["ImportStatus"], -2)
+        return json.loads(resp_status.content)
 
     def test_with_coursexml(self):
         """
@@ -105,6 +116,37 @@ class ImportTestCase(CourseTestCase):
             resp = self.client.post(self.url, args)
 
         self.assertEquals(resp.status_code, 200)
+        self.assertEquals(json.loads(resp.content)["ImportStatus"], 1)
+
+        status = self._import_status(self.good_tar)
+        self.assertEquals(status["ImportStatus"], 4)
+        self.assertEquals(status["BlocksImported"], 1)
+        self.assertEquals(status["AssetsImported"], 0)
+
+    def test_upload_size(self):
+        """
+        Check that the size of the file uploaded so far can be asked for, to resume an upload.
+        """
+        filename = os.path.split(self.good_tar)[1]
+        resp = self.client.get(self.url, {'filename': filename}, HTTP_ACCEPT='application/json')
+        self.assertEquals(resp.status_code, 200)
+        self.assertEquals(json.loads(resp.content)["files"], [{"name": filename, "size": 0}])
+
+        course_dir = path(settings.GITHUB_REPO_ROOT) / "{0.org}-{0.course}-{0.run}".format(self.course.id)
+        self.addCleanup(shutil.rmtree, course_dir, ignore_errors=True)
+        with open(self.good_tar) as gtar:
+            first_chunk = gtar.read(10)
+            total = os.path.getsize(self.good_tar)
+            course_data = SimpleUploadedFile(filename, first_chunk)
+            resp = self.client.post(
+                self.url,
+                {"course-data": [course_data]},
+                HTTP_CONTENT_RANGE='bytes 0-9/{}'.format(total),
+            )
+        self.assertEquals(resp.status_code, 200)
+
+        resp = self.client.get(self.url, {'filename': filename}, HTTP_ACCEPT='application/json')
+        self.assertEquals(json.loads(resp.content)["files"], [{"name": filename, "size": 10}])
 
     def test_import_in_existing_course(self):
         """
@@ -213,7 +255,7 @@ class ImportTestCase(CourseTestCase):
         outside or directly in the working directory,
             'special files' (character device, block device or FIFOs),
 
-        all raise exceptions/400s.
+        all fail the import at the stage extracting the file.
         """
 
         def try_tar(tarpath):
@@ -221,8 +263,10 @@ class ImportTestCase(CourseTestCase):
             with open(tarpath) as tar:
                 args = {"name": tarpath, "course-data": [tar]}
                 resp = self.client.post(self.url, args)
-            self.assertEquals(resp.status_code, 400)
-            self.assertTrue("SuspiciousFileOperation" in resp.content)
+            self.assertEquals(resp.status_code, 200)
+            status = self._import_status(tarpath)
+            self.assertEquals(status["ImportStatus"], -1)
+            self.assertIn("Unsafe tar file", status["ErrMsg"])
 
         try_tar(self._fifo_tar())
         try_tar(self._symlink_tar())
@@ -231,14 +275,7 @@ class ImportTestCase(CourseTestCase):
         # Check that `import_status` returns the appropriate stage (i.e.,
         # either 3, indicating all previous steps are completed, or 0,
         # indicating no upload in progress)
-        resp_status = self.client.get(
-            reverse_course_url(
-                'import_status_handler',
-                self.course.id,
-                kwargs={'filename': os.path.split(self.good_tar)[1]}
-            )
-        )
-        import_status = json.loads(resp_status.content)["ImportStatus"]
+        import_status = self._import_status(self.good_tar)["ImportStatus"]
         self.assertIn(import_status, (0, 3))
 
 
@@ -283,6 +320,22 @@ class ExportTestCase(CourseTestCase):
         resp = self.client.get(self.url + '?_accept=application/x-tgz')
         self._verify_export_succeeded(resp)
 
+    def test_export_targz_streams_assets(self):
+        """
+        Check that the static assets and their policy are streamed into the tar.gz file.
+        """
+        asset_key = StaticContent.compute_location(self.course.id, 'sample.txt')
+        contentstore().save(StaticContent(asset_key, 'sample.txt', 'text/plain', 'sample asset data'))
+
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/x-tgz')
+        self._verify_export_succeeded(resp)
+        with tarfile.open(fileobj=StringIO(resp.content)) as tar_file:
+            name = self.course.location.name
+            self.assertEquals(tar_file.extractfile(name + '/static/sample.txt').read(), 'sample asset data')
+            policy = json.load(tar_file.extractfile(name + '/policies/assets.json'))
+            self.assertEquals(policy['sample.txt']['displayname'], 'sample.txt')
+            self.assertIsNotNone(tar_file.getmember(name + '/course.xml'))
+
     def _verify_export_succeeded(self, resp):
         """ Export success helper method. """
         self.assertEquals(resp.status_code, 200)
@@ -120,6 +120,11 @@ STATIC_ROOT_BASE = ENV_TOKENS.get('STATIC_ROOT_BASE', None)
 if STATIC_ROOT_BASE:
     STATIC_ROOT = path(STATIC_ROOT_BASE) / EDX_PLATFORM_REVISION
 
+# The templates are compiled ahead of time for each revision (see the compile_templates command), and
+# not checked for changes once loaded
+MAKO_MODULE_DIR = os.path.join(ENV_TOKENS.get('MAKO_MODULE_DIR', MAKO_MODULE_DIR), EDX_PLATFORM_REVISION)
+MAKO_FILESYSTEM_CHECKS = ENV_TOKENS.get('MAKO_FILESYSTEM_CHECKS', False)
+
 EMAIL_BACKEND = ENV_TOKENS.get('EMAIL_BACKEND', EMAIL_BACKEND)
 EMAIL_FILE_PATH = ENV_TOKENS.get('EMAIL_FILE_PATH', None)
 
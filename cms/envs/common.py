@@ -144,6 +144,9 @@ FEATURES = {
 
     # Enable the courseware search functionality
     'ENABLE_COURSEWARE_INDEX': False,
+
+    # Generate the thumbnails of uploaded and imported images in a celery task
+    'ENABLE_ASYNC_THUMBNAILS': False,
 }
 
 ENABLE_JASMINE = False
@@ -171,6 +174,8 @@ GEOIPV6_PATH = REPO_ROOT / "common/static/data/geoip/GeoIPv6.dat"
 # This is where we stick our compiled template files.
 import tempfile
 MAKO_MODULE_DIR = os.path.join(tempfile.gettempdir(), 'mako_cms')
+# Whether the templates are checked for changes each time they are used
+MAKO_FILESYSTEM_CHECKS = True
 MAKO_TEMPLATES = {}
 MAKO_TEMPLATES['main'] = [
     PROJECT_ROOT / 'templates',
@@ -411,6 +416,9 @@ EMBARGO_SITE_REDIRECT_URL = None
 ############################### Pipeline #######################################
 STATICFILES_STORAGE = 'cms.lib.django_require.staticstorage.OptimizedCachedRequireJsStorage'
 
+# Number of static url lookups and rewritten texts memoized by static_replace in each process (0 disables it)
+STATIC_URL_REWRITE_MEMO_SIZE = 1000
+
 from rooted_paths import rooted_glob
 
 PIPELINE_CSS = {
@@ -80,6 +80,9 @@ STATICFILES_STORAGE = 'pipeline.storage.NonPackagingPipelineStorage'
 STATIC_URL = "/static/"
 PIPELINE_ENABLED = False
 
+# The tests of static_replace mock staticfiles_storage
+STATIC_URL_REWRITE_MEMO_SIZE = 0
+
 TENDER_DOMAIN = "help.edge.edx.org"
 
 # Update module store settings per defaults for tests
@@ -15,7 +15,37 @@ define([
             ],
             // Display the status of last file upload on page load
             lastFileUpload = $.cookie('lastfileupload'),
-            file;
+            file,
+            submit = function(data) {
+                data.submit().complete(function(result, textStatus, xhr) {
+                    window.onbeforeunload = null;
+                    if (xhr.status != 200) {
+                        var serverMsg, errMsg, stage;
+                        try{
+                            serverMsg = $.parseJSON(result.responseText);
+                        } catch (e) {
+                            return;
+                        }
+                        errMsg = serverMsg.hasOwnProperty('ErrMsg') ?  serverMsg.ErrMsg : '' ;
+                        if (serverMsg.hasOwnProperty('Stage')) {
+                            stage = Math.abs(serverMsg.Stage);
+                            CourseImport.stageError(stage, defaults[stage] + errMsg);
+                        }
+                        else {
+                            alert(gettext('Your import has failed.') + '\n\n' + errMsg);
+                        }
+                        chooseBtn.html(gettext('Choose new file')).show();
+                        bar.hide();
+                    } else if ($.parseJSON(result.responseText).hasOwnProperty('ImportStatus')) {
+                        // The file was uploaded, and is being imported in the background: keep
+                        // getting the status of the import
+                        return;
+                    }
+                    CourseImport.stopGetStatus = true;
+                    chooseBtn.html(gettext('Choose new file')).show();
+                    bar.hide();
+                });
+            };
 
         if (lastFileUpload){
             CourseImport.getAndStartUploadFeedback(feedbackUrl.replace('fillerName', lastFileUpload), lastFileUpload);
@@ -37,29 +67,14 @@ define([
                         $.cookie('lastfileupload', file.name);
                         submitBtn.hide();
                         CourseImport.startUploadFeedback();
-                        data.submit().complete(function(result, textStatus, xhr) {
-                            window.onbeforeunload = null;
-                            if (xhr.status != 200) {
-                                var serverMsg, errMsg, stage;
-                                try{
-                                    serverMsg = $.parseJSON(result.responseText);
-                                } catch (e) {
-                                    return;
-                                }
-                                errMsg = serverMsg.hasOwnProperty('ErrMsg') ?  serverMsg.ErrMsg : '' ;
-                                if (serverMsg.hasOwnProperty('Stage')) {
-                                    stage = Math.abs(serverMsg.Stage);
-                                    CourseImport.stageError(stage, defaults[stage] + errMsg);
-                                }
-                                else {
-                                    alert(gettext('Your import has failed.') + '\n\n' + errMsg);
-                                }
-                                chooseBtn.html(gettext('Choose new file')).show();
-                                bar.hide();
+                        // Resume an upload of the same file which was interrupted
+                        $.getJSON($('#fileupload').prop('action'), {filename: file.name}, function(status) {
+                            var uploaded = status.files[0].size;
+                            if (uploaded > 0 && uploaded < file.size) {
+                                data.uploadedBytes = uploaded;
                             }
-                            CourseImport.stopGetStatus = true;
-                            chooseBtn.html(gettext('Choose new file')).show();
-                            bar.hide();
+                        }).always(function() {
+                            submit(data);
                         });
                     });
                 } else {
@@ -94,7 +109,9 @@ define([
             done: function(event, data){
                 bar.hide();
                 window.onbeforeunload = null;
-                CourseImport.displayFinishedImport();
+                if (!data.result.hasOwnProperty('ImportStatus')) {
+                    CourseImport.displayFinishedImport();
+                }
             },
             start: function(event) {
                 window.onbeforeunload = function() {
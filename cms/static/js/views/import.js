@@ -39,6 +39,24 @@ define(
             updateCog(curList, true);
         };
 
+        /**
+         * Show how much of the course was imported so far under the stage updating the course.
+         * @param {object} status Import status from the server.
+         */
+        var updateCounts = function (status) {
+            var elem = $('ol.status-progress').children().eq(3).find('.status-detail'),
+                counts = elem.find('p.import-counts');
+            if (!status || !(status.BlocksImported || status.AssetsImported)) { return; }
+            if (counts.length === 0) {
+                counts = $("<p class='copy import-counts'></p>").appendTo(elem);
+            }
+            counts.text(interpolate(
+                gettext('%(blocks)s components and %(assets)s files imported so far'),
+                {blocks: status.BlocksImported, assets: status.AssetsImported},
+                true
+            ));
+        };
+
         /**
          * Check for import status updates every `timeout` milliseconds, and update
          * the page accordingly.
@@ -46,8 +64,9 @@ define(
          * @param {int} timeout Number of milliseconds to wait in between ajax calls
          *     for new updates.
          * @param {int} stage Starting stage.
+         * @param {object} status Last import status received from the server.
          */
-        var getStatus = function (url, timeout, stage) {
+        var getStatus = function (url, timeout, stage, status) {
             var currentStage = stage || 0;
             if (currentStage > 1) { CourseImport.okayToNavigateAway = true; }
             if (CourseImport.stopGetStatus) { return ;}
@@ -59,19 +78,21 @@ define(
             } else if (currentStage < 0) {
                 // Failed
                 var errMsg = gettext("Error importing course");
+                if (status && status.ErrMsg) { errMsg += ': ' + status.ErrMsg; }
                 var failedStage = Math.abs(currentStage);
                 CourseImport.stageError(failedStage, errMsg);
                 $('.view-import .choose-file-button').html(gettext("Choose new file")).show();
             } else {
                 // In progress
                 updateStage(currentStage);
+                updateCounts(status);
             }
 
             var time = timeout || 1000;
             $.getJSON(url,
                 function (data) {
                     setTimeout(function () {
-                        getStatus(url, time, data.ImportStatus);
+                        getStatus(url, time, data.ImportStatus, data);
                     }, time);
                 }
             );
@@ -105,6 +126,7 @@ define(
                         removeClass("has-error").
                         addClass("is-not-started");
                     $(elem).find('p.error').remove(); // remove error messages
+                    $(elem).find('p.import-counts').remove();
                     $(elem).find('p.copy').show();
                     updateCog($(elem), false);
                 });
@@ -162,7 +184,7 @@ define(
                                 $('.view-import .choose-file-button').hide();
                                 var time = 1000;
                                 setTimeout(function () {
-                                    getStatus(url, time, data.ImportStatus);
+                                    getStatus(url, time, data.ImportStatus, data);
                                 }, time);
                             }
                         }
@@ -2,11 +2,15 @@
 Middleware to serve assets.
 """
 
+import calendar
+import datetime
 import logging
+import uuid
 
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden
 )
+from django.utils.http import http_date, parse_http_date_safe
 from student.models import CourseEnrollment
 
 from xmodule.assetstore.assetmgr import AssetManager
@@ -23,6 +27,9 @@ from xmodule.exceptions import NotFoundError
 
 log = logging.getLogger(__name__)
 
+# The Last-Modified format sent before switching to RFC 1123 dates, still accepted in If-Modified-Since
+LEGACY_LAST_MODIFIED_FORMAT = "{:%a, %d-%b-%Y %H:%M:%S GMT}"
+
 
 class StaticContentServer(object):
     def process_request(self, request):
@@ -75,16 +82,21 @@ class StaticContentServer(object):
                     ):
                         return HttpResponseForbidden('Unauthorized')
 
-            # convert over the DB persistent last modified timestamp to a HTTP compatible
-            # timestamp, so we can simply compare the strings
-            last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+            # convert over the DB persistent last modified timestamp to a HTTP compatible timestamp
+            last_modified_at = calendar.timegm(content.last_modified_at.utctimetuple())
+            last_modified_at_str = http_date(last_modified_at)
+            # the content's md5 makes a strong validator, as it only changes when the bytes do
+            content_digest = getattr(content, 'content_digest', None)
+            etag = '"{}"'.format(content_digest) if content_digest else None
 
-            # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            # see if the client has cached this content, if so then compare the validators
+            # and if they still match then just return a 304 (Not Modified)
+            if is_not_modified(request, etag, last_modified_at):
+                response = HttpResponseNotModified()
+                response['Last-Modified'] = last_modified_at_str
+                if etag:
+                    response['ETag'] = etag
+                return response
 
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
@@ -93,11 +105,7 @@ class StaticContentServer(object):
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
-            if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
+            if request.META.get('HTTP_RANGE') and is_range_fresh(request, etag, last_modified_at):
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -110,43 +118,152 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
-                        log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                        )
                     else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
+                        # Unsatisfiable ranges are dropped; the request fails only if none of them are satisfiable
+                        ranges = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
+                        if not ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            response = HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response['Content-Range'] = 'bytes */{length}'.format(length=content.length)
+                            return response
+                        elif len(ranges) == 1:
+                            first, last = ranges[0]
                             response = HttpResponse(content.stream_data_in_range(first, last))
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            # Content for multiple ranges is sent as a multipart message.
+                            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                            boundary = uuid.uuid4().hex
+                            parts = multipart_byteranges_parts(content, ranges, boundary)
+                            response = HttpResponse(
+                                stream_multipart_byteranges(content, parts, boundary),
+                                content_type='multipart/byteranges; boundary={}'.format(boundary)
                             )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response['Content-Length'] = str(multipart_byteranges_length(parts, boundary))
+                        response.status_code = 206  # Partial Content
 
             # If Range header is absent or syntactically invalid return a full content response.
+            # The body is handed to the response as an iterator so that it is streamed out to the
+            # client as it is read rather than being assembled in memory first.
             if response is None:
                 response = HttpResponse(content.stream_data())
                 response['Content-Length'] = content.length
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
+            if not response['Content-Type'].startswith('multipart/byteranges'):
+                response['Content-Type'] = content.content_type
             response['Last-Modified'] = last_modified_at_str
+            if etag:
+                response['ETag'] = etag
 
             return response
 
 
+def etag_matches(header_value, etag, weak=True):
+    """
+    Returns whether the entity tag list in an If-None-Match or If-Range header matches etag.
+
+    If-None-Match uses the weak comparison function, so weak tags (W/"...") also match.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec13.html#sec13.3.3
+    """
+    if etag is None:
+        return False
+    for candidate in header_value.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if weak and candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def is_not_modified(request, etag, last_modified_at):
+    """
+    Returns whether the client's cached copy is still valid, so a 304 can be returned.
+
+    If-None-Match takes precedence over If-Modified-Since when both are sent.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.26
+    """
+    if 'HTTP_IF_NONE_MATCH' in request.META:
+        return etag_matches(request.META['HTTP_IF_NONE_MATCH'], etag)
+
+    if 'HTTP_IF_MODIFIED_SINCE' in request.META:
+        if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
+        # clients may still hold the non-standard timestamp format we used to send in Last-Modified
+        if if_modified_since == LEGACY_LAST_MODIFIED_FORMAT.format(datetime.datetime.utcfromtimestamp(last_modified_at)):
+            return True
+        if_modified_since = parse_http_date_safe(if_modified_since.split(';')[0])
+        return if_modified_since is not None and last_modified_at <= if_modified_since
+
+    return False
+
+
+def is_range_fresh(request, etag, last_modified_at):
+    """
+    Returns whether the Range header should be honored given the (optional) If-Range validator.
+
+    If-Range uses the strong comparison function, so weak tags never match.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.27
+    """
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if_range_date = parse_http_date_safe(if_range)
+    if if_range_date is not None:
+        return if_range_date == last_modified_at
+    return etag_matches(if_range, etag, weak=False)
+
+
+def multipart_byteranges_parts(content, ranges, boundary):
+    """
+    Returns a list of (part header, first, last) tuples for a multipart/byteranges body.
+    """
+    parts = []
+    for first, last in ranges:
+        part_header = (
+            '--{boundary}\r\n'
+            'Content-Type: {content_type}\r\n'
+            'Content-Range: bytes {first}-{last}/{length}\r\n'
+            '\r\n'
+        ).format(
+            boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+        )
+        parts.append((part_header, first, last))
+    return parts
+
+
+def multipart_byteranges_length(parts, boundary):
+    """
+    Returns the exact length of the multipart/byteranges body made from parts.
+    """
+    # each part is followed by a CRLF, and the body closes with "--boundary--\r\n"
+    length = sum(len(part_header) + (last - first + 1) + 2 for part_header, first, last in parts)
+    return length + len(boundary) + 6
+
+
+def stream_multipart_byteranges(content, parts, boundary):
+    """
+    Stream a multipart/byteranges body made from parts, one range at a time.
+    """
+    for part_header, first, last in parts:
+        yield part_header
+        for chunk in content.stream_data_in_range(first, last):
+            yield chunk
+        yield '\r\n'
+    yield '--{}--\r\n'.format(boundary)
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
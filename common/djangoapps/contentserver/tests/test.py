@@ -17,7 +17,11 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_from_xml
 
-from contentserver.middleware import parse_range_header
+from contentserver.middleware import (
+    etag_matches, multipart_byteranges_length, multipart_byteranges_parts, parse_range_header,
+    stream_multipart_byteranges,
+)
+from xmodule.contentstore.content import StaticContent
 from student.models import CourseEnrollment
 
 log = logging.getLogger(__name__)
@@ -146,7 +150,8 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart/byteranges message
+        with one part per range.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
@@ -154,8 +159,79 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
             first=first_byte, last=last_byte)
         )
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
         self.assertNotIn('Content-Range', resp)
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
+        content = resp.content
+        self.assertEqual(resp['Content-Length'], str(len(content)))
+        self.assertIn('Content-Range: bytes {first}-{last}/{length}'.format(
+            first=first_byte, last=last_byte, length=self.length_unlocked), content)
+        self.assertIn('Content-Range: bytes {first}-{last}/{length}'.format(
+            first=self.length_unlocked - 100, last=self.length_unlocked - 1, length=self.length_unlocked), content)
+
+    def test_range_request_multiple_ranges_partially_satisfiable(self):
+        """
+        Test that unsatisfiable ranges are dropped when others can be satisfied.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9, {first}-'.format(
+            first=self.length_unlocked)
+        )
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
+        self.assertEqual(resp['Content-Range'], 'bytes 0-9/{length}'.format(length=self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], '10')
+
+    def test_etag(self):
+        """
+        Test that the asset's md5 is sent as a strong ETag, and that a matching
+        If-None-Match yields a 304 while a stale one yields the content.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        etag = '"{}"'.format(self.contentstore.get_attr(self.unlocked_asset, 'md5'))
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"stale", W/{}'.format(etag))
+        self.assertEqual(resp.status_code, 304)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(resp.status_code, 200)
+
+    def test_if_modified_since(self):
+        """
+        Test that If-Modified-Since is compared as a date rather than as a string.
+        """
+        resp = self.client.get(self.url_unlocked)
+        last_modified = resp['Last-Modified']
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, 304)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE='Sat, 01 Jan 3000 00:00:00 GMT')
+        self.assertEqual(resp.status_code, 304)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE='Sat, 01 Jan 2000 00:00:00 GMT')
+        self.assertEqual(resp.status_code, 200)
+
+        # If-None-Match takes precedence over If-Modified-Since
+        resp = self.client.get(self.url_unlocked, HTTP_IF_MODIFIED_SINCE=last_modified, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(resp.status_code, 200)
+
+    def test_if_range(self):
+        """
+        Test that the Range header is only honored when If-Range still matches the content.
+        """
+        resp = self.client.get(self.url_unlocked)
+        etag = resp['ETag']
+
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(resp.status_code, 206)
+
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
 
     @ddt.data(
@@ -191,6 +267,7 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
             first=(self.length_unlocked), last=(self.length_unlocked))
         )
         self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp['Content-Range'], 'bytes */{length}'.format(length=self.length_unlocked))
 
 
 @ddt.ddt
@@ -236,3 +313,27 @@ class ParseRangeHeaderTestCase(unittest.TestCase):
         self.assertRaisesRegexp(
             exception_class, exception_message_regex, parse_range_header, header_value, self.content_length
         )
+
+
+class MultipartByterangesTestCase(unittest.TestCase):
+    """
+    Tests for the multipart/byteranges helpers.
+    """
+
+    def setUp(self):
+        self.content = StaticContent('loc', 'name', 'text/plain', '0123456789' * 10, length=100)
+        self.boundary = 'BOUNDARY'
+
+    def test_body_length(self):
+        parts = multipart_byteranges_parts(self.content, [(0, 9), (50, 99)], self.boundary)
+        body = ''.join(stream_multipart_byteranges(self.content, parts, self.boundary))
+        self.assertEqual(multipart_byteranges_length(parts, self.boundary), len(body))
+        self.assertTrue(body.endswith('--BOUNDARY--\r\n'))
+        self.assertIn('Content-Range: bytes 50-99/100\r\n\r\n' + '0123456789' * 5 + '\r\n', body)
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('*', '"abc"'))
+        self.assertTrue(etag_matches('"xyz", "abc"', '"abc"'))
+        self.assertTrue(etag_matches('W/"abc"', '"abc"'))
+        self.assertFalse(etag_matches('W/"abc"', '"abc"', weak=False))
+        self.assertFalse(etag_matches('"abc"', None))
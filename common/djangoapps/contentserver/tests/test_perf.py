@@ -0,0 +1,146 @@
+"""
+Performance test for serving assets through the StaticContentServer.
+
+Measures the throughput and the memory held per concurrent download for full,
+single range and multiple range requests.
+"""
+import datetime
+import resource
+import threading
+import time
+import unittest
+
+import ddt
+from django.test.client import RequestFactory
+from mock import patch
+
+from contentserver.middleware import StaticContentServer
+from xmodule.contentstore.content import StaticContentStream
+
+# Size of the served asset, large enough to not be put in the cache.
+ASSET_SIZE = 32 * 1024 * 1024
+
+# Default GridFS chunk size.
+GRIDFS_CHUNK_SIZE = 255 * 1024
+
+# Number of downloads running at the same time per test run.
+CONCURRENT_DOWNLOADS = (1, 4, 16, 64)
+
+ASSET_URL = '/c4x/edX/perf/asset/video.mp4'
+
+
+class FakeGridOut(object):
+    """
+    Serves the same bytes as a GridOut of ASSET_SIZE bytes, one stored chunk at a time.
+    """
+    chunk = 'x' * GRIDFS_CHUNK_SIZE
+
+    def __init__(self):
+        self.position = 0
+        self.length = ASSET_SIZE
+
+    def seek(self, position):
+        """
+        Set the current position.
+        """
+        self.position = position
+
+    def readchunk(self):
+        """
+        Read from the current position to the end of the chunk it is in.
+        """
+        remainder = min(GRIDFS_CHUNK_SIZE - self.position % GRIDFS_CHUNK_SIZE, self.length - self.position)
+        self.position += remainder
+        return self.chunk[:remainder]
+
+    def read(self, size):
+        """
+        Read size bytes from the current position.
+        """
+        size = min(size, self.length - self.position)
+        self.position += size
+        return 'x' * size
+
+
+def find_asset(location, as_stream=False):  # pylint: disable=unused-argument
+    """
+    Stand-in for AssetManager.find which never hits the database.
+    """
+    return StaticContentStream(
+        location, 'video.mp4', 'video/mp4', FakeGridOut(), last_modified_at=datetime.datetime(2015, 1, 1),
+        length=ASSET_SIZE, content_digest='d41d8cd98f00b204e9800998ecf8427e'
+    )
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class StaticContentServerStreamingPerf(unittest.TestCase):
+    """
+    Times concurrent downloads of a large asset, and reports the memory held per download.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def setUp(self):
+        super(StaticContentServerStreamingPerf, self).setUp()
+        self.factory = RequestFactory()
+        for target, replacement in (
+            ('contentserver.middleware.AssetManager.find', find_asset),
+            ('contentserver.middleware.get_cached_content', lambda location: None),
+        ):
+            patcher = patch(target, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _download(self, headers, results):
+        """
+        Consume one response chunk by chunk, recording the bytes served and the largest chunk held.
+        """
+        response = StaticContentServer().process_request(self.factory.get(ASSET_URL, **headers))
+        served = largest_chunk = 0
+        for chunk in response:
+            served += len(chunk)
+            largest_chunk = max(largest_chunk, len(chunk))
+        results.append((served, largest_chunk))
+
+    @ddt.data(*CONCURRENT_DOWNLOADS)
+    def test_full_download(self, concurrency):
+        self._run(concurrency, {})
+
+    @ddt.data(*CONCURRENT_DOWNLOADS)
+    def test_range_download(self, concurrency):
+        self._run(concurrency, {'HTTP_RANGE': 'bytes={}-'.format(ASSET_SIZE / 2)})
+
+    @ddt.data(*CONCURRENT_DOWNLOADS)
+    def test_multiple_range_download(self, concurrency):
+        self._run(concurrency, {'HTTP_RANGE': 'bytes=0-1048575, -1048576'})
+
+    def _run(self, concurrency, headers):
+        """
+        Run concurrency downloads at the same time and print the throughput and memory used.
+        """
+        results = []
+        threads = [
+            threading.Thread(target=self._download, args=(headers, results)) for __ in xrange(concurrency)
+        ]
+        max_rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - start
+        max_rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        self.assertEqual(len(results), concurrency)
+        served = sum(result[0] for result in results)
+        print "{concurrency} downloads: {throughput:.1f} MB/s, largest chunk {chunk} bytes, {rss} KB max RSS/download".format(
+            concurrency=concurrency,
+            throughput=served / elapsed / 1024 / 1024,
+            chunk=max(result[1] for result in results),
+            rss=(max_rss_after - max_rss_before) / concurrency,
+        )
@@ -0,0 +1,101 @@
+"""
+Compile the Mako templates of every template lookup into its module directory.
+
+Run it when building a release, with the settings the servers use: the server
+processes then load the compiled templates instead of each compiling them on
+first use. With --benchmark, it also times loading every template in new
+lookups, as a freshly started server process does, from the compiled templates
+and from the template sources.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import time
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from edxmako import LOOKUP
+from edxmako.paths import make_lookup
+
+log = logging.getLogger(__name__)
+
+# The extensions of the files of the template directories that are Mako templates
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml', '.js')
+
+
+class Command(NoArgsCommand):
+    """
+    Compiles the Mako templates.
+    """
+
+    help = "Compiles the Mako templates of every template lookup into its module directory."
+
+    option_list = NoArgsCommand.option_list + (
+        make_option(
+            '--benchmark',
+            action='store_true',
+            default=False,
+            help="Time loading all the templates, from the compiled templates and from their sources.",
+        ),
+    )
+
+    def handle_noargs(self, **options):
+        start = time.time()
+        compiled, failed = load_templates(LOOKUP)
+        self.stdout.write("Compiled {} templates in {:.2f}s ({} failed)\n".format(
+            compiled, time.time() - start, failed
+        ))
+
+        if options['benchmark']:
+            start = time.time()
+            load_templates(new_lookups())
+            self.stdout.write("Loaded the compiled templates in {:.2f}s\n".format(time.time() - start))
+
+            module_directory = tempfile.mkdtemp()
+            try:
+                start = time.time()
+                load_templates(new_lookups(module_directory))
+                self.stdout.write("Compiled the templates from their sources in {:.2f}s\n".format(
+                    time.time() - start
+                ))
+            finally:
+                shutil.rmtree(module_directory)
+
+
+def new_lookups(module_directory=None):
+    """
+    Returns new lookups for the directories of each of the template lookups, by namespace.
+
+    The templates are compiled into their usual module directories, or into subdirectories of
+    module_directory.
+    """
+    lookups = {}
+    for namespace, lookup in LOOKUP.items():
+        lookups[namespace] = make_lookup(
+            namespace,
+            module_directory=module_directory and os.path.join(module_directory, namespace)
+        )
+        for directory in lookup.directories:
+            lookups[namespace].add_directory(directory)
+    return lookups
+
+
+def load_templates(lookups):
+    """
+    Loads every template of the lookups, compiling those which aren't compiled yet.
+
+    Returns the number of templates loaded, and of templates which failed to compile.
+    """
+    loaded, failed = 0, 0
+    for namespace, lookup in sorted(lookups.items()):
+        for uri in lookup.template_uris(TEMPLATE_EXTENSIONS):
+            try:
+                lookup.get_template(uri)
+                loaded += 1
+            except Exception:  # pylint: disable=broad-except
+                # Files with a template extension might not be Mako templates: they are compiled on use, if ever
+                log.warning("Couldn't compile the template %s of %s", uri, namespace, exc_info=True)
+                failed += 1
+    return loaded, failed
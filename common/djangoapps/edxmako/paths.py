@@ -1,5 +1,9 @@
 """
 Set up lookup paths for mako templates.
+
+The templates of each namespace are compiled into their own directory of settings.MAKO_MODULE_DIR,
+which the compile_templates command fills in advance. Unless settings.MAKO_FILESYSTEM_CHECKS is
+set, a template isn't checked for changes once it is loaded.
 """
 import os
 import pkg_resources
@@ -24,6 +28,19 @@ class DynamicTemplateLookup(TemplateLookup):
         else:
             self.directories.append(os.path.normpath(directory))
 
+    def template_uris(self, extensions):
+        """
+        Returns the uris of the templates with one of the extensions in the directories of this lookup.
+        """
+        uris = set()
+        for directory in self.directories:
+            for root, __, filenames in os.walk(directory):
+                for filename in filenames:
+                    if os.path.splitext(filename)[1] in extensions:
+                        path = os.path.relpath(os.path.join(root, filename), directory)
+                        uris.add(path.replace(os.sep, '/'))
+        return sorted(uris)
+
 
 def clear_lookups(namespace):
     """
@@ -33,6 +50,23 @@ def clear_lookups(namespace):
         del LOOKUP[namespace]
 
 
+def make_lookup(namespace, module_directory=None):
+    """
+    Returns a new template lookup for the namespace, without directories.
+
+    The templates are compiled into module_directory, or into the namespace's directory of
+    settings.MAKO_MODULE_DIR.
+    """
+    return DynamicTemplateLookup(
+        module_directory=module_directory or os.path.join(settings.MAKO_MODULE_DIR, namespace),
+        filesystem_checks=getattr(settings, 'MAKO_FILESYSTEM_CHECKS', True),
+        output_encoding='utf-8',
+        input_encoding='utf-8',
+        default_filters=['decode.utf8'],
+        encoding_errors='replace',
+    )
+
+
 def add_lookup(namespace, directory, package=None, prepend=False):
     """
     Adds a new mako template lookup directory to the given namespace.
@@ -43,13 +77,7 @@ def add_lookup(namespace, directory, package=None, prepend=False):
     """
     templates = LOOKUP.get(namespace)
     if not templates:
-        LOOKUP[namespace] = templates = DynamicTemplateLookup(
-            module_directory=settings.MAKO_MODULE_DIR,
-            output_encoding='utf-8',
-            input_encoding='utf-8',
-            default_filters=['decode.utf8'],
-            encoding_errors='replace',
-        )
+        LOOKUP[namespace] = templates = make_lookup(namespace)
     if package:
         directory = pkg_resources.resource_filename(package, directory)
     templates.add_directory(directory, prepend=prepend)
@@ -1,4 +1,7 @@
 
+import os
+import shutil
+import tempfile
 from mock import patch, Mock
 import unittest
 import ddt
@@ -8,10 +11,13 @@ from django.http import HttpResponse
 from django.test import TestCase
 from django.test.utils import override_settings
 from django.test.client import RequestFactory
+from django.core.management import call_command
 from django.core.urlresolvers import reverse
 import edxmako.middleware
 from edxmako.middleware import get_template_request_context
 from edxmako import add_lookup, LOOKUP
+from edxmako.management.commands.compile_templates import TEMPLATE_EXTENSIONS
+from edxmako.paths import make_lookup
 from edxmako.shortcuts import (
     marketing_link,
     render_to_string,
@@ -63,6 +69,45 @@ class AddLookupTests(TestCase):
         self.assertTrue(dirs[0].endswith('management'))
 
 
+@ddt.ddt
+class CompileTemplatesTest(TestCase):
+    """
+    Test the compile_templates command.
+    """
+    def setUp(self):
+        super(CompileTemplatesTest, self).setUp()
+        self.template_dir = tempfile.mkdtemp()
+        self.module_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.template_dir)
+        self.addCleanup(shutil.rmtree, self.module_dir)
+
+        os.mkdir(os.path.join(self.template_dir, 'emails'))
+        for filename, content in (
+                ('hello.html', '<p>Hello ${name}</p>'),
+                (os.path.join('emails', 'hello.txt'), 'Hello ${name}'),
+                ('hello.underscore', '<p>Hello <%= name %></p>'),
+        ):
+            with open(os.path.join(self.template_dir, filename), 'w') as template_file:
+                template_file.write(content)
+
+        with override_settings(MAKO_MODULE_DIR=self.module_dir):
+            self.lookup = make_lookup('test')
+        self.lookup.add_directory(self.template_dir)
+
+    def test_template_uris(self):
+        self.assertEqual(self.lookup.template_uris(TEMPLATE_EXTENSIONS), ['emails/hello.txt', 'hello.html'])
+
+    @ddt.data(False, True)
+    def test_compile_templates(self, benchmark):
+        with patch.dict(LOOKUP, {'test': self.lookup}, clear=True):
+            call_command('compile_templates', benchmark=benchmark)
+
+        # each namespace has its own module directory
+        for uri in ('emails/hello.txt', 'hello.html'):
+            self.assertTrue(os.path.exists(os.path.join(self.module_dir, 'test', uri + '.py')))
+        self.assertFalse(os.path.exists(os.path.join(self.module_dir, 'test', 'hello.underscore.py')))
+
+
 class MakoMiddlewareTest(TestCase):
     """
     Test MakoMiddleware.
@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import re
 
@@ -11,6 +12,61 @@ from xmodule.contentstore.content import StaticContent
 
 log = logging.getLogger(__name__)
 
+# The compiled url regexes, by prefix
+_COMPILED_REGEXES = {}
+
+# The results of the staticfiles_storage lookups, and the texts rewritten by replace_static_urls, when
+# memoized (see _memoized)
+_STATICFILES_LOOKUPS = {}
+_REWRITTEN_TEXTS = {}
+
+
+def _memoized(memo, key, compute):
+    """
+    Returns memo[key], setting it to compute() first if it isn't set.
+
+    The rewritten urls only depend on the course and on the static files collected for the server,
+    which don't change while it runs, so they are memoized in each process unless DEBUG is set. Each memo holds at most
+    settings.STATIC_URL_REWRITE_MEMO_SIZE entries (0 disables it), and is emptied once full.
+    """
+    size = 0 if settings.DEBUG else getattr(settings, 'STATIC_URL_REWRITE_MEMO_SIZE', 0)
+    if not size:
+        return compute()
+
+    try:
+        return memo[key]
+    except KeyError:
+        pass
+
+    value = compute()
+    if len(memo) >= size:
+        memo.clear()
+    memo[key] = value
+    return value
+
+
+def _text_key(text):
+    """
+    Returns a memo key identifying the contents of text.
+    """
+    if isinstance(text, unicode):
+        return (unicode, hashlib.md5(text.encode('utf-8')).hexdigest())
+    return (str, hashlib.md5(text).hexdigest())
+
+
+def _staticfiles_exists(path):
+    """
+    Returns whether path is in staticfiles_storage.
+    """
+    return _memoized(_STATICFILES_LOOKUPS, ('exists', path), lambda: staticfiles_storage.exists(path))
+
+
+def _staticfiles_url(path):
+    """
+    Returns the url of path in staticfiles_storage.
+    """
+    return _memoized(_STATICFILES_LOOKUPS, ('url', path), lambda: staticfiles_storage.url(path))
+
 
 def _url_replace_regex(prefix):
     """
@@ -28,13 +84,23 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+def _compiled_url_replace_regex(prefix):
+    """
+    Returns the compiled _url_replace_regex(prefix).
+    """
+    regex = _COMPILED_REGEXES.get(prefix)
+    if regex is None:
+        regex = _COMPILED_REGEXES[prefix] = re.compile(_url_replace_regex(prefix))
+    return regex
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
     a dead link instead of raising an exception.
     """
     try:
-        url = staticfiles_storage.url(path)
+        url = _staticfiles_url(path)
     except Exception as err:
         log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
             path, str(err)))
@@ -64,12 +130,15 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
     output: <text> after the link rewriting rules are applied
     """
 
+    if '/jump_to_id/' not in text:
+        return text
+
     def replace_jump_to_id_url(match):
         quote = match.group('quote')
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _compiled_url_replace_regex('/jump_to_id/').sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -81,6 +150,8 @@ def replace_course_urls(text, course_key):
 
     returns: text with the links replaced
     """
+    if '/course/' not in text:
+        return text
 
     course_id = course_key.to_deprecated_string()
 
@@ -89,7 +160,7 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _compiled_url_replace_regex('/course/').sub(replace_course_url, text)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -108,14 +179,21 @@ def process_static_urls(text, replacement_function, data_dir=None):
         rest = match.group('rest')
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    if not _may_contain_static_urls(text):
+        return text
+
+    regex = _compiled_url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    ))
+    return regex.sub(wrap_part_extraction, text)
+
+
+def _may_contain_static_urls(text):
+    """
+    Returns False if text certainly doesn't contain static urls, without running a regex over it.
+    """
+    return '/static/' in text or settings.STATIC_URL in text
 
 
 def make_static_urls_absolute(request, html):
@@ -146,7 +224,28 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
     data_directory: The directory in which course data is stored
     course_id: The course identifier used to distinguish static content for this course in studio
     static_asset_path: Path for static assets, which overrides data_directory and course_namespace, if nonempty
+
+    The rewritten texts are memoized by content, course and asset path (see _memoized).
+    """
+    if not _may_contain_static_urls(text):
+        return text
+
+    return _memoized(
+        _REWRITTEN_TEXTS,
+        (_text_key(text), data_directory, unicode(course_id) if course_id else None, static_asset_path),
+        lambda: _replace_static_urls(text, data_directory, course_id, static_asset_path)
+    )
+
+
+def _replace_static_urls(text, data_directory, course_id, static_asset_path):
     """
+    Rewrites the static urls of text (see replace_static_urls).
+    """
+    use_contentstore = (
+        not static_asset_path and
+        course_id and
+        modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml
+    )
 
     def replace_static_url(original, prefix, quote, rest):
         """
@@ -161,21 +260,19 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         if settings.DEBUG and finders.find(rest, True):
             return original
         # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) \
-                and course_id \
-                and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
+        elif use_contentstore:
             # first look in the static file pipeline and see if we are trying to reference
             # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
 
             exists_in_staticfiles_storage = False
             try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+                exists_in_staticfiles_storage = _staticfiles_exists(rest)
             except Exception as err:
                 log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
                     rest, str(err)))
 
             if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
+                url = _staticfiles_url(rest)
             else:
                 # if not, then assume it's courseware specific content and then look in the
                 # Mongo-backed database
@@ -185,10 +282,10 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
             course_path = "/".join((static_asset_path or data_directory, rest))
 
             try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
+                if _staticfiles_exists(rest):
+                    url = _staticfiles_url(rest)
                 else:
-                    url = staticfiles_storage.url(course_path)
+                    url = _staticfiles_url(course_path)
             # And if that fails, assume that it's course content, and add manually data directory
             except Exception as err:
                 log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
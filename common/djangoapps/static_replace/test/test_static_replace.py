@@ -1,6 +1,8 @@
 import re
 
+from django.test.utils import override_settings
 from nose.tools import assert_equals, assert_true, assert_false  # pylint: disable=no-name-in-module
+import static_replace
 from static_replace import (
     replace_static_urls,
     replace_course_urls,
@@ -116,6 +118,51 @@ def test_data_dir_fallback(mock_storage, mock_modulestore, mock_settings):
     assert_equals('"/static/data_dir/file.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
 
 
+@override_settings(STATIC_URL_REWRITE_MEMO_SIZE=2)
+@patch('static_replace.staticfiles_storage')
+def test_memoized_rewrites(mock_storage):
+    static_replace._REWRITTEN_TEXTS.clear()  # pylint: disable=protected-access
+    static_replace._STATICFILES_LOOKUPS.clear()  # pylint: disable=protected-access
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/file.abc123.png'
+
+    for __ in range(2):
+        assert_equals('"/static/file.abc123.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
+    mock_storage.exists.assert_called_once_with('file.png')
+    mock_storage.url.assert_called_once_with('file.png')
+
+    # the lookups are shared by other texts
+    assert_equals(
+        '<img src="/static/file.abc123.png"/>',
+        replace_static_urls('<img src={}/>'.format(STATIC_SOURCE), DATA_DIRECTORY)
+    )
+    mock_storage.exists.assert_called_once_with('file.png')
+
+    # the memos are bounded
+    replace_static_urls('"/static/other.png"', DATA_DIRECTORY)
+    assert_true(len(static_replace._REWRITTEN_TEXTS) <= 2)  # pylint: disable=protected-access
+    assert_true(len(static_replace._STATICFILES_LOOKUPS) <= 2)  # pylint: disable=protected-access
+
+
+@override_settings(DEBUG=True, STATIC_URL_REWRITE_MEMO_SIZE=2)
+@patch('static_replace.finders')
+@patch('static_replace.staticfiles_storage')
+def test_no_memoized_rewrites_in_debug(mock_storage, mock_finders):
+    mock_finders.find.return_value = None
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/file.abc123.png'
+
+    for __ in range(2):
+        assert_equals('"/static/file.abc123.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY))
+    assert_equals(mock_storage.exists.call_count, 2)
+
+
+def test_no_static_urls():
+    text = u'<p>No static urls</p>'
+    assert_true(replace_static_urls(text, DATA_DIRECTORY) is text)
+    assert_true(replace_course_urls(text, COURSE_KEY) is text)
+
+
 def test_raw_static_check():
     """
     Make sure replace_static_urls leaves alone things that end in '.raw'
@@ -0,0 +1,46 @@
+"""
+Profile the startup of a new server process with the current settings.
+
+It reports how long the process took to import its wsgi module and to load what
+Django loads on the first request, and the modules which took the longest to
+import (see common/lib/startup_profiler.py):
+
+    ./manage.py lms --settings=aws profile_startup --top 50
+"""
+import os
+import subprocess
+import sys
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import NoArgsCommand
+
+
+class Command(NoArgsCommand):
+    """
+    Profiles the startup of a new server process.
+    """
+
+    help = "Profiles the startup of a new server process, reporting the modules which took the longest to import."
+
+    option_list = NoArgsCommand.option_list + (
+        make_option(
+            '--top',
+            type='int',
+            default=40,
+            help="Number of modules to report.",
+        ),
+    )
+
+    def handle_noargs(self, **options):
+        # e.g. lms.urls is started by lms.wsgi
+        wsgi_module = settings.ROOT_URLCONF.split('.')[0] + '.wsgi'
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+            [str(settings.REPO_ROOT)] + [path for path in [os.environ.get('PYTHONPATH')] if path]
+        ))
+        # The process's imports have already been made here: they're profiled in a new process
+        subprocess.check_call(
+            [sys.executable, str(settings.COMMON_ROOT / 'lib' / 'startup_profiler.py'), wsgi_module,
+             '--top', str(options['top'])],
+            env=env,
+        )
@@ -0,0 +1,36 @@
+"""
+Tests for startup_profiler.py
+"""
+import sys
+
+from django.test import TestCase
+from startup_profiler import ImportProfiler
+
+
+class ImportProfilerTest(TestCase):
+    """
+    Tests for ImportProfiler.
+    """
+    def test_profile_imports(self):
+        sys.modules.pop('colorsys', None)
+        profiler = ImportProfiler()
+        profiler.start()
+        try:
+            import colorsys  # pylint: disable=unused-variable
+        finally:
+            profiler.stop()
+
+        self.assertIn('colorsys', profiler.cumulative)
+        self.assertLessEqual(profiler.own['colorsys'], profiler.cumulative['colorsys'])
+        self.assertTrue(profiler.report(1)[1].endswith('  colorsys'))
+
+    def test_imported_modules(self):
+        profiler = ImportProfiler()
+        profiler.start()
+        try:
+            import sys as imported_sys  # pylint: disable=reimported, unused-variable
+        finally:
+            profiler.stop()
+
+        # modules which were already imported aren't reported
+        self.assertEqual(profiler.cumulative, {})
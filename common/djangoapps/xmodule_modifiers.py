@@ -11,6 +11,7 @@ import markupsafe
 from lxml import html, etree
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.timezone import UTC
 from django.utils.html import escape
 from edxmako.shortcuts import render_to_string
@@ -22,6 +23,7 @@ from xmodule.vertical_module import VerticalModule
 from xmodule.x_module import shim_xmodule_js, XModuleDescriptor, XModule, PREVIEW_VIEWS, STUDIO_VIEW
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.exceptions import ItemNotFoundError
 
 log = logging.getLogger(__name__)
 
@@ -164,30 +166,92 @@ def replace_static_urls(data_dir, block, view, frag, context, course_id=None, st
     ))
 
 
-def grade_histogram(module_id):
+def grade_histogram(module_id, sibling_ids=()):
     '''
     Print out a histogram of grades on a given problem in staff member debug info.
 
     Warning: If a student has just looked at an xmodule and not attempted
     it, their grade is None. Since there will always be at least one such student
     this function almost always returns [].
+
+    The histograms of sibling_ids (e.g. the other problems of the unit) are computed
+    and cached along with it, so that rendering them makes no more queries.
     '''
-    from django.db import connection
-    cursor = connection.cursor()
+    timeout = _grade_histogram_cache_timeout()
+    if not timeout:
+        return _query_grade_histograms([module_id])[module_id]
+
+    cache_keys = {_grade_histogram_cache_key(module_id): module_id}
+    cache_keys.update((_grade_histogram_cache_key(sibling_id), sibling_id) for sibling_id in sibling_ids)
+    cached = cache.get_many(cache_keys.keys())
+    histograms = {cache_keys[cache_key]: histogram for cache_key, histogram in cached.iteritems()}
+    if module_id not in histograms:
+        histograms = _query_grade_histograms(
+            [block_id for cache_key, block_id in cache_keys.iteritems() if cache_key not in cached]
+        )
+        cache.set_many(
+            {_grade_histogram_cache_key(block_id): histogram for block_id, histogram in histograms.iteritems()},
+            timeout
+        )
+    return histograms[module_id]
+
+
+def _grade_histogram_cache_timeout():
+    """
+    Returns the number of seconds the grade histograms are cached for, 0 if they aren't.
+    """
+    return getattr(settings, 'GRADE_HISTOGRAM_CACHE_TIMEOUT', 0)
+
+
+def _grade_histogram_cache_key(module_id):
+    """
+    Returns the cache key of the grade histogram of module_id.
+    """
+    return u'grade_histogram.{}'.format(module_id)
 
-    q = """SELECT courseware_studentmodule.grade,
+
+def _query_grade_histograms(module_ids):
+    """
+    Returns the grade_histogram of each of module_ids, by module id, computed with a single
+    query on the read replica if there is one.
+    """
+    from django.db import connections
+    cursor = connections['read_replica' if 'read_replica' in settings.DATABASES else 'default'].cursor()
+
+    module_ids_by_string = {module_id.to_deprecated_string(): module_id for module_id in module_ids}
+    q = """SELECT courseware_studentmodule.module_id,
+                  courseware_studentmodule.grade,
                   COUNT(courseware_studentmodule.student_id)
     FROM courseware_studentmodule
-    WHERE courseware_studentmodule.module_id=%s
-    GROUP BY courseware_studentmodule.grade"""
-    # Passing module_id this way prevents sql-injection.
-    cursor.execute(q, [module_id.to_deprecated_string()])
-
-    grades = list(cursor.fetchall())
-    grades.sort(key=lambda x: x[0])  # Add ORDER BY to sql query?
-    if len(grades) >= 1 and grades[0][0] is None:
+    WHERE courseware_studentmodule.module_id IN ({})
+    GROUP BY courseware_studentmodule.module_id, courseware_studentmodule.grade""".format(
+        ', '.join(['%s'] * len(module_ids_by_string))
+    )
+    # Passing the module ids this way prevents sql-injection.
+    cursor.execute(q, module_ids_by_string.keys())
+
+    histograms = {module_id: [] for module_id in module_ids}
+    for module_id_string, grade, count in cursor.fetchall():
+        histograms[module_ids_by_string[module_id_string]].append((grade, count))
+    for module_id, grades in histograms.iteritems():
+        grades.sort(key=lambda x: x[0])  # Add ORDER BY to sql query?
+        if len(grades) >= 1 and grades[0][0] is None:
+            histograms[module_id] = []
+    return histograms
+
+
+def _sibling_ids(block):
+    """
+    Returns the usage keys of the other children of the block's parent, if it is known.
+    """
+    parent_id = getattr(block, 'parent', None)
+    if parent_id is None:
+        return []
+    try:
+        parent = modulestore().get_item(parent_id)
+    except ItemNotFoundError:
         return []
-    return grades
+    return [child_id for child_id in parent.children if child_id != block.location]
 
 
 def add_staff_markup(user, has_instructor_access, block, view, frag, context):  # pylint: disable=unused-argument
@@ -220,7 +284,9 @@ def add_staff_markup(user, has_instructor_access, block, view, frag, context):
 
     block_id = block.location
     if block.has_score and settings.FEATURES.get('DISPLAY_HISTOGRAMS_TO_STAFF'):
-        histogram = grade_histogram(block_id)
+        # the siblings' histograms are only computed along with the block's to be cached
+        sibling_ids = _sibling_ids(block) if _grade_histogram_cache_timeout() else ()
+        histogram = grade_histogram(block_id, sibling_ids)
         render_histogram = len(histogram) > 0
     else:
         histogram = None
@@ -8,6 +8,7 @@ http://stackoverflow.com/questions/10060069/safely-extract-zip-or-tar-using-pyth
 from os.path import abspath, realpath, dirname, join as joinpath
 from django.core.exceptions import SuspiciousOperation
 import logging
+import tarfile
 
 log = logging.getLogger(__name__)
 
@@ -35,6 +36,26 @@ def _is_bad_link(info, base):
     return _is_bad_path(info.linkname, base=tip)
 
 
+def _check_member(finfo, base):
+    """
+    Check that a tar file element is safe to extract in `base`.
+    """
+    if _is_bad_path(finfo.name, base):
+        log.debug("File %r is blocked (illegal path)", finfo.name)
+        raise SuspiciousOperation("Illegal path")
+    elif finfo.issym() and _is_bad_link(finfo, base):
+        log.debug("File %r is blocked: Hard link to %r", finfo.name, finfo.linkname)
+        raise SuspiciousOperation("Hard link")
+    elif finfo.islnk() and _is_bad_link(finfo, base):
+        log.debug("File %r is blocked: Symlink to %r", finfo.name,
+                  finfo.linkname)
+        raise SuspiciousOperation("Symlink")
+    elif finfo.isdev():
+        log.debug("File %r is blocked: FIFO, device or character file",
+                  finfo.name)
+        raise SuspiciousOperation("Dev file")
+
+
 def safemembers(members):
     """
     Check that all elements of a tar file are safe.
@@ -43,20 +64,7 @@ def safemembers(members):
     base = resolved(".")
 
     for finfo in members:
-        if _is_bad_path(finfo.name, base):
-            log.debug("File %r is blocked (illegal path)", finfo.name)
-            raise SuspiciousOperation("Illegal path")
-        elif finfo.issym() and _is_bad_link(finfo, base):
-            log.debug("File %r is blocked: Hard link to %r", finfo.name, finfo.linkname)
-            raise SuspiciousOperation("Hard link")
-        elif finfo.islnk() and _is_bad_link(finfo, base):
-            log.debug("File %r is blocked: Symlink to %r", finfo.name,
-                      finfo.linkname)
-            raise SuspiciousOperation("Symlink")
-        elif finfo.isdev():
-            log.debug("File %r is blocked: FIFO, device or character file",
-                      finfo.name)
-            raise SuspiciousOperation("Dev file")
+        _check_member(finfo, base)
 
     return members
 
@@ -66,3 +74,21 @@ def safetar_extractall(tarf, *args, **kwargs):
     Safe version of `tarf.extractall()`.
     """
     return tarf.extractall(members=safemembers(tarf), *args, **kwargs)
+
+
+def safetar_extract_stream(fileobj, path):
+    """
+    Safely extract the (optionally compressed) tar file read from `fileobj` into `path`.
+
+    The archive is read in a single forward pass, checking and extracting one element at a time,
+    so it never has to be scanned twice nor be seekable. Elements extracted before an unsafe one
+    is met are left in `path` for the caller to clean up.
+    """
+    base = resolved(path)
+    tarf = tarfile.open(fileobj=fileobj, mode='r|*')
+    try:
+        for finfo in tarf:
+            _check_member(finfo, base)
+            tarf.extract(finfo, path)
+    finally:
+        tarf.close()
@@ -0,0 +1,121 @@
+"""
+Profiling of the imports made while a server process starts.
+
+Run as a script, it times what a new LMS or Studio process does before it handles
+its first request: importing its wsgi module (the settings, the startup run() and
+the modulestores), then loading the middleware and the url configuration. It
+reports the time of each of these phases, and the modules which took the longest
+to import:
+
+    DJANGO_SETTINGS_MODULE=lms.envs.aws python common/lib/startup_profiler.py lms.wsgi
+
+The profile_startup management command runs it in a new process with the
+current settings.
+"""
+import __builtin__
+import argparse
+import importlib
+import sys
+import time
+
+
+class ImportProfiler(object):
+    """
+    Times the imports of modules, by wrapping __import__.
+
+    The cumulative time of a module includes the time of the modules it imports, its own
+    time doesn't. Modules are named as in the import statements (relative imports included).
+    """
+    def __init__(self):
+        self.cumulative = {}
+        self.own = {}
+        self._nested = []
+        self._original_import = None
+
+    def start(self):
+        """
+        Starts timing the imports.
+        """
+        self._original_import = __builtin__.__import__
+        __builtin__.__import__ = self._import
+
+    def stop(self):
+        """
+        Stops timing the imports.
+        """
+        __builtin__.__import__ = self._original_import
+
+    def _import(self, name, *args, **kwargs):
+        """
+        Imports the module, timing it if it hasn't been imported yet.
+        """
+        if name in sys.modules:
+            return self._original_import(name, *args, **kwargs)
+
+        self._nested.append(0.0)
+        start = time.time()
+        try:
+            return self._original_import(name, *args, **kwargs)
+        finally:
+            elapsed = time.time() - start
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            self.cumulative[name] = self.cumulative.get(name, 0) + elapsed
+            self.own[name] = self.own.get(name, 0) + elapsed - nested
+
+    def report(self, top):
+        """
+        Returns the lines reporting the `top` modules with the longest cumulative import times.
+        """
+        lines = ['{:>12} {:>12}  {}'.format('cumulative', 'own', 'module')]
+        slowest = sorted(self.cumulative.iteritems(), key=lambda item: item[1], reverse=True)[:top]
+        for name, elapsed in slowest:
+            lines.append('{:>11.3f}s {:>11.3f}s  {}'.format(elapsed, self.own[name], name))
+        return lines
+
+
+def profile_startup(wsgi_module, top):
+    """
+    Profiles starting a process with wsgi_module, and prints the report.
+    """
+    profiler = ImportProfiler()
+    phases = []
+    profiler.start()
+    try:
+        start = time.time()
+        importlib.import_module(wsgi_module)
+        phases.append(('import {}'.format(wsgi_module), time.time() - start))
+
+        # Django loads these on the first request
+        start = time.time()
+        from django.core.handlers.wsgi import WSGIHandler
+        WSGIHandler().load_middleware()
+        phases.append(('load the middleware', time.time() - start))
+
+        start = time.time()
+        from django.core.urlresolvers import get_resolver
+        get_resolver(None).url_patterns  # pylint: disable=expression-not-assigned
+        phases.append(('load the urls', time.time() - start))
+    finally:
+        profiler.stop()
+
+    for phase, elapsed in phases:
+        print '{:>11.3f}s  {}'.format(elapsed, phase)
+    print '{:>11.3f}s  total\n'.format(sum(elapsed for __, elapsed in phases))
+    print '\n'.join(profiler.report(top))
+
+
+def main():
+    """
+    Profiles the startup of the wsgi module given on the command line.
+    """
+    parser = argparse.ArgumentParser(description="Profile the imports made while a server process starts.")
+    parser.add_argument('wsgi_module', help="e.g. lms.wsgi or cms.wsgi")
+    parser.add_argument('--top', type=int, default=40, help="Number of modules to report")
+    args = parser.parse_args()
+    profile_startup(args.wsgi_module, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Sets of XBlock types selected by a property of their classes, computed on first use.
+
+Loading the classes of all the XBlock entry points imports every XModule and XBlock
+package, which makes starting a process slow. A LazyBlockTypes loads the classes of
+a block type when it's asked whether it contains that type, and the classes of all
+the block types only when it's iterated over.
+"""
+import logging
+
+import pkg_resources
+from xblock.core import XBlock
+
+log = logging.getLogger(__name__)
+
+
+class LazyBlockTypes(object):
+    """
+    The set of the block types which have an XBlock class for which predicate is true.
+    """
+    def __init__(self, predicate):
+        self.predicate = predicate
+        self._contains = {}
+        self._all = None
+
+    def __contains__(self, block_type):
+        if self._all is not None:
+            return block_type in self._all
+
+        contains = self._contains.get(block_type)
+        if contains is None:
+            entry_points = list(pkg_resources.iter_entry_points(XBlock.entry_point, name=block_type))
+            if entry_points:
+                contains = self._contains[block_type] = any(
+                    self.predicate(block_class) for block_class in self._load(entry_points)
+                )
+            else:
+                # the class might not be registered as an entry point (e.g. temporary plugins in tests)
+                contains = block_type in self._all_block_types()
+        return contains
+
+    def __iter__(self):
+        return iter(self._all_block_types())
+
+    def _all_block_types(self):
+        """
+        Returns the set of block types, loading the classes of all the block types the first time.
+        """
+        if self._all is None:
+            self._all = set(name for name, block_class in XBlock.load_classes() if self.predicate(block_class))
+        return self._all
+
+    @staticmethod
+    def _load(entry_points):
+        """
+        Returns the classes of the entry points which can be loaded.
+        """
+        block_classes = []
+        for entry_point in entry_points:
+            try:
+                block_classes.append(entry_point.load())
+            except Exception:  # pylint: disable=broad-except
+                log.warning("Unable to load the XBlock class of %s", entry_point, exc_info=True)
+        return block_classes
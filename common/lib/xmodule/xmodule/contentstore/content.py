@@ -21,7 +21,7 @@ from PIL import Image
 
 class StaticContent(object):
     def __init__(self, loc, name, content_type, data, last_modified_at=None, thumbnail_location=None, import_path=None,
-                 length=None, locked=False):
+                 length=None, locked=False, content_digest=None):
         self.location = loc
         self.name = name  # a display string which can be edited, and thus not part of the location which needs to be fixed
         self.content_type = content_type
@@ -33,6 +33,8 @@ class StaticContent(object):
         # cycles
         self.import_path = import_path
         self.locked = locked
+        # the md5 hex digest of the stored bytes, when the store provides one (used as the HTTP ETag)
+        self.content_digest = content_digest
 
     @property
     def is_thumbnail(self):
@@ -157,6 +159,12 @@ class StaticContent(object):
     def stream_data(self):
         yield self._data
 
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        yield self._data[first_byte:last_byte + 1]
+
     @staticmethod
     def serialize_asset_key_with_slash(asset_key):
         """
@@ -171,32 +179,43 @@ class StaticContent(object):
 
 class StaticContentStream(StaticContent):
     def __init__(self, loc, name, content_type, stream, last_modified_at=None, thumbnail_location=None, import_path=None,
-                 length=None, locked=False):
+                 length=None, locked=False, content_digest=None):
         super(StaticContentStream, self).__init__(loc, name, content_type, None, last_modified_at=last_modified_at,
                                                   thumbnail_location=thumbnail_location, import_path=import_path,
-                                                  length=length, locked=locked)
+                                                  length=length, locked=locked, content_digest=content_digest)
         self._stream = stream
 
-    def stream_data(self):
+    def _read_chunks(self):
+        """
+        Yield the data from the current position of the stream to its end.
+
+        GridFS files are read one stored chunk at a time via readchunk: GridOut.read() buffers
+        its result and issues an extra query per call, which adds up quickly for small reads.
+        """
+        readchunk = getattr(self._stream, 'readchunk', None)
         while True:
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
+            if readchunk is not None:
+                chunk = readchunk()
+            else:
+                chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
             if len(chunk) == 0:
                 break
             yield chunk
 
+    def stream_data(self):
+        return self._read_chunks()
+
     def stream_data_in_range(self, first_byte, last_byte):
         """
         Stream the data between first_byte and last_byte (included)
         """
         self._stream.seek(first_byte)
-        position = first_byte
-        while True:
-            if last_byte < position + STREAM_DATA_CHUNK_SIZE - 1:
-                chunk = self._stream.read(last_byte - position + 1)
-                yield chunk
+        remaining = last_byte - first_byte + 1
+        for chunk in self._read_chunks():
+            if len(chunk) >= remaining:
+                yield chunk[:remaining]
                 break
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
-            position += STREAM_DATA_CHUNK_SIZE
+            remaining -= len(chunk)
             yield chunk
 
     def close(self):
@@ -206,7 +225,8 @@ class StaticContentStream(StaticContent):
         self._stream.seek(0)
         content = StaticContent(self.location, self.name, self.content_type, self._stream.read(),
                                 last_modified_at=self.last_modified_at, thumbnail_location=self.thumbnail_location,
-                                import_path=self.import_path, length=self.length, locked=self.locked)
+                                import_path=self.import_path, length=self.length, locked=self.locked,
+                                content_digest=self.content_digest)
         return content
 
 
@@ -217,6 +237,18 @@ class ContentStore(object):
     def save(self, content):
         raise NotImplementedError
 
+    def save_many(self, contents):
+        """
+        Save all of the given contents. Providers may write them concurrently and skip
+        rewriting data which is already stored.
+
+        Returns the list of contents whose data was written.
+        """
+        contents = list(contents)
+        for content in contents:
+            self.save(content)
+        return contents
+
     def find(self, filename):
         raise NotImplementedError
 
@@ -248,6 +280,15 @@ class ContentStore(object):
         """
         raise NotImplementedError
 
+    def collect_garbage(self):
+        """
+        Delete any stored data which is no longer referenced by an asset, for stores which share
+        data between assets.
+
+        Returns the number of pieces of data deleted.
+        """
+        return 0
+
     def generate_thumbnail(self, content, tempfile_path=None):
         thumbnail_content = None
         # use a naming convention to associate originals with the thumbnail
@@ -291,6 +332,19 @@ class ContentStore(object):
 
         return thumbnail_content, thumbnail_file_location
 
+    def generate_thumbnail_for_asset(self, asset_key):
+        """
+        Generate the thumbnail of an asset which has already been saved without one, and
+        point the asset at it. Used to move thumbnail generation out of uploads and imports.
+
+        Raises NotFoundError if no such asset exists
+        """
+        content = self.find(asset_key)
+        thumbnail_content, thumbnail_location = self.generate_thumbnail(content)
+        if thumbnail_content is not None:
+            self.set_attr(asset_key, 'thumbnail_location', thumbnail_location.to_deprecated_list_repr())
+        return thumbnail_content, thumbnail_location
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
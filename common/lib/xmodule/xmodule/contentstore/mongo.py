@@ -1,6 +1,10 @@
+import copy
+import datetime
+import hashlib
 import pymongo
 import gridfs
 from gridfs.errors import NoFile
+from multiprocessing.pool import ThreadPool
 
 from xmodule.contentstore.content import XASSET_LOCATION_TAG
 
@@ -11,19 +15,39 @@ from xmodule.exceptions import NotFoundError
 from fs.osfs import OSFS
 import os
 import json
+from collections import Counter, OrderedDict, deque
 from bson.son import SON
 from opaque_keys.edx.keys import AssetKey
 from xmodule.modulestore.django import ASSET_IGNORE_REGEX
 
+# Number of threads concurrently writing to GridFS in save_many
+SAVE_MANY_WORKERS = 8
+
+# Number of threads concurrently reading assets from GridFS when exporting a course
+EXPORT_WORKERS = 8
+
+# Assets up to this size are read ahead in full when exporting a course; bigger ones are
+# streamed a chunk at a time
+EXPORT_READ_AHEAD_MAX_SIZE = 1024 * 1024
+
+# Attributes of the stored assets which aren't exported to the assets policy
+EXPORT_POLICY_EXCLUDED_ATTRS = ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key', 'blob_id']
+
 
 class MongoContentStore(ContentStore):
 
     # pylint: disable=unused-argument
-    def __init__(self, host, db, port=27017, user=None, password=None, bucket='fs', collection=None, **kwargs):
+    def __init__(self, host, db, port=27017, user=None, password=None, bucket='fs', collection=None,
+                 content_addressed=False, blob_bucket='blobs', **kwargs):
         """
         Establish the connection with the mongo backend and connect to the collections
 
         :param collection: ignores but provided for consistency w/ other doc_store_config patterns
+        :param content_addressed: if True, the data of saved assets is stored once per distinct content in
+            reference counted blobs, and the asset files in `bucket` only hold metadata pointing at their blob.
+            Assets saved either way can always be read.
+        :param blob_bucket: the GridFS bucket holding the blobs; stores in the same db (such as the trashcan)
+            share it, so moving assets between them doesn't copy any data.
         """
         logging.debug('Using MongoDB for static content serving at host={0} port={1} db={2}'.format(host, port, db))
         _db = pymongo.database.Database(
@@ -42,6 +66,24 @@ class MongoContentStore(ContentStore):
         self.fs = gridfs.GridFS(_db, bucket)
 
         self.fs_files = _db[bucket + ".files"]  # the underlying collection GridFS uses
+        self.fs_chunks = _db[bucket + ".chunks"]
+
+        self.content_addressed = content_addressed
+        # making a GridFS creates its collections and indexes, so stores which aren't content addressed only
+        # make the blobs' one if they come to read a blob
+        self._blob_bucket = blob_bucket
+        self._blobs = gridfs.GridFS(_db, blob_bucket) if content_addressed else None
+        self.blob_files = _db[blob_bucket + ".files"]
+        self.blob_chunks = _db[blob_bucket + ".chunks"]
+
+    @property
+    def blobs(self):
+        """
+        The GridFS holding the blobs
+        """
+        if self._blobs is None:
+            self._blobs = gridfs.GridFS(self.blob_files.database, self._blob_bucket)
+        return self._blobs
 
     def close_connections(self):
         """
@@ -63,9 +105,29 @@ class MongoContentStore(ContentStore):
         # The way to version files in gridFS is to not use the file id as the _id but just as the filename.
         # Then you can upload as many versions as you like and access by date or version. Because we use
         # the location as the _id, we must delete before adding (there's no replace method in gridFS)
+        thumbnail_location = content.thumbnail_location.to_deprecated_list_repr() if content.thumbnail_location else None
+
+        if self.content_addressed:
+            # acquire the blob before releasing the one of any previous version, in case they're the same
+            blob = self._store_blob(content.data)
+            self.delete(content_id)
+            try:
+                self.fs_files.insert(self._blob_asset_doc(
+                    blob, _id=content_id, filename=unicode(content.location), content_type=content.content_type,
+                    displayname=content.name, content_son=content_son,
+                    thumbnail_location=thumbnail_location,
+                    import_path=content.import_path,
+                    locked=getattr(content, 'locked', False)
+                ))
+            except pymongo.errors.DuplicateKeyError:
+                # a concurrent save of the same location got in first; the asset was never stored, so
+                # it mustn't keep the blob referenced
+                self._release_blobs([blob['_id']])
+                raise
+            return content
+
         self.delete(content_id)  # delete is a noop if the entry doesn't exist; so, don't waste time checking
 
-        thumbnail_location = content.thumbnail_location.to_deprecated_list_repr() if content.thumbnail_location else None
         with self.fs.new_file(_id=content_id, filename=unicode(content.location), content_type=content.content_type,
                               displayname=content.name, content_son=content_son,
                               thumbnail_location=thumbnail_location,
@@ -80,11 +142,174 @@ class MongoContentStore(ContentStore):
 
         return content
 
+    def _store_blob(self, data):
+        """
+        Store data as a blob, or take a reference to an existing blob with the same md5.
+
+        Returns the blob's file document.
+        """
+        if isinstance(data, basestring):
+            blob = self._acquire_blob(hashlib.md5(data).hexdigest())
+            if blob is None:
+                blob = self.blob_files.find_one({'_id': self.blobs.put(data, refcount=1)})
+            return blob
+
+        # the md5 of streamed data is only known once it has been written: until it's known whether
+        # there's already a blob with that md5, the new blob is pending, so that no other writer can
+        # acquire it (and collect_garbage doesn't delete it, as it's referenced)
+        with self.blobs.new_file(refcount=1, pending=True) as fp:
+            for chunk in data:
+                fp.write(chunk)
+        blob = self.blob_files.find_one({'_id': fp._id})
+        existing_blob = self._acquire_blob(blob['md5'])
+        if existing_blob is None:
+            return self.blob_files.find_and_modify({'_id': blob['_id']}, {'$unset': {'pending': True}}, new=True)
+        self.blobs.delete(blob['_id'])
+        return existing_blob
+
+    def _acquire_blob(self, md5):
+        """
+        Take a reference to a live blob with the given md5, returning its file document or None if there's none.
+
+        Blobs without references are never acquired, so that collect_garbage can safely delete them, nor
+        are pending blobs, which may still be deleted by their writer.
+        """
+        return self.blob_files.find_and_modify(
+            {'md5': md5, 'refcount': {'$gt': 0}, 'pending': {'$exists': False}}, {'$inc': {'refcount': 1}}, new=True
+        )
+
+    def _release_blobs(self, blob_ids):
+        """
+        Drop a reference to each of the given blobs (None entries are ignored). Unreferenced blobs
+        are left for collect_garbage to delete.
+        """
+        for blob_id, references in Counter(blob_id for blob_id in blob_ids if blob_id is not None).iteritems():
+            self.blob_files.update({'_id': blob_id}, {'$inc': {'refcount': -references}})
+
+    @staticmethod
+    def _blob_asset_doc(blob, content_type=None, **attrs):
+        """
+        Returns the file document of an asset whose data is the given blob, with the given attrs.
+        """
+        doc = dict(attrs)
+        doc.update({
+            'contentType': content_type,
+            'blob_id': blob['_id'],
+            'length': blob['length'],
+            'chunkSize': blob['chunkSize'],
+            'md5': blob['md5'],
+            'uploadDate': datetime.datetime.utcnow(),
+        })
+        return doc
+
+    def _open(self, fs_entry):
+        """
+        Returns a GridOut from which to read the data of the asset with the given file document.
+        """
+        if fs_entry.get('blob_id') is not None:
+            return self.blobs.get(fs_entry['blob_id'])
+        return self.fs.get(self.make_id_son(fs_entry))
+
+    def collect_garbage(self):
+        """
+        Delete the blobs which are no longer referenced by any asset.
+
+        Returns the number of blobs deleted.
+        """
+        deleted = 0
+        for blob in self.blob_files.find({'refcount': {'$lte': 0}}, fields=['_id']):
+            # only delete the blob if it still has no references (it can't have gained any)
+            result = self.blob_files.remove({'_id': blob['_id'], 'refcount': {'$lte': 0}})
+            if result and result.get('n'):
+                self.blob_chunks.remove({'files_id': blob['_id']})
+                deleted += 1
+        return deleted
+
+    def save_many(self, contents, workers=SAVE_MANY_WORKERS):
+        """
+        See :meth:`.ContentStore.save_many`
+
+        The data of contents is written from up to `workers` concurrent threads. Contents whose data has the
+        same md5 as what's already stored at their location aren't rewritten; only their attributes are updated.
+        Contents which fail to save are logged and left out of the returned list.
+        """
+        # the last of several contents for the same location wins, as it would if they were saved in order
+        contents_by_id = OrderedDict()
+        for content in contents:
+            contents_by_id[self._hashable_id(self.asset_db_key(content.location)[0])] = content
+        if not contents_by_id:
+            return []
+
+        content_ids = [self.asset_db_key(content.location)[0] for content in contents_by_id.itervalues()]
+        stored_md5s = {
+            self._hashable_id(self.make_id_son(item)): item.get('md5')
+            for item in self.fs_files.find({'_id': {'$in': content_ids}}, fields=['_id', 'md5'])
+        }
+
+        to_write = []
+        for content_id, content in contents_by_id.iteritems():
+            if (
+                    content_id in stored_md5s and isinstance(content.data, basestring) and
+                    hashlib.md5(content.data).hexdigest() == stored_md5s[content_id]
+            ):
+                self._update_unchanged(content)
+            else:
+                to_write.append(content)
+
+        def save_or_log(content):
+            """
+            Save content, returning whether it could be saved.
+            """
+            try:
+                self.save(content)
+                return True
+            except Exception:  # pylint: disable=broad-except
+                logging.exception(u'Error saving {0}'.format(content.location))
+                return False
+
+        if not to_write:
+            return []
+        pool = ThreadPool(min(workers, len(to_write)))
+        try:
+            saved = pool.map(save_or_log, to_write)
+        finally:
+            pool.close()
+            pool.join()
+        return [content for content, was_saved in zip(to_write, saved) if was_saved]
+
+    @staticmethod
+    def _hashable_id(content_id):
+        """
+        Returns a hashable version of a content id, which may be a SON.
+        """
+        if isinstance(content_id, basestring):
+            return content_id
+        return tuple(content_id.items())
+
+    def _update_unchanged(self, content):
+        """
+        Update the attributes of an asset whose stored data is already identical to content's.
+        """
+        content_id, __ = self.asset_db_key(content.location)
+        attrs = {
+            'contentType': content.content_type,
+            'displayname': content.name,
+            'import_path': content.import_path,
+            'locked': getattr(content, 'locked', False),
+        }
+        # the stored thumbnail still matches the unchanged data, so only replace it if there's a new one
+        if content.thumbnail_location:
+            attrs['thumbnail_location'] = content.thumbnail_location.to_deprecated_list_repr()
+        self.fs_files.update({'_id': content_id}, {'$set': attrs})
+
     def delete(self, location_or_id):
         if isinstance(location_or_id, AssetKey):
             location_or_id, _ = self.asset_db_key(location_or_id)
         # Deletes of non-existent files are considered successful
-        self.fs.delete(location_or_id)
+        fs_entry = self.fs_files.find_and_modify({'_id': location_or_id}, remove=True, fields=['blob_id'])
+        self.fs_chunks.remove({'files_id': location_or_id})
+        if fs_entry is not None:
+            self._release_blobs([fs_entry.get('blob_id')])
 
     def find(self, location, throw_on_not_found=True, as_stream=False):
         content_id, __ = self.asset_db_key(location)
@@ -92,6 +317,9 @@ class MongoContentStore(ContentStore):
         try:
             if as_stream:
                 fp = self.fs.get(content_id)
+                # content addressed assets only hold metadata; their data is in their blob
+                blob_id = getattr(fp, 'blob_id', None)
+                data_fp = self.blobs.get(blob_id) if blob_id is not None else fp
                 thumbnail_location = getattr(fp, 'thumbnail_location', None)
                 if thumbnail_location:
                     thumbnail_location = location.course_key.make_asset_key(
@@ -99,13 +327,16 @@ class MongoContentStore(ContentStore):
                         thumbnail_location[4]
                     )
                 return StaticContentStream(
-                    location, fp.displayname, fp.content_type, fp, last_modified_at=fp.uploadDate,
+                    location, fp.displayname, fp.content_type, data_fp, last_modified_at=fp.uploadDate,
                     thumbnail_location=thumbnail_location,
                     import_path=getattr(fp, 'import_path', None),
-                    length=fp.length, locked=getattr(fp, 'locked', False)
+                    length=fp.length, locked=getattr(fp, 'locked', False),
+                    content_digest=getattr(fp, 'md5', None)
                 )
             else:
                 with self.fs.get(content_id) as fp:
+                    blob_id = getattr(fp, 'blob_id', None)
+                    data = self.blobs.get(blob_id).read() if blob_id is not None else fp.read()
                     thumbnail_location = getattr(fp, 'thumbnail_location', None)
                     if thumbnail_location:
                         thumbnail_location = location.course_key.make_asset_key(
@@ -113,10 +344,11 @@ class MongoContentStore(ContentStore):
                             thumbnail_location[4]
                         )
                     return StaticContent(
-                        location, fp.displayname, fp.content_type, fp.read(), last_modified_at=fp.uploadDate,
+                        location, fp.displayname, fp.content_type, data, last_modified_at=fp.uploadDate,
                         thumbnail_location=thumbnail_location,
                         import_path=getattr(fp, 'import_path', None),
-                        length=fp.length, locked=getattr(fp, 'locked', False)
+                        length=fp.length, locked=getattr(fp, 'locked', False),
+                        content_digest=getattr(fp, 'md5', None)
                     )
         except NoFile:
             if throw_on_not_found:
@@ -150,25 +382,72 @@ class MongoContentStore(ContentStore):
                 directory as the other policy files.
         """
         policy = {}
-        assets, __ = self.get_all_content_for_course(course_key)
 
-        for asset in assets:
-            # TODO: On 6/19/14, I had to put a try/except around this
-            # to export a course. The course failed on JSON files in
-            # the /static/ directory placed in it with an import.
-            #
-            # If this hasn't been looked at in a while, remove this comment.
-            #
-            # When debugging course exports, this might be a good place
-            # to look. -- pmitros
-            self.export(asset['asset_key'], output_directory)
-            for attr, value in asset.iteritems():
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
-                    policy.setdefault(asset['asset_key'].name, {})[attr] = value
+        for content, attrs in self.iter_all_for_course(course_key):
+            asset_directory = output_directory
+            if content.import_path is not None:
+                asset_directory = output_directory + '/' + os.path.dirname(content.import_path)
+            if not os.path.exists(asset_directory):
+                os.makedirs(asset_directory)
+
+            with OSFS(asset_directory).open(content.name, 'wb') as asset_file:
+                for chunk in content.stream_data():
+                    asset_file.write(chunk)
+            policy[content.location.name] = attrs
 
         with open(assets_policy_file, 'w') as f:
             json.dump(policy, f, sort_keys=True, indent=4)
 
+    def iter_all_for_course(self, course_key, workers=EXPORT_WORKERS):
+        """
+        Yields a `(content, policy)` pair for each of this course's assets, for exporting them: the
+        StaticContent (or StaticContentStream) of the asset, and the dict of its attributes which go into
+        the assets policy.
+
+        The data of the assets up to EXPORT_READ_AHEAD_MAX_SIZE is read ahead by `workers` concurrent threads,
+        while bigger assets are streamed when their turn comes. This bounds the memory used to about
+        `workers` times EXPORT_READ_AHEAD_MAX_SIZE however big the course is.
+        """
+        assets, __ = self.get_all_content_for_course(course_key)
+        pool = ThreadPool(workers)
+        pending = deque()
+        try:
+            for asset in assets:
+                if asset.get('length', 0) <= EXPORT_READ_AHEAD_MAX_SIZE:
+                    pending.append((asset, pool.apply_async(self._read_all, (asset,))))
+                else:
+                    pending.append((asset, None))
+                if len(pending) > workers:
+                    yield self._exported_content(*pending.popleft())
+            while pending:
+                yield self._exported_content(*pending.popleft())
+        finally:
+            pool.close()
+            pool.join()
+
+    def _read_all(self, fs_entry):
+        """
+        Returns all the data of the asset stored at fs_entry.
+        """
+        return self._open(fs_entry).read()
+
+    def _exported_content(self, asset, read_ahead):
+        """
+        Returns the `(content, policy)` pair of an asset for iter_all_for_course, where read_ahead
+        is the AsyncResult of reading its data, if it was read ahead.
+        """
+        policy = {attr: value for attr, value in asset.iteritems() if attr not in EXPORT_POLICY_EXCLUDED_ATTRS}
+        if read_ahead is not None:
+            content_class, data = StaticContent, read_ahead.get()
+        else:
+            content_class, data = StaticContentStream, self._open(asset)
+        content = content_class(
+            asset['asset_key'], asset['displayname'], asset.get('contentType'), data,
+            last_modified_at=asset.get('uploadDate'), import_path=asset.get('import_path'),
+            length=asset.get('length'), content_digest=asset.get('md5')
+        )
+        return content, policy
+
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
 
@@ -191,10 +470,13 @@ class MongoContentStore(ContentStore):
             ])
             items = self.fs_files.find(query)
             assets_to_delete = assets_to_delete + items.count()
+            blob_ids = []
             for asset in items:
                 self.fs.delete(asset[prefix])
+                blob_ids.append(asset.get('blob_id'))
 
             self.fs_files.remove(query)
+            self._release_blobs(blob_ids)
         return assets_to_delete
 
     def _get_all_content_for_course(self,
@@ -271,7 +553,7 @@ class MongoContentStore(ContentStore):
         :param location:  a c4x asset location
         """
         for attr in attr_dict.iterkeys():
-            if attr in ['_id', 'md5', 'uploadDate', 'length']:
+            if attr in ['_id', 'md5', 'uploadDate', 'length', 'blob_id']:
                 raise AttributeError("{} is a protected attribute.".format(attr))
         asset_db_key, __ = self.asset_db_key(location)
         # catch upsert error and raise NotFoundError if asset doesn't exist
@@ -299,14 +581,15 @@ class MongoContentStore(ContentStore):
         """
         See :meth:`.ContentStore.copy_all_course_assets`
 
-        This implementation fairly expensively copies all of the data
+        Unless content addressed, this implementation fairly expensively copies all of the data. When content
+        addressed, the copies just take references to the blobs holding the source assets' data.
         """
         source_query = query_for_course(source_course_key)
-        # it'd be great to figure out how to do all of this on the db server and not pull the bits over
+        copied_assets = []
         for asset in self.fs_files.find(source_query):
             asset_key = self.make_id_son(asset)
-            # don't convert from string until fs access
-            source_content = self.fs.get(asset_key)
+            # asset_key gets modified into the destination's key below
+            source_entry = dict(asset, _id=copy.copy(asset_key))
             if isinstance(asset_key, basestring):
                 asset_key = AssetKey.from_string(asset_key)
                 __, asset_key = self.asset_db_key(asset_key)
@@ -322,8 +605,7 @@ class MongoContentStore(ContentStore):
                     dest_course_key.make_asset_key(asset_key['category'], asset_key['name']).for_branch(None)
                 )
 
-            self.fs.put(
-                source_content.read(),
+            attrs = dict(
                 _id=asset_id, filename=asset['filename'], content_type=asset['contentType'],
                 displayname=asset['displayname'], content_son=asset_key,
                 # thumbnail is not technically correct but will be functionally correct as the code
@@ -333,6 +615,58 @@ class MongoContentStore(ContentStore):
                 # getattr b/c caching may mean some pickled instances don't have attr
                 locked=asset.get('locked', False)
             )
+            if self.content_addressed:
+                copied_assets.append(self._blob_asset_doc(self._share_blob(source_entry), **attrs))
+            else:
+                # it'd be great to figure out how to do all of this on the db server and not pull the bits over
+                self.fs.put(self._open(source_entry).read(), **attrs)
+
+        if copied_assets:
+            try:
+                # carry on past the copies clashing with assets already in the destination
+                self.fs_files.insert(copied_assets, continue_on_error=True)
+            except pymongo.errors.DuplicateKeyError:
+                # the copies which weren't inserted mustn't keep their blobs referenced
+                inserted = set(
+                    self._hashable_id(self.make_id_son(asset)) for asset in self.fs_files.find(
+                        {'$or': [
+                            {'_id': asset['_id'], 'blob_id': asset['blob_id'], 'uploadDate': asset['uploadDate']}
+                            for asset in copied_assets
+                        ]},
+                        fields=['_id']
+                    )
+                )
+                self._release_blobs(
+                    asset['blob_id'] for asset in copied_assets if self._hashable_id(asset['_id']) not in inserted
+                )
+                raise
+
+    def _share_blob(self, fs_entry):
+        """
+        Take a new reference to the blob holding the data of the asset with the given file document.
+        An asset which isn't content addressed is first moved into a blob, so that its data isn't stored twice.
+
+        Returns the blob's file document.
+        """
+        if fs_entry.get('blob_id') is not None:
+            return self.blob_files.find_and_modify(
+                {'_id': fs_entry['blob_id']}, {'$inc': {'refcount': 1}}, new=True
+            )
+        blob = self._acquire_blob(fs_entry['md5'])
+        if blob is None:
+            blob = self._store_blob(self._open(fs_entry).read())
+        # one reference for the asset and one for the caller
+        blob = self.blob_files.find_and_modify({'_id': blob['_id']}, {'$inc': {'refcount': 1}}, new=True)
+        # unless it has been saved over meanwhile, point the asset at the blob and drop its own chunks
+        moved = self.fs_files.update(
+            {'_id': fs_entry['_id'], 'md5': fs_entry['md5'], 'blob_id': {'$exists': False}},
+            {'$set': {'blob_id': blob['_id'], 'chunkSize': blob['chunkSize']}}
+        )
+        if moved and moved.get('n'):
+            self.fs_chunks.remove({'files_id': fs_entry['_id']})
+        else:
+            self._release_blobs([blob['_id']])
+        return blob
 
     def delete_all_course_assets(self, course_key):
         """
@@ -341,10 +675,13 @@ class MongoContentStore(ContentStore):
         :param course_key:
         """
         course_query = query_for_course(course_key)
-        matching_assets = self.fs_files.find(course_query)
-        for asset in matching_assets:
-            asset_key = self.make_id_son(asset)
-            self.fs.delete(asset_key)
+        matching_assets = list(self.fs_files.find(course_query, fields=['_id', 'blob_id']))
+        if not matching_assets:
+            return
+        self.fs_files.remove(course_query)
+        self.fs_chunks.remove({'files_id': {'$in': [self.make_id_son(asset) for asset in matching_assets]}})
+        self._release_blobs(asset.get('blob_id') for asset in matching_assets)
+        self.collect_garbage()
 
     # codifying the original order which pymongo used for the dicts coming out of location_to_dict
     # stability of order is more important than sanity of order as any changes to order make things
@@ -385,6 +722,10 @@ class MongoContentStore(ContentStore):
 
     def ensure_indexes(self):
 
+        if self.content_addressed:
+            # Index needed by `_acquire_blob` to find the blob with the same data
+            self.blob_files.create_index([('md5', pymongo.ASCENDING), ('refcount', pymongo.ASCENDING)])
+
         # Index needed thru 'category' by `_get_all_content_for_course` and others. That query also takes a sort
         # which can be `uploadDate`, `display_name`,
 
@@ -21,6 +21,9 @@ def empty_asset_trashcan(course_locs):
             print "Deleting {0}...".format(asset)
             store.delete(asset['_id'])
 
+    # then delete the data no longer used by any asset
+    print "Deleted {0} unreferenced blobs".format(store.collect_garbage())
+
 
 def restore_asset_from_trashcan(location):
     '''
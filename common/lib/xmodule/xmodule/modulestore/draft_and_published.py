@@ -4,12 +4,24 @@ This module provides an abstraction for Module Stores that support Draft and Pub
 
 import threading
 from abc import ABCMeta, abstractmethod
+from collections import namedtuple
 from contextlib import contextmanager
 from . import ModuleStoreEnum
 
 # Things w/ these categories should never be marked as version=DRAFT
 DIRECT_ONLY_CATEGORIES = ['course', 'chapter', 'sequential', 'about', 'static_tab', 'course_info']
 
+# Whether a block's subtree has unpublished changes (see has_changes) and whether the block has a
+# published version (see has_published_version)
+BlockPublishState = namedtuple('BlockPublishState', ['has_changes', 'published'])
+
+
+def publish_state_key(usage_key):
+    """
+    Returns the key of the block at usage_key in the dicts returned by get_subtree_publish_states.
+    """
+    return (usage_key.block_type, usage_key.block_id)
+
 
 class BranchSettingMixin(object):
     """
@@ -81,6 +93,29 @@ class ModuleStoreDraftAndPublished(BranchSettingMixin):
     def has_changes(self, xblock):
         raise NotImplementedError
 
+    def get_subtree_publish_states(self, xblock):
+        """
+        Returns {publish_state_key(location): BlockPublishState} for xblock and all of its descendants.
+
+        Stores should override this to work out the states of the whole subtree in one pass, rather
+        than with has_changes and has_published_version calls for each block of it.
+        """
+        states = {}
+
+        def _compute_states(block):
+            """
+            Adds the states of block and its descendants.
+            """
+            if block.has_children:
+                for child in block.get_children():
+                    _compute_states(child)
+            states[publish_state_key(block.location)] = BlockPublishState(
+                self.has_changes(block), self.has_published_version(block)
+            )
+
+        _compute_states(xblock)
+        return states
+
     @abstractmethod
     def publish(self, location, user_id):
         raise NotImplementedError
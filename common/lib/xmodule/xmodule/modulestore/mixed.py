@@ -850,6 +850,13 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         store = self._verify_modulestore_support(xblock.location.course_key, 'has_changes')
         return store.has_changes(xblock)
 
+    def get_subtree_publish_states(self, xblock):
+        """
+        Returns {publish_state_key(location): BlockPublishState} for xblock and all of its descendants.
+        """
+        store = self._verify_modulestore_support(xblock.location.course_key, 'get_subtree_publish_states')
+        return store.get_subtree_publish_states(xblock)
+
     def check_supports(self, course_key, method):
         """
         Verifies that the modulestore for a particular course supports a feature.
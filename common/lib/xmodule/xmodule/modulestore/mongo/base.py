@@ -28,6 +28,7 @@ from pytz import UTC
 from contracts import contract, new_contract
 
 from importlib import import_module
+from lazy import lazy
 from opaque_keys.edx.keys import UsageKey, CourseKey, AssetKey
 from opaque_keys.edx.locations import Location, BlockUsageLocator
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
@@ -39,6 +40,7 @@ from xblock.fields import Scope, ScopeIds, Reference, ReferenceList, ReferenceVa
 from xblock.runtime import KvsFieldData
 
 from xmodule.assetstore import AssetMetadata, CourseAssetsFromStorage
+from xmodule.block_types import LazyBlockTypes
 from xmodule.error_module import ErrorDescriptor
 from xmodule.errortracker import null_error_tracker, exc_info_to_str
 from xmodule.exceptions import HeartbeatFailure
@@ -64,9 +66,27 @@ SORT_REVISION_FAVOR_DRAFT = ('_id.revision', pymongo.DESCENDING)
 # sort order that returns PUBLISHED items first
 SORT_REVISION_FAVOR_PUBLISHED = ('_id.revision', pymongo.ASCENDING)
 
-BLOCK_TYPES_WITH_CHILDREN = list(set(
-    name for name, class_ in XBlock.load_classes() if getattr(class_, 'has_children', False)
-))
+# The XBlock classes are only loaded when needed, rather than all of them on import
+BLOCK_TYPES_WITH_CHILDREN = LazyBlockTypes(lambda class_: getattr(class_, 'has_children', False))
+
+# Version of the format of the metadata inheritance trees stored in the metadata_inheritance_cache_subsystem:
+# cached trees of any other version are recomputed
+INHERITANCE_TREE_VERSION = 2
+
+# Most containers written to since the metadata inheritance tree was cached for which the tree is
+# updated in place: it's recomputed when more (e.g. on import) have been written to
+MAX_INHERITANCE_TREE_UPDATE_SIZE = 20
+
+# Number of in place updates after which the metadata inheritance tree is recomputed anyway, so
+# that lost concurrent updates don't outlive it for long
+MAX_INHERITANCE_TREE_UPDATES = 100
+
+# Number of seconds a metadata inheritance tree updated in place is cached for: the check for concurrent
+# updates isn't atomic, so a lost update is only kept for that long
+INHERITANCE_TREE_UPDATE_TIMEOUT = 5 * 60
+
+# Most writes sent to mongo in each of the unordered bulk writes of a MongoBulkWriter
+BULK_WRITE_BATCH_SIZE = 500
 
 # Allow us to call _from_deprecated_(son|string) throughout the file
 # pylint: disable=protected-access
@@ -428,11 +448,21 @@ def as_published(location):
 
 class MongoBulkOpsRecord(BulkOpsRecord):
     """
-    Tracks whether there've been any writes per course and disables inheritance generation
+    Tracks whether there've been any writes per course, and to which locations, and disables inheritance generation
     """
     def __init__(self):
         super(MongoBulkOpsRecord, self).__init__()
         self.dirty = False
+        self.dirty_locations = set()
+
+    def mark_dirty(self, location):
+        """
+        Record a write to location.
+        """
+        self.dirty = True
+        # outside of bulk operations, the writes refresh the inheritance tree themselves
+        if self.active:
+            self.dirty_locations.add(location)
 
 
 class MongoBulkOpsMixin(BulkOperationsMixin):
@@ -447,6 +477,7 @@ class MongoBulkOpsMixin(BulkOperationsMixin):
         """
         # ensure it starts clean
         bulk_ops_record.dirty = False
+        bulk_ops_record.dirty_locations = set()
 
     def _end_outermost_bulk_operation(self, bulk_ops_record, course_id):
         """
@@ -454,8 +485,10 @@ class MongoBulkOpsMixin(BulkOperationsMixin):
         Refresh the meta-data inheritance cache now since it was temporarily disabled.
         """
         if bulk_ops_record.dirty:
-            self.refresh_cached_metadata_inheritance_tree(course_id)
-            bulk_ops_record.dirty = False  # brand spanking clean now
+            self.refresh_cached_metadata_inheritance_tree(course_id, locations=bulk_ops_record.dirty_locations)
+            # brand spanking clean now
+            bulk_ops_record.dirty = False
+            bulk_ops_record.dirty_locations = set()
 
     def _is_in_bulk_operation(self, course_id, ignore_case=False):
         """
@@ -487,6 +520,157 @@ class ParentLocationCache(dict):
             del self[key]
 
 
+class MongoBulkWriter(object):
+    """
+    Queues upserts and removals of the items of a modulestore collection and sends them to mongo as
+    unordered bulk writes of at most batch_size operations, rather than as a round trip apiece.
+
+    Use it as a context manager to send the remaining queued writes on leaving the block. The writes
+    are unordered, so don't queue several of them for the same item.
+    """
+    def __init__(self, collection, batch_size=BULK_WRITE_BATCH_SIZE):
+        self.collection = collection
+        self.batch_size = batch_size
+        self._bulk = None
+        self._queued = 0
+
+    def _find(self, location):
+        """
+        Returns the bulk operation's selector of the item at location, starting a new bulk operation if need be.
+        """
+        if self._bulk is None:
+            self._bulk = self.collection.initialize_unordered_bulk_op()
+        return self._bulk.find({'_id': location.to_deprecated_son()})
+
+    def _queued_one(self):
+        """
+        Sends the queued writes once there are batch_size of them.
+        """
+        self._queued += 1
+        if self._queued >= self.batch_size:
+            self.flush()
+
+    def upsert(self, location, update):
+        """
+        Queue setting update on the item at location, creating the item if it doesn't exist.
+        """
+        self._find(location).upsert().update_one({'$set': update})
+        self._queued_one()
+
+    def remove(self, location):
+        """
+        Queue removing the item at location.
+        """
+        self._find(location).remove_one()
+        self._queued_one()
+
+    def flush(self):
+        """
+        Send the queued writes to mongo.
+        """
+        if self._bulk is not None:
+            bulk, self._bulk, self._queued = self._bulk, None, 0
+            bulk.execute()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+
+class MetadataInheritanceTree(object):
+    """
+    The metadata inheritance tree of a course, looked up like the dict it replaced: get(location url)
+    returns the metadata the block at that location inherits, plus its 'parent' {branch: parent url}.
+
+    It's stored as `tree`, a compact dict of:
+        'version': INHERITANCE_TREE_VERSION,
+        'branch': the branch setting it was computed with,
+        'root': the url of the course,
+        'nodes': {url: {'metadata': own inheritable metadata, 'children': [child url]}} of the containers,
+        'updates': the number of in place updates made to it since it was computed,
+        'stamp': a random id of this version of the tree, to detect concurrent updates,
+    and the inherited metadata of each block is worked out from its ancestors the first time it's got.
+    """
+    def __init__(self, tree):
+        self.tree = tree
+        self._inherited = {}
+
+    @classmethod
+    def from_nodes(cls, branch, root, nodes):
+        """
+        Returns the tree of the given containers.
+        """
+        return cls({
+            'version': INHERITANCE_TREE_VERSION,
+            'branch': branch,
+            'root': root,
+            'nodes': nodes,
+            'updates': 0,
+            'stamp': uuid4().hex,
+        })
+
+    @lazy
+    def parents(self):
+        """
+        {url: parent url} of the blocks reachable from the root.
+        """
+        parents = {}
+        nodes = self.tree['nodes']
+        pending = [self.tree['root']] if self.tree['root'] in nodes else []
+        while pending:
+            url = pending.pop()
+            for child in nodes[url]['children']:
+                if child not in parents:
+                    parents[child] = url
+                    if child in nodes:
+                        pending.append(child)
+        return parents
+
+    def _inherited_by_children(self, url):
+        """
+        Returns the metadata which the children of the container at url inherit.
+        """
+        metadata = self._inherited.get(url)
+        if metadata is None:
+            parent = self.parents.get(url)
+            metadata = dict(self._inherited_by_children(parent)) if parent is not None else {}
+            metadata.update(self.tree['nodes'][url]['metadata'])
+            self._inherited[url] = metadata
+        return metadata
+
+    def get(self, url, default=None):
+        """
+        Returns the metadata the block at url inherits, or default if it isn't in the course.
+        """
+        parent = self.parents.get(url)
+        if parent is None:
+            return default
+        metadata = dict(self._inherited_by_children(parent))
+        metadata['parent'] = {self.tree['branch']: parent}
+        return metadata
+
+    def updated(self, nodes, deleted):
+        """
+        Returns a new tree with the containers nodes replaced and the containers deleted removed,
+        dropping the containers no longer reachable from the root.
+        """
+        tree = dict(
+            self.tree, nodes=dict(self.tree['nodes']), updates=self.tree['updates'] + 1, stamp=uuid4().hex
+        )
+        tree['nodes'].update(nodes)
+        for url in deleted:
+            tree['nodes'].pop(url, None)
+        updated = MetadataInheritanceTree(tree)
+        reachable = updated.parents
+        tree['nodes'] = {
+            url: node for url, node in tree['nodes'].iteritems() if url in reachable or url == tree['root']
+        }
+        return updated
+
+
 class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, MongoBulkOpsMixin):
     """
     A Mongodb backed ModuleStore
@@ -632,18 +816,20 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         else:
             return ParentLocationCache()
 
-    def _compute_metadata_inheritance_tree(self, course_id):
-        '''
-        Find all inheritable fields from all xblocks in the course which may define inheritable data
-        '''
-        # get all collections in the course, this query should not return any leaf nodes
-        course_id = self.fill_in_run(course_id)
+    def _load_inheritance_nodes(self, course_id, urls=None):
+        """
+        Returns {url: {'metadata': own inheritable metadata, 'children': [child url]}} for the containers
+        in the course (or only those at the given urls) as MetadataInheritanceTree nodes, and the url of
+        the course if it's one of them.
+        """
         query = SON([
             ('_id.tag', 'i4x'),
             ('_id.org', course_id.org),
             ('_id.course', course_id.course),
-            ('_id.category', {'$in': BLOCK_TYPES_WITH_CHILDREN})
+            ('_id.category', {'$in': list(BLOCK_TYPES_WITH_CHILDREN)})
         ])
+        if urls is not None:
+            query['_id.name'] = {'$in': list(set(Location.from_deprecated_string(url).name for url in urls))}
         # if we're only dealing in the published branch, then only get published containers
         if self.get_branch_setting() == ModuleStoreEnum.Branch.published_only:
             query['_id.revision'] = None
@@ -660,7 +846,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         # it's ok to keep these as deprecated strings b/c the overall cache is indexed by course_key and this
         # is a dictionary relative to that course
-        results_by_url = {}
+        nodes = {}
         root = None
 
         # now go through the results and order them by the location url
@@ -669,106 +855,148 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             location = as_published(Location._from_deprecated_son(result['_id'], course_id.run))
 
             location_url = unicode(location)
-            if location_url in results_by_url:
+            if urls is not None and location_url not in urls:
+                continue
+            children = result.get('definition', {}).get('children', [])
+            if location_url in nodes:
                 # found either draft or live to complement the other revision
                 # FIXME this is wrong. If the child was moved in draft from one parent to the other, it will
                 # show up under both in this logic: https://openedx.atlassian.net/browse/TNL-1075
-                existing_children = results_by_url[location_url].get('definition', {}).get('children', [])
-                additional_children = result.get('definition', {}).get('children', [])
-                total_children = existing_children + additional_children
-                # use set to get rid of duplicates. We don't care about order; so, it shouldn't matter.
-                results_by_url[location_url].setdefault('definition', {})['children'] = set(total_children)
+                existing_children = nodes[location_url]['children']
+                existing_children.extend(child for child in children if child not in existing_children)
             else:
-                results_by_url[location_url] = result
+                nodes[location_url] = {'metadata': result.get('metadata', {}), 'children': list(children)}
             if location.category == 'course':
                 root = location_url
+        return nodes, root
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
-
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
-                # WARNING: 'parent' is not part of inherited metadata, but
-                # we're piggybacking on this recursive traversal to grab
-                # and cache the child's parent, as a performance optimization.
-                # The 'parent' key will be popped out of the dictionary during
-                # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
-
-        if root is not None:
-            _compute_inherited_metadata(root)
-
-        return metadata_to_inherit
+    def _compute_metadata_inheritance_tree(self, course_id):
+        '''
+        Find all inheritable fields from all xblocks in the course which may define inheritable data
+        '''
+        # get all collections in the course, this query should not return any leaf nodes
+        course_id = self.fill_in_run(course_id)
+        nodes, root = self._load_inheritance_nodes(course_id)
+        return MetadataInheritanceTree.from_nodes(self.get_branch_setting(), root, nodes)
+
+    def _update_metadata_inheritance_tree(self, tree, course_id, locations):
+        """
+        Returns tree updated for writes to the given locations, reloading only the containers
+        written to and the containers newly added under them.
+        """
+        nodes = {}
+        deleted = set()
+        urls = set(unicode(as_published(location)) for location in locations)
+        while urls:
+            loaded, __ = self._load_inheritance_nodes(course_id, urls)
+            nodes.update(loaded)
+            deleted.update(urls - set(loaded))
+            # the children containers which weren't in the tree (e.g. just created or moved in) must be loaded too
+            urls = set(
+                child
+                for node in loaded.itervalues()
+                for child in node['children']
+                if child not in tree.tree['nodes'] and child not in nodes and child not in deleted and
+                Location.from_deprecated_string(child).category in BLOCK_TYPES_WITH_CHILDREN
+            )
+        return tree.updated(nodes, deleted)
 
-    def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
+    def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False, updated_locations=None):
         '''
         Compute the metadata inheritance for the course.
+
+        If given the updated_locations of containers written to since it was cached, a cached tree is
+        updated for them (see _update_metadata_inheritance_tree) rather than recomputed.
         '''
-        tree = {}
+        tree = None
 
         course_id = self.fill_in_run(course_id)
         if not force_refresh:
             # see if we are first in the request cache (if present)
             if self.request_cache is not None and unicode(course_id) in self.request_cache.data.get('metadata_inheritance', {}):
-                return self.request_cache.data['metadata_inheritance'][unicode(course_id)]
+                tree = self.request_cache.data['metadata_inheritance'][unicode(course_id)]
 
             # then look in any caching subsystem (e.g. memcached)
-            if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+            elif self.metadata_inheritance_cache_subsystem is not None:
+                cached_tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+                # trees cached in another format are recomputed
+                if cached_tree.get('version') == INHERITANCE_TREE_VERSION:
+                    tree = MetadataInheritanceTree(cached_tree)
+                    # after a memcache hit, put it into the request_cache
+                    if self.request_cache is not None:
+                        self.request_cache.data.setdefault('metadata_inheritance', {})[unicode(course_id)] = tree
             else:
                 logging.warning(
                     'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
                     OK in localdev and testing environment. Not OK in production.'
                 )
 
-        if not tree:
+            if tree is not None and updated_locations:
+                if tree.tree['updates'] < MAX_INHERITANCE_TREE_UPDATES:
+                    updated_from = tree.tree.get('stamp')
+                    tree = self._update_metadata_inheritance_tree(tree, course_id, updated_locations)
+                    if not self._cache_metadata_inheritance_tree(course_id, tree, updated_from=updated_from):
+                        # another process has cached its own update meanwhile, which either tree would lose
+                        tree = None
+                else:
+                    tree = None
+
+        if tree is None:
             # if not in subsystem, or we are on force refresh, then we have to compute
             tree = self._compute_metadata_inheritance_tree(course_id)
+            self._cache_metadata_inheritance_tree(course_id, tree)
+
+        return tree
 
-            # now write out computed tree to caching subsystem (e.g. memcached), if available
-            if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+    def _cache_metadata_inheritance_tree(self, course_id, tree, updated_from=None):
+        """
+        Write out the tree to the caching subsystem (e.g. memcached), if available, and to the request_cache.
+
+        If the tree was updated in place from the cached tree with the stamp updated_from, it's only written
+        out if the cached tree is still that one, and for INHERITANCE_TREE_UPDATE_TIMEOUT: returns whether
+        it was written out.
+        """
+        if self.metadata_inheritance_cache_subsystem is not None:
+            if updated_from is None:
+                self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree.tree)
+            else:
+                cached_tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+                if cached_tree.get('stamp') != updated_from:
+                    return False
+                self.metadata_inheritance_cache_subsystem.set(
+                    unicode(course_id), tree.tree, INHERITANCE_TREE_UPDATE_TIMEOUT
+                )
 
-        # now populate a request_cache, if available. NOTE, we are outside of the
-        # scope of the above if: statement so that after a memcache hit, it'll get
-        # put into the request_cache
         if self.request_cache is not None:
             # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
             # defined
-            if 'metadata_inheritance' not in self.request_cache.data:
-                self.request_cache.data['metadata_inheritance'] = {}
-            self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
-
-        return tree
+            self.request_cache.data.setdefault('metadata_inheritance', {})[unicode(course_id)] = tree
+        return True
 
-    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
+    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None, locations=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
 
+        If given the locations written to, a cached tree is updated for the containers among them
+        rather than recomputed, unless there are more than MAX_INHERITANCE_TREE_UPDATE_SIZE of them
+        (e.g. after an import) or the tree has been updated MAX_INHERITANCE_TREE_UPDATES times already.
+
         If given a runtime, it replaces the cached_metadata in that runtime. NOTE: failure to provide
         a runtime may mean that some objects report old values for inherited data.
         """
         course_id = course_id.for_branch(None)
         if not self._is_in_bulk_operation(course_id):
+            containers = None
+            if locations is not None:
+                # writes to leaves don't change the tree
+                containers = [location for location in locations if location.category in BLOCK_TYPES_WITH_CHILDREN]
             # below is done for side effects when runtime is None
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            cached_metadata = self._get_cached_metadata_inheritance_tree(
+                course_id,
+                force_refresh=containers is None or len(containers) > MAX_INHERITANCE_TREE_UPDATE_SIZE,
+                updated_locations=containers,
+            )
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
@@ -792,18 +1020,66 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         }
         return list(self.collection.find(query))
 
+    @autoretry_read()
+    def _query_course_for_cache_children(self, course_key, include_drafts=False):
+        """
+        Returns {published Location: payload} of all the items in the course, found in one query.
+        If include_drafts, the draft of each item which has one is returned instead of its published
+        version.
+        """
+        query = self._course_key_to_son(course_key)
+        if not include_drafts:
+            query['_id.revision'] = MongoRevisionKey.published
+
+        items = {}
+        for item in self.collection.find(query):
+            location = Location._from_deprecated_son(item['_id'], course_key.run)
+            if location.revision == MongoRevisionKey.draft:
+                items[as_published(location)] = item
+            else:
+                items.setdefault(location, item)
+        return items
+
+    def _cache_course_children(self, course_key, items):
+        """
+        Returns a dictionary mapping Location -> item data for items, which are courses, and all of
+        their descendents, loaded with one query of the whole course.
+        """
+        data = {}
+        course_items = self._query_course_for_cache_children(course_key)
+        parent_cache = self._get_parent_cache(self.get_branch_setting())
+
+        to_process = list(items)
+        while to_process:
+            item = to_process.pop()
+            self._clean_item_data(item)
+            item_location = Location._from_deprecated_son(item['location'], course_key.run)
+            for item_child in item.get('definition', {}).get('children', []):
+                parent_cache.set(item_child, item_location)
+                # each item is only processed once, whichever its parent
+                child_location = as_published(course_key.make_usage_key_from_deprecated_string(item_child))
+                child = course_items.pop(child_location, None)
+                if child is not None:
+                    to_process.append(child)
+            data[item_location] = item
+
+        return data
+
     def _cache_children(self, course_key, items, depth=0):
         """
         Returns a dictionary mapping Location -> item data, populated with json data
         for all descendents of items up to the specified depth.
         (0 = no descendents, 1 = children, 2 = grandchildren, etc)
         If depth is None, will load all the children.
-        This will make a number of queries that is linear in the depth.
+        This will make a number of queries that is linear in the depth, except for loading all
+        the children of courses which makes one.
         """
+        course_key = self.fill_in_run(course_key)
+        if depth is None and items and all(item['_id']['category'] == 'course' for item in items):
+            return self._cache_course_children(course_key, items)
 
         data = {}
         to_process = list(items)
-        course_key = self.fill_in_run(course_key)
         parent_cache = self._get_parent_cache(self.get_branch_setting())
 
         while to_process and depth is None or depth >= 0:
@@ -1269,7 +1545,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         if the location doesn't exist
         """
         bulk_record = self._get_bulk_ops_record(location.course_key)
-        bulk_record.dirty = True
+        bulk_record.mark_dirty(location)
         # See http://www.mongodb.org/display/DOCS/Updating for
         # atomic update syntax
         result = self.collection.update(
@@ -1306,30 +1582,10 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
           therefore propagate subtree edit info up the tree
         """
         try:
-            definition_data = self._serialize_scope(xblock, Scope.content)
             now = datetime.now(UTC)
-            payload = {
-                'definition.data': definition_data,
-                'metadata': self._serialize_scope(xblock, Scope.settings),
-                'edit_info': {
-                    'edited_on': now,
-                    'edited_by': user_id,
-                    'subtree_edited_on': now,
-                    'subtree_edited_by': user_id,
-                }
-            }
-
-            if isPublish:
-                payload['edit_info']['published_date'] = now
-                payload['edit_info']['published_by'] = user_id
-            elif 'published_date' in getattr(xblock, '_edit_info', {}):
-                payload['edit_info']['published_date'] = xblock._edit_info['published_date']
-                payload['edit_info']['published_by'] = xblock._edit_info['published_by']
+            payload = self._get_update_payload(xblock, user_id, now, isPublish=isPublish)
 
             if xblock.has_children:
-                children = self._serialize_scope(xblock, Scope.children)
-                payload.update({'definition.children': children['children']})
-
                 # Remove all old pointers to me, then add my current children back
                 parent_cache = self._get_parent_cache(self.get_branch_setting())
                 parent_cache.delete_by_value(xblock.location)
@@ -1351,7 +1607,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            self.refresh_cached_metadata_inheritance_tree(
+                xblock.scope_ids.usage_id.course_key, xblock.runtime, locations=[xblock.scope_ids.usage_id]
+            )
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
@@ -1361,6 +1619,36 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         return xblock
 
+    def _get_update_payload(self, xblock, user_id, now, isPublish=False):
+        """
+        Returns the fields update_item sets on the persisted version of xblock to reflect its current values.
+
+        now: the time of the update
+        isPublish: whether the update is due to a Publish operation (see update_item)
+        """
+        payload = {
+            'definition.data': self._serialize_scope(xblock, Scope.content),
+            'metadata': self._serialize_scope(xblock, Scope.settings),
+            'edit_info': {
+                'edited_on': now,
+                'edited_by': user_id,
+                'subtree_edited_on': now,
+                'subtree_edited_by': user_id,
+            }
+        }
+
+        if isPublish:
+            payload['edit_info']['published_date'] = now
+            payload['edit_info']['published_by'] = user_id
+        elif 'published_date' in getattr(xblock, '_edit_info', {}):
+            payload['edit_info']['published_date'] = xblock._edit_info['published_date']
+            payload['edit_info']['published_by'] = xblock._edit_info['published_by']
+
+        if xblock.has_children:
+            children = self._serialize_scope(xblock, Scope.children)
+            payload['definition.children'] = children['children']
+        return payload
+
     def _serialize_scope(self, xblock, scope):
         """
         Find all fields of type reference and convert the payload from UsageKeys to deprecated strings
@@ -1404,7 +1692,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 current_loc = ancestor_loc
                 ancestor_loc = self._get_raw_parent_location(as_published(current_loc), revision)
                 if ancestor_loc is None:
-                    bulk_record.dirty = True
+                    bulk_record.mark_dirty(parent_loc)
                     # The parent is an orphan, so remove all the children including
                     # the location whose parent we are looking for from orphan parent
                     self.collection.update(
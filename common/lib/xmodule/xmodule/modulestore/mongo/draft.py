@@ -8,7 +8,9 @@ and otherwise returns i4x://org/course/cat/name).
 
 import pymongo
 import logging
+from datetime import datetime
 
+from pytz import UTC
 from opaque_keys.edx.locations import Location
 from xmodule.exceptions import InvalidVersionError
 from xmodule.modulestore import ModuleStoreEnum
@@ -17,10 +19,12 @@ from xmodule.modulestore.exceptions import (
     ItemNotFoundError, DuplicateItemError, DuplicateCourseError, InvalidBranchSetting
 )
 from xmodule.modulestore.mongo.base import (
-    MongoModuleStore, MongoRevisionKey, as_draft, as_published, SORT_REVISION_FAVOR_DRAFT
+    MongoModuleStore, MongoBulkWriter, MongoRevisionKey, as_draft, as_published, SORT_REVISION_FAVOR_DRAFT
 )
 from xmodule.modulestore.store_utilities import rewrite_nonportable_content_links
-from xmodule.modulestore.draft_and_published import UnsupportedRevisionError, DIRECT_ONLY_CATEGORIES
+from xmodule.modulestore.draft_and_published import (
+    UnsupportedRevisionError, DIRECT_ONLY_CATEGORIES, BlockPublishState, publish_state_key
+)
 
 log = logging.getLogger(__name__)
 
@@ -182,32 +186,42 @@ class DraftModuleStore(MongoModuleStore):
         # clone the assets
         super(DraftModuleStore, self).clone_course(source_course_id, dest_course_id, user_id, fields)
 
-        # get the whole old course
-        new_course = self.get_course(dest_course_id)
-        if new_course is None:
-            # create_course creates the about overview
-            new_course = self.create_course(
-                dest_course_id.org, dest_course_id.course, dest_course_id.run, user_id, fields=fields
-            )
-        else:
-            # update fields on existing course
-            for key, value in fields.iteritems():
-                setattr(new_course, key, value)
-            self.update_item(new_course, user_id)
-
-        # Get all modules under this namespace which is (tag, org, course) tuple
-        modules = self.get_items(source_course_id, revision=ModuleStoreEnum.RevisionOption.published_only)
-        self._clone_modules(modules, dest_course_id, user_id)
+        with self.bulk_operations(dest_course_id):
+            # get the whole old course
+            new_course = self.get_course(dest_course_id)
+            if new_course is None:
+                # create_course creates the about overview
+                new_course = self.create_course(
+                    dest_course_id.org, dest_course_id.course, dest_course_id.run, user_id, fields=fields
+                )
+            else:
+                # update fields on existing course
+                for key, value in fields.iteritems():
+                    setattr(new_course, key, value)
+                self.update_item(new_course, user_id)
+
+            # Get all modules under this namespace which is (tag, org, course) tuple, and write their clones
+            # directly as the published and draft versions in the new course
+            with MongoBulkWriter(self.collection) as bulk_writer:
+                modules = self.get_items(source_course_id, revision=ModuleStoreEnum.RevisionOption.published_only)
+                self._clone_modules(modules, dest_course_id, user_id, bulk_writer, MongoRevisionKey.published)
+
+                modules = self.get_items(source_course_id, revision=ModuleStoreEnum.RevisionOption.draft_only)
+                self._clone_modules(modules, dest_course_id, user_id, bulk_writer, MongoRevisionKey.draft)
+
+        # add the published clone to the courseware search index, as publishing it would
         course_location = dest_course_id.make_usage_key('course', dest_course_id.run)
-        self.publish(course_location, user_id)
-
-        modules = self.get_items(source_course_id, revision=ModuleStoreEnum.RevisionOption.draft_only)
-        self._clone_modules(modules, dest_course_id, user_id)
+        CoursewareSearchIndexer.add_to_search_index(self, course_location)
 
         return True
 
-    def _clone_modules(self, modules, dest_course_id, user_id):
-        """Clones each module into the given course"""
+    def _clone_modules(self, modules, dest_course_id, user_id, bulk_writer, revision):
+        """
+        Queues writing a clone of each module into the given course as its given revision
+        (MongoRevisionKey.published or MongoRevisionKey.draft) with bulk_writer
+        """
+        now = datetime.now(UTC)
+        bulk_record = self._get_bulk_ops_record(dest_course_id)
         for module in modules:
             original_loc = module.location
             module.location = module.location.map_into_course(dest_course_id)
@@ -230,7 +244,13 @@ class DraftModuleStore(MongoModuleStore):
 
                 module.children = new_children
 
-            self.update_item(module, user_id, allow_not_found=True)
+            # the clones of published draftable modules are published now, direct only ones keep their publish info
+            is_publish = (
+                revision == MongoRevisionKey.published and module.location.category not in DIRECT_ONLY_CATEGORIES
+            )
+            location = module.location.replace(revision=revision)
+            bulk_writer.upsert(location, self._get_update_payload(module, user_id, now, isPublish=is_publish))
+            bulk_record.mark_dirty(location)
 
     def _get_raw_parent_locations(self, location, key_revision):
         """
@@ -419,7 +439,7 @@ class DraftModuleStore(MongoModuleStore):
             # ensure keys are in fixed and right order before inserting
             item['_id'] = self._id_dict_to_son(item['_id'])
             bulk_record = self._get_bulk_ops_record(location.course_key)
-            bulk_record.dirty = True
+            bulk_record.mark_dirty(location)
             try:
                 self.collection.insert(item)
             except pymongo.errors.DuplicateKeyError:
@@ -584,7 +604,7 @@ class DraftModuleStore(MongoModuleStore):
         first_tier = [as_func(location) for as_func in as_functions]
         self._breadth_first(_delete_item, first_tier)
         # recompute (and update) the metadata inheritance tree which is cached
-        self.refresh_cached_metadata_inheritance_tree(location.course_key)
+        self.refresh_cached_metadata_inheritance_tree(location.course_key, locations=[location])
 
     def _breadth_first(self, function, root_usages):
         """
@@ -614,7 +634,8 @@ class DraftModuleStore(MongoModuleStore):
         _internal([root_usage.to_deprecated_son() for root_usage in root_usages])
         if len(to_be_deleted) > 0:
             bulk_record = self._get_bulk_ops_record(root_usages[0].course_key)
-            bulk_record.dirty = True
+            for root_usage in root_usages:
+                bulk_record.mark_dirty(root_usage)
             self.collection.remove({'_id': {'$in': to_be_deleted}}, safe=self.collection.safe)
 
     @MongoModuleStore.memoize_request_cache
@@ -638,6 +659,53 @@ class DraftModuleStore(MongoModuleStore):
         else:
             return False
 
+    def get_subtree_publish_states(self, xblock):
+        """
+        See superclass doc. Works out whether each block has changes in one walk of the subtree,
+        and which of its drafts have been published with one query. The has_changes request cache
+        is filled in for the blocks of the subtree as well.
+        """
+        changes = {}
+        drafts = set()
+
+        def _compute_changes(block):
+            """
+            Adds whether block and its descendants have changes, and returns whether block has.
+            """
+            has_changes = False
+            if getattr(block, 'is_draft', False):
+                has_changes = True
+                drafts.add(block.location)
+            if block.has_children:
+                children = block.get_children()
+                # fix a bug where dangling pointers should imply a change
+                if len(block.children) > len(children):
+                    has_changes = True
+                # visit all of the children (unlike has_changes) so that each has its state
+                for child in children:
+                    has_changes = _compute_changes(child) or has_changes
+            changes[block.location] = has_changes
+            return has_changes
+
+        _compute_changes(xblock)
+
+        published = set()
+        if drafts:
+            query = {'_id': {'$in': [as_published(location).to_deprecated_son() for location in drafts]}}
+            for item in self.collection.find(query, {'_id': True}):
+                published.add((item['_id']['category'], item['_id']['name']))
+
+        states = {}
+        for location, has_changes in changes.iteritems():
+            key = publish_state_key(location)
+            states[key] = BlockPublishState(has_changes, location not in drafts or key in published)
+        if self.request_cache is not None:
+            # as memoized by has_changes
+            self.request_cache.data.setdefault('has_changes', {}).update(
+                (unicode(location), has_changes) for location, has_changes in changes.iteritems()
+            )
+        return states
+
     def publish(self, location, user_id, **kwargs):
         """
         Publish the subtree rooted at location to the live course and remove the drafts.
@@ -705,20 +773,33 @@ class DraftModuleStore(MongoModuleStore):
 
             # update the published (not draft) item (ignoring that item is "draft"). The published
             # may not exist; (if original_published is None); so, allow_not_found
-            super(DraftModuleStore, self).update_item(
-                item, user_id, isPublish=True, is_publish_root=is_root, allow_not_found=True
-            )
-            to_be_deleted.append(as_draft(item_location).to_deprecated_son())
+            if is_root:
+                super(DraftModuleStore, self).update_item(
+                    item, user_id, isPublish=True, is_publish_root=True, allow_not_found=True
+                )
+            else:
+                # the descendants of the root don't update their ancestors' edit info, so just queue their upserts
+                bulk_writer.upsert(item_location, self._get_update_payload(item, user_id, now, isPublish=True))
+                bulk_record.mark_dirty(item_location)
+            to_be_deleted.append(as_draft(item_location))
 
         # verify input conditions
         self._verify_branch_setting(ModuleStoreEnum.Branch.draft_preferred)
         _verify_revision_is_published(location)
 
-        _internal_depth_first(location, True)
-        if len(to_be_deleted) > 0:
+        now = datetime.now(UTC)
+        # refresh the inheritance tree once for the whole subtree
+        with self.bulk_operations(location.course_key):
             bulk_record = self._get_bulk_ops_record(location.course_key)
-            bulk_record.dirty = True
-            self.collection.remove({'_id': {'$in': to_be_deleted}})
+            with MongoBulkWriter(self.collection) as bulk_writer:
+                _internal_depth_first(location, True)
+
+            # only remove the drafts once all of their published versions are written
+            if len(to_be_deleted) > 0:
+                bulk_record.mark_dirty(location)
+                with MongoBulkWriter(self.collection) as draft_remover:
+                    for draft_location in to_be_deleted:
+                        draft_remover.remove(draft_location)
 
         # Now it's been published, add the object to the courseware search index so that it appears in search results
         CoursewareSearchIndexer.add_to_search_index(self, location)
@@ -780,6 +861,17 @@ class DraftModuleStore(MongoModuleStore):
 
         delete_draft_only(location)
 
+    def _query_course_for_cache_children(self, course_key, include_drafts=None):
+        """
+        See superclass doc. Returns the drafts of the items which have one if the branch setting
+        is draft preferred, unless include_drafts says otherwise.
+        """
+        if include_drafts is None:
+            include_drafts = self.get_branch_setting() == ModuleStoreEnum.Branch.draft_preferred
+        return super(DraftModuleStore, self)._query_course_for_cache_children(
+            course_key, include_drafts=include_drafts
+        )
+
     def _query_children_for_cache_children(self, course_key, items):
         # first get non-draft in a round-trip
         to_process_non_drafts = super(DraftModuleStore, self)._query_children_for_cache_children(course_key, items)
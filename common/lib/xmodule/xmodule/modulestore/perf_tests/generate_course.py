@@ -0,0 +1,88 @@
+"""
+Generates synthetic courses of a configurable shape in a modulestore, for performance testing.
+"""
+from collections import namedtuple
+
+
+# Categories of the containers at each level below the course: any deeper levels nest verticals.
+CONTAINER_CATEGORIES = ('chapter', 'sequential', 'vertical')
+
+# Category of the leaves created in each unit (the containers of the deepest level).
+COMPONENT_CATEGORY = 'html'
+
+# Formats given in turn to the sequentials, so there are settings to query the course by.
+SEQUENTIAL_FORMATS = ('Homework', 'Lab', 'Exam')
+
+
+class CourseShape(namedtuple('CourseShape', ['breadth', 'depth', 'components_per_unit'])):
+    """
+    The shape of a synthetic course: `breadth` children under the course and under each container,
+    `depth` levels of containers, and `components_per_unit` components in each container of the deepest level.
+    """
+    @property
+    def num_units(self):
+        """
+        Number of containers of the deepest level.
+        """
+        return self.breadth ** self.depth
+
+    @property
+    def num_blocks(self):
+        """
+        Number of blocks in the course, including the course block.
+        """
+        containers = sum(self.breadth ** level for level in range(1, self.depth + 1))
+        return 1 + containers + self.num_units * self.components_per_unit
+
+    def __str__(self):
+        return "b{}-d{}-c{}".format(self.breadth, self.depth, self.components_per_unit)
+
+
+def container_category(level):
+    """
+    Returns the category of the containers `level` levels below the course (starting at 1).
+    """
+    return CONTAINER_CATEGORIES[min(level, len(CONTAINER_CATEGORIES)) - 1]
+
+
+def make_course(store, user_id, org, course, run, shape):
+    """
+    Creates a course of the given CourseShape in store, and publishes it.
+
+    Returns the course's key and the usage keys of its units (the containers of the deepest level),
+    in the order of a depth first traversal.
+    """
+    course_key = store.make_course_key(org, course, run)
+    with store.bulk_operations(course_key):
+        course_block = store.create_course(org, course, run, user_id)
+        course_key = course_block.id
+        units = []
+
+        def add_children(parent_location, level):
+            """
+            Creates the containers of the given level under parent_location, and their subtrees.
+            """
+            category = container_category(level)
+            for index in range(shape.breadth):
+                block_id = '{}_{}'.format(parent_location.block_id, index)
+                fields = {'display_name': '{} {}'.format(category, block_id)}
+                if category == 'sequential':
+                    fields['format'] = SEQUENTIAL_FORMATS[index % len(SEQUENTIAL_FORMATS)]
+                    fields['graded'] = True
+                container = store.create_child(user_id, parent_location, category, block_id=block_id, fields=fields)
+                if level < shape.depth:
+                    add_children(container.location, level + 1)
+                else:
+                    units.append(container.location)
+                    for component_index in range(shape.components_per_unit):
+                        component_id = '{}_{}'.format(block_id, component_index)
+                        store.create_child(
+                            user_id, container.location, COMPONENT_CATEGORY, block_id=component_id, fields={
+                                'display_name': '{} {}'.format(COMPONENT_CATEGORY, component_id),
+                                'data': '<p>Component {}</p>'.format(component_id),
+                            }
+                        )
+
+        add_children(course_block.location, 1)
+        store.publish(course_block.location, user_id)
+    return course_key, units
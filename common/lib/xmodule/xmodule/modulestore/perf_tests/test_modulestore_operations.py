@@ -0,0 +1,188 @@
+"""
+Performance test of the common read and write operations of the draft mongo and split modulestores,
+on synthetic courses of different shapes.
+"""
+import itertools
+import json
+import time
+import unittest
+from contextlib import contextmanager
+from shutil import rmtree
+from tempfile import mkdtemp
+
+import ddt
+import pymongo
+from mock import Mock, patch
+
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.perf_tests.generate_course import CourseShape, SEQUENTIAL_FORMATS, make_course
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import (
+    MIXED_MODULESTORE_SETUPS,
+    MIXED_MS_SETUPS_SHORT,
+    MongoContentstoreBuilder,
+)
+from xmodule.modulestore.xml_exporter import export_to_xml
+from xmodule.modulestore.xml_importer import import_from_xml
+
+# Shapes of the courses generated per test run.
+COURSE_SHAPES = (
+    CourseShape(breadth=2, depth=3, components_per_unit=2),
+    CourseShape(breadth=4, depth=3, components_per_unit=5),
+    CourseShape(breadth=8, depth=3, components_per_unit=10),
+    CourseShape(breadth=3, depth=5, components_per_unit=5),
+)
+
+# Depths at which the course is loaded by get_course.
+GET_COURSE_DEPTHS = (0, 1, 2, None)
+
+# Number of times each edit is timed per test run.
+EDITS_PER_TEST = 10
+
+# File the results are written to, as a JSON list of one object per timed operation.
+REPORT_FILE = 'modulestore_operations.json'
+
+# pymongo.message functions building the messages sent for queries and for writes.
+QUERY_MESSAGES = ('query', 'get_more')
+WRITE_MESSAGES = ('insert', 'update', 'delete', '_do_batched_write_command', '_do_batched_insert')
+
+SHORT_NAME_MAP = dict(zip(MIXED_MODULESTORE_SETUPS, MIXED_MS_SETUPS_SHORT))
+
+USER_ID = ModuleStoreEnum.UserID.test
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class ModulestoreOperations(unittest.TestCase):
+    """
+    Times get_course, get_item, get_items, get_parent_location, update_item, publish and XML
+    export/import on generated courses, counting the mongo queries and writes each of them makes.
+    The results are written to REPORT_FILE so that they can be compared release over release.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    results = []
+
+    @classmethod
+    def tearDownClass(cls):
+        with open(REPORT_FILE, 'w') as report:
+            json.dump(cls.results, report, indent=2, sort_keys=True)
+        super(ModulestoreOperations, cls).tearDownClass()
+
+    @contextmanager
+    def timed(self, operation, repetitions=1, **params):
+        """
+        Times the operation(s) run in the with block, counting their mongo messages, and records the result.
+        """
+        mocks = {
+            name: Mock(wraps=getattr(pymongo.message, name))
+            for name in QUERY_MESSAGES + WRITE_MESSAGES
+            if hasattr(pymongo.message, name)
+        }
+        with patch.multiple(pymongo.message, **mocks):
+            start = time.time()
+            yield
+            wall_time = time.time() - start
+        self.results.append({
+            'store': self.store_name,
+            'course_shape': str(self.shape),
+            'course_blocks': self.shape.num_blocks,
+            'operation': operation,
+            'params': {key: unicode(value) for key, value in params.iteritems()},
+            'repetitions': repetitions,
+            'wall_time': wall_time,
+            'mongo_queries': sum(mocks[name].call_count for name in QUERY_MESSAGES if name in mocks),
+            'mongo_writes': sum(mocks[name].call_count for name in WRITE_MESSAGES if name in mocks),
+        })
+
+    @ddt.data(*itertools.product(MIXED_MODULESTORE_SETUPS, COURSE_SHAPES))
+    @ddt.unpack
+    def test_operations(self, store_builder, shape):
+        self.store_name = SHORT_NAME_MAP[store_builder]
+        self.shape = shape
+        with MongoContentstoreBuilder().build() as contentstore:
+            with store_builder.build(contentstore) as store:
+                with self.timed('make_course'):
+                    course_key, units = make_course(store, USER_ID, 'perf', 'course', str(shape), shape)
+
+                self._time_reads(store, course_key, units)
+                self._time_writes(store, course_key, units)
+                self._time_xml_round_trip(store, contentstore, course_key)
+
+    def _time_reads(self, store, course_key, units):
+        """
+        Times the read operations on the published branch of the course.
+        """
+        unit = units[len(units) / 2]
+        with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+            for depth in GET_COURSE_DEPTHS:
+                with self.timed('get_course', depth=depth):
+                    course = store.get_course(course_key, depth=depth)
+                    if depth is None:
+                        # load the whole tree, as rendering the courseware would
+                        blocks = [course]
+                        while blocks:
+                            blocks.extend(blocks.pop().get_children())
+
+            for depth in (0, None):
+                with self.timed('get_item', depth=depth):
+                    store.get_item(unit, depth=depth)
+
+            qualifiers = (
+                {'qualifiers': {'category': 'vertical'}},
+                {'settings': {'format': SEQUENTIAL_FORMATS[0]}},
+                {'qualifiers': {'name': unit.block_id}},
+            )
+            for kwargs in qualifiers:
+                with self.timed('get_items', **kwargs):
+                    store.get_items(course_key, **kwargs)
+
+            components = store.get_item(unit).children
+            with self.timed('get_parent_location', repetitions=len(components)):
+                for component in components:
+                    store.get_parent_location(component)
+
+    def _time_writes(self, store, course_key, units):
+        """
+        Times edits and publishes on the draft branch of the course.
+        """
+        with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, course_key):
+            component = store.get_item(store.get_item(units[0]).children[0])
+            with self.timed('update_item', repetitions=EDITS_PER_TEST):
+                for edit in range(EDITS_PER_TEST):
+                    component.display_name = 'edit {}'.format(edit)
+                    component = store.update_item(component, USER_ID)
+
+            for location in (units[0], store.get_course(course_key).location):
+                # make a change in the unit so that there is something to publish
+                component = store.get_item(store.get_item(units[0]).children[0])
+                component.display_name = 'publish {}'.format(location.block_type)
+                store.update_item(component, USER_ID)
+                with self.timed('publish', block_type=location.block_type):
+                    store.publish(location, USER_ID)
+
+    def _time_xml_round_trip(self, store, contentstore, course_key):
+        """
+        Times exporting the course to XML and importing it back as a new course.
+        """
+        root_dir = mkdtemp()
+        self.addCleanup(rmtree, root_dir, ignore_errors=True)
+        with self.timed('export_to_xml'):
+            export_to_xml(store, contentstore, course_key, root_dir, 'exported_course')
+
+        imported_course_key = store.make_course_key('perf', 'imported', course_key.run)
+        with self.timed('import_from_xml'):
+            import_from_xml(
+                store,
+                USER_ID,
+                root_dir,
+                course_dirs=['exported_course'],
+                static_content_store=contentstore,
+                target_course_id=imported_course_key,
+                create_course_if_not_present=True,
+                raise_on_failure=True,
+            )
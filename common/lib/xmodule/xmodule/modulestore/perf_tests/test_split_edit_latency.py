@@ -0,0 +1,131 @@
+"""
+Performance test for editing single blocks of courses of different sizes in the split modulestore.
+"""
+import copy
+import time
+import unittest
+
+import ddt
+from bson.objectid import ObjectId
+from mock import MagicMock, Mock
+
+from xmodule.modulestore import BlockData, ModuleStoreEnum
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, structure_to_mongo
+from xmodule.modulestore.split_mongo.split import SplitBulkWriteMixin
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import (
+    MongoContentstoreBuilder,
+    VersioningModulestoreBuilder,
+)
+from opaque_keys.edx.locator import CourseLocator
+
+# Numbers of blocks in the course structures edited per test run.
+COURSE_SIZES = (100, 1000, 10000, 50000)
+
+# Numbers of blocks in the courses built in a real split modulestore per test run.
+STORED_COURSE_SIZES = (100, 1000, 5000)
+
+# Number of edits timed per test run.
+EDITS_PER_TEST = 20
+
+
+def make_structure(size):
+    """
+    Returns a structure with a course block and `size` html blocks under it.
+    """
+    root = BlockKey('course', 'course')
+    html_keys = [BlockKey('html', 'html{}'.format(index)) for index in xrange(size)]
+    blocks = {
+        block_key: BlockData(
+            block_type=block_key.type,
+            definition=ObjectId(),
+            fields={'display_name': block_key.id},
+            edit_info={'update_version': ObjectId(), 'edited_by': 'test_user'},
+        )
+        for block_key in html_keys
+    }
+    blocks[root] = BlockData(block_type='course', definition=ObjectId(), fields={'children': html_keys})
+    return {'_id': ObjectId(), 'root': root, 'blocks': blocks, 'schema_version': 1}
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class SplitEditLatency(unittest.TestCase):
+    """
+    Times the versioning of a structure to edit one of its blocks, as done by each edit made outside
+    of a bulk operation, against the deep copy of the whole structure it replaces.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def setUp(self):
+        super(SplitEditLatency, self).setUp()
+        self.bulk = SplitBulkWriteMixin()
+        self.bulk.SCHEMA_VERSION = 1
+        self.bulk._clear_cache = Mock(name='_clear_cache')  # pylint: disable=protected-access
+        self.bulk.db_connection = MagicMock(name='db_connection', spec=MongoConnection)
+        self.course_key = CourseLocator('org', 'course', 'run', branch='draft')
+
+    @ddt.data(*COURSE_SIZES)
+    def test_single_block_edit(self, size):
+        structure = make_structure(size)
+        block_key = BlockKey('html', 'html{}'.format(size / 2))
+
+        def copy_on_write_edit():
+            """
+            Version the structure and edit one block, as split does.
+            """
+            new_structure = self.bulk.version_structure(self.course_key, structure, 'test_user')
+            new_structure['blocks'][block_key].fields['display_name'] = 'edited'
+            structure_to_mongo(new_structure)
+
+        def deep_copy_edit():
+            """
+            Copy the whole structure and edit one block, as split used to do.
+            """
+            new_structure = copy.deepcopy(structure)
+            new_structure['blocks'][block_key].fields['display_name'] = 'edited'
+            structure_to_mongo(new_structure)
+
+        for name, edit in (('copy-on-write', copy_on_write_edit), ('deepcopy', deep_copy_edit)):
+            start = time.time()
+            for __ in xrange(EDITS_PER_TEST):
+                edit()
+            print "{size} blocks, {name}: {latency:.2f} ms/edit".format(
+                size=size, name=name, latency=(time.time() - start) * 1000 / EDITS_PER_TEST
+            )
+
+
+@ddt.ddt
+# @attr("perf_test")
+@unittest.skip
+class SplitStoredEditLatency(unittest.TestCase):
+    """
+    Times update_item on one block of courses of different sizes in a split modulestore.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*STORED_COURSE_SIZES)
+    def test_update_item(self, size):
+        with MongoContentstoreBuilder().build() as contentstore:
+            with VersioningModulestoreBuilder().build(contentstore) as store:
+                course = store.create_course('org', 'course', 'run{}'.format(size), 'test_user')
+                with store.bulk_operations(course.id):
+                    for index in xrange(size):
+                        store.create_child('test_user', course.location, 'html', 'html{}'.format(index))
+
+                with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, course.id):
+                    block = store.get_item(course.id.make_usage_key('html', 'html{}'.format(size / 2)))
+                    start = time.time()
+                    for edit in xrange(EDITS_PER_TEST):
+                        block.display_name = 'edit {}'.format(edit)
+                        block = store.update_item(block, 'test_user')
+                    print "{size} blocks: {latency:.2f} ms/update_item".format(
+                        size=size, latency=(time.time() - start) * 1000 / EDITS_PER_TEST
+                    )
@@ -2,6 +2,7 @@
 General utilities
 """
 
+import copy
 from collections import namedtuple
 from contracts import contract, check
 from opaque_keys.edx.locator import BlockUsageLocator
@@ -21,3 +22,107 @@ class BlockKey(namedtuple('BlockKey', 'type id')):
 
 
 CourseEnvelope = namedtuple('CourseEnvelope', 'course_key structure')
+
+
+class CopyOnWriteBlocks(dict):
+    """
+    The {BlockKey: BlockData} map of a new version of a structure, which shares the BlockData of
+    the version it's made from instead of copying them all up front.
+
+    BlockData are edited in place by whoever gets them from the map, so a shared BlockData is
+    copied (and the copy put in its place) the first time it's got from this map by any means
+    (indexing, get, values, items, ...). Blocks which are never got are never copied, which makes
+    versioning a structure to edit a few of its blocks cheap however big the structure is.
+
+    Code which only reads all of the blocks (such as serializing the structure) can avoid copying
+    them by iterating with the plain dict methods, e.g. `dict.iteritems(blocks)`.
+    """
+    def __init__(self, blocks):
+        super(CopyOnWriteBlocks, self).__init__(blocks)
+        if isinstance(blocks, CopyOnWriteBlocks):
+            # the blocks that map owns are now shared with this one too
+            blocks.share_all()
+        self._shared = set(self.iterkeys())
+
+    def share_all(self):
+        """
+        Mark all of the blocks as shared with another map, so they're copied before being got.
+        """
+        self._shared = set(self.iterkeys())
+
+    def _own(self, block_key):
+        """
+        Returns the block at block_key, copying it first if it's shared.
+        """
+        block = dict.__getitem__(self, block_key)
+        if block_key in self._shared:
+            block = copy.deepcopy(block)
+            dict.__setitem__(self, block_key, block)
+            self._shared.discard(block_key)
+        return block
+
+    def __getitem__(self, block_key):
+        return self._own(block_key)
+
+    def __setitem__(self, block_key, block):
+        dict.__setitem__(self, block_key, block)
+        self._shared.discard(block_key)
+
+    def __delitem__(self, block_key):
+        dict.__delitem__(self, block_key)
+        self._shared.discard(block_key)
+
+    def get(self, block_key, default=None):
+        if block_key in self:
+            return self._own(block_key)
+        return default
+
+    def setdefault(self, block_key, default=None):
+        if block_key not in self:
+            self[block_key] = default
+        return self._own(block_key)
+
+    def pop(self, block_key, *default):
+        if block_key in self:
+            block = self._own(block_key)
+            del self[block_key]
+            return block
+        return dict.pop(self, block_key, *default)
+
+    def popitem(self):
+        block_key = next(self.iterkeys())
+        return block_key, self.pop(block_key)
+
+    def update(self, *args, **kwargs):
+        for block_key, block in dict(*args, **kwargs).iteritems():
+            self[block_key] = block
+
+    def clear(self):
+        dict.clear(self)
+        self._shared.clear()
+
+    def itervalues(self):
+        for block_key in self.keys():
+            yield self._own(block_key)
+
+    def iteritems(self):
+        for block_key in self.keys():
+            yield block_key, self._own(block_key)
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
+
+    def copy(self):
+        return CopyOnWriteBlocks(self)
+
+    def __deepcopy__(self, memo):
+        return {
+            copy.deepcopy(block_key, memo): copy.deepcopy(block, memo)
+            for block_key, block in dict.iteritems(self)
+        }
+
+    def __reduce__(self):
+        return (dict, (dict(dict.iteritems(self)),))
@@ -79,13 +79,9 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self._services['library_tools'] = LibraryToolsService(modulestore)
 
     @lazy
-    @contract(returns="dict(BlockKey: BlockKey)")
+    @contract(returns="dict(BlockKey: list(BlockKey))")
     def _parent_map(self):
-        parent_map = {}
-        for block_key, block in self.course_entry.structure['blocks'].iteritems():
-            for child in block.fields.get('children', []):
-                parent_map[child] = block_key
-        return parent_map
+        return self.modulestore.get_structure_index(self.course_entry.structure).parents
 
     @contract(usage_key="BlockUsageLocator | BlockKey", course_entry_override="CourseEnvelope | None")
     def _load_item(self, usage_key, course_entry_override=None, **kwargs):
@@ -121,11 +117,21 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         if cached_module:
             return cached_module
 
+        # decorated fields make the descriptor specific to its caller
+        shareable = kwargs.get('field_decorator') is None
+        structure_id = self.course_entry.structure['_id']
+        if shareable:
+            cached_module = self.modulestore.get_published_descriptor(course_key, structure_id, block_key)
+            if cached_module is not None:
+                return cached_module
+
         block_data = self.get_module_data(block_key, course_key)
 
         class_ = self.load_block_type(block_data.block_type)
         block = self.xblock_from_json(class_, course_key, block_key, block_data, course_entry_override, **kwargs)
         self.modulestore.cache_block(course_key, version_guid, block_key, block)
+        if shareable:
+            self.modulestore.cache_published_descriptor(course_key, structure_id, block_key, block)
         return block
 
     @contract(block_key=BlockKey, course_key="CourseLocator | LibraryLocator")
@@ -202,7 +208,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         converted_fields = convert_fields(block_data.fields)
         converted_defaults = convert_fields(block_data.defaults)
         if block_key in self._parent_map:
-            parent_key = self._parent_map[block_key]
+            parent_key = self._parent_map[block_key][0]
             parent = course_key.make_usage_key(parent_key.type, parent_key.id)
         else:
             parent = None
@@ -0,0 +1,81 @@
+"""
+A process level cache of the descriptors of published course versions, shared across requests.
+"""
+import threading
+from collections import OrderedDict
+
+import dogstats_wrapper as dog_stats_api
+
+METRIC_NAME = 'xmodule.modulestore.published_descriptor_cache'
+
+
+class PublishedDescriptorCache(object):
+    """
+    A least recently used cache of at most max_size descriptors of published course versions.
+
+    The blocks of a structure version never change, so their descriptors can outlive the request
+    which loaded them; each request binds them to its student (see XModuleMixin.bind_for_student)
+    after unbinding them from the previous one. A descriptor must not be bound for two requests at
+    once, so each thread has its own cache: in a single threaded worker, that's the whole process.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._local = threading.local()
+
+    @property
+    def _blocks(self):
+        """
+        This thread's OrderedDict of {key: descriptor}, from the least to the most recently used.
+        """
+        blocks = getattr(self._local, 'blocks', None)
+        if blocks is None:
+            blocks = self._local.blocks = OrderedDict()
+            self._local.counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+        return blocks
+
+    def get(self, key):
+        """
+        Returns the descriptor cached under key, or None.
+        """
+        blocks = self._blocks
+        block = blocks.pop(key, None)
+        if block is None:
+            self._count('misses')
+        else:
+            # move it to the most recently used end
+            blocks[key] = block
+            self._count('hits')
+        return block
+
+    def set(self, key, block):
+        """
+        Caches block under key, evicting the least recently used descriptors beyond max_size.
+        """
+        blocks = self._blocks
+        blocks.pop(key, None)
+        blocks[key] = block
+        while len(blocks) > self.max_size:
+            blocks.popitem(last=False)
+            self._count('evictions')
+        dog_stats_api.histogram(METRIC_NAME + '.size', len(blocks))
+
+    def _count(self, counter):
+        """
+        Increments this thread's counter, and the metric tagged with it.
+        """
+        self._local.counters[counter] += 1
+        dog_stats_api.increment(METRIC_NAME, tags=[u'result:{}'.format(counter)])
+
+    def clear(self):
+        """
+        Empties this thread's cache.
+        """
+        self._blocks.clear()
+
+    def stats(self):
+        """
+        Returns the size, maximum size, hits, misses and evictions of this thread's cache, to measure
+        its memory use and effectiveness. The counters are also sent as the METRIC_NAME metric.
+        """
+        size = len(self._blocks)
+        return dict(self._local.counters, size=size, max_size=self.max_size)
@@ -1,7 +1,10 @@
 """
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
+import copy
 import re
+import threading
+from collections import defaultdict, OrderedDict
 from mongodb_proxy import autoretry_read, MongoProxy
 import pymongo
 
@@ -18,6 +21,12 @@ import pytz
 
 new_contract('BlockData', BlockData)
 
+# Number of resolved snapshots kept by each connection to diff and rebuild delta encoded structures
+SNAPSHOT_CACHE_SIZE = 16
+
+# The keys of a delta encoded structure document which aren't part of the structure itself
+DELTA_KEYS = ('snapshot_version', 'delta_depth', 'delta')
+
 
 def structure_from_mongo(structure):
     """
@@ -52,16 +61,18 @@ def structure_to_mongo(structure):
     Doesn't convert 'root', since namedtuple's can be inserted
         directly into mongo.
     """
+    # the blocks are only read, so iterate through them with the plain dict methods: this keeps
+    # the blocks of a CopyOnWriteBlocks from being copied
     check('BlockKey', structure['root'])
-    check('dict(BlockKey: BlockData)', structure['blocks'])
-    for block in structure['blocks'].itervalues():
+    check('dict(BlockKey: BlockData)', dict(dict.iteritems(structure['blocks'])))
+    for block in dict.itervalues(structure['blocks']):
         if 'children' in block.fields:
             check('list(BlockKey)', block.fields['children'])
 
     new_structure = dict(structure)
     new_structure['blocks'] = []
 
-    for block_key, block in structure['blocks'].iteritems():
+    for block_key, block in dict.iteritems(structure['blocks']):
         new_block = dict(block.to_storable())
         new_block.setdefault('block_type', block_key.type)
         new_block['block_id'] = block_key.id
@@ -70,17 +81,85 @@ def structure_to_mongo(structure):
     return new_structure
 
 
+def _storable_key(block):
+    """
+    Returns the (block_type, block_id) key of the mongo form of a block.
+    """
+    return block['block_type'], block['block_id']
+
+
+def _as_stored(value):
+    """
+    Returns value as it reads back from mongo, i.e. with its tuples (such as BlockKeys) turned into lists.
+    """
+    if isinstance(value, (list, tuple)):
+        return [_as_stored(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _as_stored(item) for key, item in value.iteritems()}
+    return value
+
+
+def make_structure_delta(snapshot, structure):
+    """
+    Returns the delta which turns the mongo form of the snapshot structure into the mongo form of
+    structure: {'blocks': [the added or changed blocks], 'deleted': [[block_type, block_id]]}.
+
+    Blocks are compared as they read back from mongo, so the snapshot must have been read from mongo.
+    """
+    snapshot_blocks = {_storable_key(block): block for block in snapshot['blocks']}
+    changed = []
+    for block in structure['blocks']:
+        block = _as_stored(block)
+        if snapshot_blocks.pop(_storable_key(block), None) != block:
+            changed.append(block)
+    return {
+        'blocks': changed,
+        'deleted': [list(block_key) for block_key in snapshot_blocks],
+    }
+
+
+def apply_structure_delta(snapshot, structure):
+    """
+    Returns the mongo form of the delta encoded structure document, rebuilt from the mongo form of
+    its snapshot. The snapshot is left untouched.
+    """
+    delta = structure['delta']
+    blocks = OrderedDict((_storable_key(block), block) for block in snapshot['blocks'])
+    for block_key in delta['deleted']:
+        blocks.pop(tuple(block_key), None)
+    for block in delta['blocks']:
+        blocks[_storable_key(block)] = block
+    changed_keys = set(_storable_key(block) for block in delta['blocks'])
+
+    full_structure = {key: value for key, value in structure.iteritems() if key not in DELTA_KEYS}
+    # structure_from_mongo converts the blocks in place: copy the ones which belong to the snapshot
+    full_structure['blocks'] = [
+        block if block_key in changed_keys else copy.deepcopy(block)
+        for block_key, block in blocks.iteritems()
+    ]
+    return full_structure
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_snapshot_interval=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        If structure_snapshot_interval is set, each new structure is stored as a delta against the
+        last full snapshot of its history, and a new full snapshot is stored every
+        structure_snapshot_interval versions. Otherwise, every structure is stored in full.
         """
+        self.structure_snapshot_interval = structure_snapshot_interval
+        self._snapshots = OrderedDict()
+        # the connection is shared by the threads of the process, and reordering the OrderedDict isn't atomic
+        self._snapshots_lock = threading.Lock()
+
         self.database = MongoProxy(
             pymongo.database.Database(
                 pymongo.MongoClient(
@@ -122,7 +201,7 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        return structure_from_mongo(self._resolve(self.structures.find_one({'_id': key})))
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
@@ -132,7 +211,10 @@ class MongoConnection(object):
         Arguments:
             ids (list): A list of structure ids
         """
-        return [structure_from_mongo(structure) for structure in self.structures.find({'_id': {'$in': ids}})]
+        return [
+            structure_from_mongo(self._resolve(structure))
+            for structure in self.structures.find({'_id': {'$in': ids}})
+        ]
 
     @autoretry_read()
     def find_structures_derived_from(self, ids):
@@ -142,7 +224,10 @@ class MongoConnection(object):
         Arguments:
             ids (list): A list of structure ids
         """
-        return [structure_from_mongo(structure) for structure in self.structures.find({'previous_version': {'$in': ids}})]
+        return [
+            structure_from_mongo(self._resolve(structure))
+            for structure in self.structures.find({'previous_version': {'$in': ids}})
+        ]
 
     @autoretry_read()
     def find_ancestor_structures(self, original_version, block_key):
@@ -153,27 +238,147 @@ class MongoConnection(object):
             original_version (str or ObjectID): The id of a structure
             block_key (BlockKey): The id of the block in question
         """
-        return [
-            structure_from_mongo(structure)
-            for structure in self.structures.find({
-                'original_version': original_version,
-                'blocks': {
-                    '$elemMatch': {
-                        'block_id': block_key.id,
-                        'block_type': block_key.type,
-                        'edit_info.update_version': {
-                            '$exists': True,
-                        },
-                    },
+        block_match = {
+            '$elemMatch': {
+                'block_id': block_key.id,
+                'block_type': block_key.type,
+                'edit_info.update_version': {
+                    '$exists': True,
                 },
-            })
+            },
+        }
+        snapshots = list(self.structures.find({
+            'original_version': original_version,
+            'blocks': block_match,
+        }))
+        # the delta encoded structures which either changed the block or kept it from their snapshot
+        deltas = self.structures.find({
+            'original_version': original_version,
+            '$or': [
+                {'delta.blocks': block_match},
+                {
+                    'snapshot_version': {'$in': [snapshot['_id'] for snapshot in snapshots]},
+                    'delta.deleted': {'$ne': [block_key.type, block_key.id]},
+                },
+            ],
+        })
+        return [structure_from_mongo(structure) for structure in snapshots] + [
+            structure_from_mongo(self._resolve(structure)) for structure in deltas
         ]
 
     def insert_structure(self, structure):
         """
         Insert a new structure into the database.
         """
-        self.structures.insert(structure_to_mongo(structure))
+        structure = structure_to_mongo(structure)
+        if self.structure_snapshot_interval is not None:
+            snapshot_id, depth = self._snapshot_of(structure.get('previous_version'))
+            structure = self._delta_encode(structure, snapshot_id, depth + 1, self.structure_snapshot_interval)
+        self.structures.insert(structure)
+
+    def compact_structures(self, original_version, snapshot_interval):
+        """
+        Rewrite the full structures in the history of original_version as deltas, keeping a full
+        snapshot every snapshot_interval versions along each line of history.
+
+        Returns the number of structures rewritten.
+        """
+        headers = list(self.structures.find(
+            {'original_version': original_version},
+            fields=['previous_version', 'snapshot_version', 'delta_depth'],
+        ))
+        history_ids = set(header['_id'] for header in headers)
+        successors = defaultdict(list)
+        for header in headers:
+            previous_version = header.get('previous_version')
+            successors[previous_version if previous_version in history_ids else None].append(header)
+        # rewriting a snapshot which deltas are based on would chain them onto another delta
+        snapshot_ids = set(header['snapshot_version'] for header in headers if 'snapshot_version' in header)
+
+        compacted = 0
+        # walk each line of history from its root, with the snapshot and depth of the previous version
+        pending = [(header, None, 0) for header in successors[None]]
+        while pending:
+            header, snapshot_id, depth = pending.pop()
+            if 'snapshot_version' in header:
+                snapshot_id, depth = header['snapshot_version'], header['delta_depth']
+            elif header['_id'] in snapshot_ids or snapshot_id is None or depth + 1 >= snapshot_interval:
+                snapshot_id, depth = header['_id'], 0
+            else:
+                structure = self.structures.find_one({'_id': header['_id']})
+                encoded = self._delta_encode(structure, snapshot_id, depth + 1, snapshot_interval)
+                if 'delta' in encoded:
+                    self.structures.update({'_id': header['_id']}, encoded)
+                    compacted += 1
+                    depth += 1
+                else:
+                    snapshot_id, depth = header['_id'], 0
+            pending.extend((successor, snapshot_id, depth) for successor in successors[header['_id']])
+        return compacted
+
+    def _snapshot_of(self, structure_id):
+        """
+        Returns the id of the snapshot which the stored structure structure_id is encoded against (itself
+        if it is stored in full), and its depth in deltas from that snapshot. Returns (None, 0) if there
+        is no such structure.
+        """
+        if structure_id is None:
+            return None, 0
+        header = self.structures.find_one({'_id': structure_id}, fields=['snapshot_version', 'delta_depth'])
+        if header is None:
+            return None, 0
+        if 'snapshot_version' in header:
+            return header['snapshot_version'], header['delta_depth']
+        return structure_id, 0
+
+    def _delta_encode(self, structure, snapshot_id, depth, snapshot_interval):
+        """
+        Returns the document to store for the mongo form of structure: a delta against the snapshot
+        snapshot_id which is depth versions back, or the structure itself if it should be stored in full
+        because there is no snapshot, the snapshot is too far back or the delta isn't smaller.
+        """
+        if snapshot_id is None or depth >= snapshot_interval:
+            return structure
+        snapshot = self._get_snapshot(snapshot_id)
+        if snapshot is None:
+            return structure
+        delta = make_structure_delta(snapshot, structure)
+        if 2 * (len(delta['blocks']) + len(delta['deleted'])) > len(structure['blocks']):
+            return structure
+        encoded = {key: value for key, value in structure.iteritems() if key != 'blocks'}
+        encoded.update(snapshot_version=snapshot_id, delta_depth=depth, delta=delta)
+        return encoded
+
+    def _get_snapshot(self, snapshot_id):
+        """
+        Returns the mongo form of the full structure snapshot_id, which must not be modified.
+        """
+        with self._snapshots_lock:
+            snapshot = self._snapshots.pop(snapshot_id, None)
+            if snapshot is not None:
+                self._snapshots[snapshot_id] = snapshot
+                return snapshot
+
+        # read without holding the lock, so that other threads' cache hits don't wait on the db
+        snapshot = self._resolve(self.structures.find_one({'_id': snapshot_id}))
+        if snapshot is None:
+            return None
+        with self._snapshots_lock:
+            # another thread may have cached the snapshot meanwhile
+            self._snapshots.pop(snapshot_id, None)
+            while len(self._snapshots) >= SNAPSHOT_CACHE_SIZE:
+                self._snapshots.popitem(last=False)
+            self._snapshots[snapshot_id] = snapshot
+        return snapshot
+
+    def _resolve(self, structure):
+        """
+        Returns the mongo form of the full structure for the structure document read from the db,
+        rebuilding it from its snapshot if it is delta encoded.
+        """
+        if structure is None or 'delta' not in structure:
+            return structure
+        return apply_structure_delta(self._get_snapshot(structure['snapshot_version']), structure)
 
     def get_course_index(self, key, ignore_case=False):
         """
@@ -283,3 +488,4 @@ class MongoConnection(object):
             ],
             unique=True
         )
+        self.structures.create_index('snapshot_version', sparse=True)
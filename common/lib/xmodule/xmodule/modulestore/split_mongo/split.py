@@ -80,9 +80,11 @@ from xmodule.modulestore import (
 from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
-from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope, CopyOnWriteBlocks
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, is_indexable_criteria
+from xmodule.modulestore.split_mongo.descriptor_cache import PublishedDescriptorCache
 from xmodule.error_module import ErrorDescriptor
-from collections import defaultdict
+from collections import Counter, defaultdict
 from types import NoneType
 from xmodule.assetstore import AssetMetadata
 
@@ -110,6 +112,10 @@ log = logging.getLogger(__name__)
 # When blacklists are this, all children should be excluded
 EXCLUDE_ALL = '*'
 
+# Most definitions prefetched for a subtree being loaded: bigger subtrees (such as whole courses
+# loaded to get at their outline) load their definitions lazily, one at a time
+MAX_DEFINITION_PREFETCH = 500
+
 
 new_contract('BlockUsageLocator', BlockUsageLocator)
 new_contract('BlockKey', BlockKey)
@@ -374,7 +380,7 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
             # The definition hasn't been loaded from the db yet, so load it
             if definition is None:
-                definition = self.db_connection.get_definition(definition_guid)
+                definition = self._load_definition(definition_guid)
                 bulk_write_record.definitions[definition_guid] = definition
                 if definition is not None:
                     bulk_write_record.definitions_in_db.add(definition_guid)
@@ -383,8 +389,89 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
         else:
             # cast string to ObjectId if necessary
             definition_guid = course_key.as_object_id(definition_guid)
+            return self._load_definition(definition_guid)
+
+    def _load_definition(self, definition_guid):
+        """
+        Load a stored definition, from the request's definition cache if it's been loaded already.
+        Stored definitions never change, so they can be cached by id.
+        """
+        definition_cache = self._get_definition_cache()
+        if definition_cache is None:
             return self.db_connection.get_definition(definition_guid)
 
+        counters = self.definition_cache_counters()
+        definition = definition_cache.get(definition_guid)
+        if definition is None:
+            counters['misses'] += 1
+            definition = self.db_connection.get_definition(definition_guid)
+            if definition is not None:
+                definition_cache[definition_guid] = definition
+        else:
+            counters['hits'] += 1
+        return definition
+
+    def _get_definition_cache(self):
+        """
+        Return the request's {definition_id: definition} cache of stored definitions, if there's a request cache.
+        """
+        if self.request_cache is None:
+            return None
+        return self.request_cache.data.setdefault('definition_cache', {})
+
+    def definition_cache_counters(self):
+        """
+        Return the counters of the request's definition cache: its 'hits' and 'misses', the number of
+        definitions 'prefetched' and the number of 'prefetch_queries' made.
+        """
+        if self.request_cache is None:
+            return Counter()
+        return self.request_cache.data.setdefault('definition_cache_counters', Counter())
+
+    def prefetch_definitions(self, course_entry, block_keys, depth=0):
+        """
+        Load the definitions of the blocks block_keys and their descendants out to depth, which
+        haven't been loaded already, into the request's definition cache with one query. This saves
+        loading them one at a time when their content fields are first read, e.g. to render them.
+
+        Does nothing if there's no request cache or the subtree is bigger than MAX_DEFINITION_PREFETCH.
+        """
+        definition_cache = self._get_definition_cache()
+        if definition_cache is None:
+            return
+
+        bulk_write_record = self._get_bulk_ops_record(course_entry.course_key)
+        blocks = course_entry.structure['blocks']
+        definition_ids = set()
+        pending = [(block_key, depth) for block_key in block_keys]
+        visited = set()
+        while pending:
+            block_key, block_depth = pending.pop()
+            # the blocks are only read: don't make a CopyOnWriteBlocks copy them
+            block = dict.get(blocks, block_key)
+            if block is None or block_key in visited:
+                continue
+            visited.add(block_key)
+            if block.definition is not None and not block.definition_loaded:
+                definition_ids.add(block.definition)
+            if block_depth is None or block_depth > 0:
+                child_depth = None if block_depth is None else block_depth - 1
+                pending.extend((BlockKey(*child), child_depth) for child in block.fields.get('children', []))
+            if len(definition_ids) > MAX_DEFINITION_PREFETCH:
+                return
+
+        missing_ids = [
+            definition_id for definition_id in definition_ids
+            if definition_id not in definition_cache and
+            not (bulk_write_record.active and definition_id in bulk_write_record.definitions)
+        ]
+        if missing_ids:
+            counters = self.definition_cache_counters()
+            counters['prefetch_queries'] += 1
+            for definition in self.db_connection.get_definitions(missing_ids):
+                definition_cache[definition['_id']] = definition
+                counters['prefetched'] += 1
+
     def get_definitions(self, course_key, ids):
         """
         Return all definitions that specified in ``ids``.
@@ -425,6 +512,9 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
     def version_structure(self, course_key, structure, user_id):
         """
         Copy the structure and update the history info (edited_by, edited_on, previous_version)
+
+        The blocks of the copy are a CopyOnWriteBlocks map: they're shared with the original structure
+        until they're got from the copy, so only the blocks which are actually read or edited get copied.
         """
         if course_key.branch is None:
             raise InsufficientSpecificationError(course_key)
@@ -436,7 +526,9 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
             return bulk_write_record.structure_for_branch(course_key.branch)
 
         # Otherwise, make a new structure
-        new_structure = copy.deepcopy(structure)
+        new_structure = copy.deepcopy({key: value for key, value in structure.iteritems() if key != 'blocks'})
+        if 'blocks' in structure:
+            new_structure['blocks'] = CopyOnWriteBlocks(structure['blocks'])
         new_structure['_id'] = ObjectId()
         new_structure['previous_version'] = structure['_id']
         new_structure['edited_by'] = user_id
@@ -608,9 +700,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, **kwargs):
+                 services=None, published_descriptor_cache_size=0, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param published_descriptor_cache_size: if not 0, the descriptors of published course versions are kept
+            across requests, up to this many per thread
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
@@ -637,6 +731,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if user_service is not None:
             self.services["user"] = user_service
 
+        if published_descriptor_cache_size:
+            self.published_descriptor_cache = PublishedDescriptorCache(published_descriptor_cache_size)
+        else:
+            self.published_descriptor_cache = None
+
     def close_connections(self):
         """
         Closes any open connections to the underlying databases
@@ -719,6 +818,9 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             runtime = self.create_runtime(course_entry, lazy)
             self._add_cache(course_entry.structure['_id'], runtime)
             self.cache_items(runtime, block_keys, course_entry.course_key, depth, lazy)
+        if lazy and depth != 0:
+            # the subtree is about to be used (e.g. rendered): load its definitions all at once
+            self.prefetch_definitions(course_entry, block_keys, depth)
 
         return [runtime.load_item(block_key, course_entry, **kwargs) for block_key in block_keys]
 
@@ -742,6 +844,67 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             self.request_cache.data.setdefault('course_cache', {})[course_version_guid] = system
         return system
 
+    def _published_descriptor_key(self, course_key, structure_id, block_key):
+        """
+        Returns the key of the block in the published_descriptor_cache, or None if it must not be
+        shared across requests: the cache is disabled, the block isn't read from the published branch
+        (or from a persisted version of it, when in a bulk operation) or there's no request to scope
+        its binding to.
+        """
+        if (
+                self.published_descriptor_cache is None or self.request_cache is None or
+                getattr(course_key, 'branch', None) != ModuleStoreEnum.BranchName.published
+        ):
+            return None
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if bulk_write_record.active and (
+                course_key.branch in bulk_write_record.dirty_branches or
+                structure_id not in bulk_write_record.structures_in_db
+        ):
+            # the structure is being edited in the bulk operation
+            return None
+        return (course_key, structure_id, block_key)
+
+    def get_published_descriptor(self, course_key, structure_id, block_key):
+        """
+        Returns the descriptor of the block in the published version structure_id of the course from
+        the published_descriptor_cache, or None. The first time in a request that a descriptor is
+        returned, it's unbound from the student of any previous request.
+        """
+        key = self._published_descriptor_key(course_key, structure_id, block_key)
+        if key is None:
+            return None
+        block = self.published_descriptor_cache.get(key)
+        if block is not None:
+            in_request = self.request_cache.data.setdefault('published_descriptors', set())
+            if key not in in_request:
+                in_request.add(key)
+                block.unbind()
+        return block
+
+    def cache_published_descriptor(self, course_key, structure_id, block_key, block):
+        """
+        The counterpart of :meth:`get_published_descriptor`, which caches a newly loaded descriptor.
+        """
+        key = self._published_descriptor_key(course_key, structure_id, block_key)
+        if key is not None:
+            self.published_descriptor_cache.set(key, block)
+            self.request_cache.data.setdefault('published_descriptors', set()).add(key)
+
+    def get_structure_index(self, structure):
+        """
+        Return the StructureIndex of the blocks of structure, which is cached for the request along
+        with the structure's runtime.
+        """
+        if self.request_cache is None:
+            return StructureIndex(structure['blocks'])
+
+        indexes = self.request_cache.data.setdefault('structure_index_cache', {})
+        index = indexes.get(structure['_id'])
+        if index is None:
+            index = indexes[structure['_id']] = StructureIndex(structure['blocks'])
+        return index
+
     def _clear_cache(self, course_version_guid=None):
         """
         Should only be used by testing or something which implements transactional boundary semantics.
@@ -751,12 +914,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return
 
         if course_version_guid:
-            try:
-                del self.request_cache.data.setdefault('course_cache', {})[course_version_guid]
-            except KeyError:
-                pass
+            for cache_name in ('course_cache', 'structure_index_cache'):
+                self.request_cache.data.setdefault(cache_name, {}).pop(course_version_guid, None)
         else:
             self.request_cache.data['course_cache'] = {}
+            self.request_cache.data['structure_index_cache'] = {}
 
     def _lookup_course(self, course_key):
         '''
@@ -1043,14 +1205,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         if settings is None:
             settings = {}
+        index = self.get_structure_index(course.structure)
+        blocks = course.structure['blocks']
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
-            block_ids = []
-            for block_id, block in course.structure['blocks'].iteritems():
-                if block_name == block_id.id and _block_matches_all(block):
-                    block_ids.append(block_id)
-
+            block_ids = [
+                block_id for block_id in index.by_id.get(block_name, [])
+                if _block_matches_all(blocks[block_id])
+            ]
             return self._load_items(course, block_ids, lazy=True, **kwargs)
 
         if 'category' in qualifiers:
@@ -1059,8 +1222,21 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # don't expect caller to know that children are in fields
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
+
+        # only check the blocks in the smallest index entry matching any of the simple criteria
+        candidates = None
+        if is_indexable_criteria(qualifiers.get('block_type')):
+            candidates = index.by_type.get(qualifiers['block_type'], [])
+        for field_name, criteria in settings.iteritems():
+            if is_indexable_criteria(criteria):
+                field_candidates = index.by_field(field_name).get(criteria, [])
+                if candidates is None or len(field_candidates) < len(candidates):
+                    candidates = field_candidates
+        if candidates is None:
+            candidates = blocks.keys()
+
+        for block_id in candidates:
+            if _block_matches_all(blocks[block_id]):
                 items.append(block_id)
 
         if len(items) > 0:
@@ -1081,7 +1257,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        parent_ids = list(self.get_structure_index(course.structure).parents.get(BlockKey.from_usage_key(locator), []))
         if len(parent_ids) == 0:
             return None
         # find alphabetically least
@@ -1105,7 +1281,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         items = set(course.structure['blocks'].keys())
         items.remove(course.structure['root'])
         blocks = course.structure['blocks']
-        for block_id, block_data in blocks.iteritems():
+        for block_id, block_data in dict.iteritems(blocks):
             items.difference_update(BlockKey(*child) for child in block_data.fields.get('children', []))
             if block_data.block_type in detached_categories:
                 items.discard(block_id)
@@ -1683,7 +1859,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 root_block.fields.update(self._serialize_fields(root_category, block_fields))
             if definition_fields is not None:
                 old_def = self.get_definition(locator, root_block.definition)
-                new_fields = old_def['fields']
+                # the definition may be cached: don't change it
+                new_fields = copy.deepcopy(old_def['fields'])
                 new_fields.update(definition_fields)
                 definition_id = self._update_definition_from_data(locator, old_def, new_fields, user_id).definition_id
                 root_block.definition = definition_id
@@ -2606,12 +2783,13 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         original_structure = self._lookup_course(course_locator).structure
         index_entry = self._get_index_if_valid(course_locator)
         new_structure = self.version_structure(course_locator, original_structure, user_id)
-        for block in new_structure['blocks'].itervalues():
+        blocks = new_structure['blocks']
+        # only the blocks whose children change are got from the CopyOnWriteBlocks (and so copied)
+        for block_key, block in dict.items(blocks):
             if 'children' in block.fields:
-                block.fields['children'] = [
-                    block_id for block_id in block.fields['children']
-                    if block_id in new_structure['blocks']
-                ]
+                children = [block_id for block_id in block.fields['children'] if block_id in blocks]
+                if children != block.fields['children']:
+                    blocks[block_key].fields['children'] = children
         self.update_structure(course_locator, new_structure)
         if index_entry is not None:
             # update the index entry if appropriate
@@ -2808,10 +2986,14 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         """
         Given a structure, find block_key's parent in that structure. Note returns
         the encoded format for parent
+
+        Scans the blocks rather than using the structure's StructureIndex, as the structure may be
+        being edited.
         """
+        # the blocks are only read: don't make a CopyOnWriteBlocks copy them all
         return [
             parent_block_key
-            for parent_block_key, value in structure['blocks'].iteritems()
+            for parent_block_key, value in dict.iteritems(structure['blocks'])
             if block_key in value.fields.get('children', [])
         ]
 
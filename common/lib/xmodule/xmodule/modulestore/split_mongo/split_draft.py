@@ -8,7 +8,7 @@ from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.courseware_index import CoursewareSearchIndexer
 from xmodule.modulestore.exceptions import InsufficientSpecificationError, ItemNotFoundError
 from xmodule.modulestore.draft_and_published import (
-    ModuleStoreDraftAndPublished, DIRECT_ONLY_CATEGORIES, UnsupportedRevisionError
+    ModuleStoreDraftAndPublished, DIRECT_ONLY_CATEGORIES, UnsupportedRevisionError, BlockPublishState
 )
 from opaque_keys.edx.locator import CourseLocator, LibraryLocator, LibraryUsageLocator
 from xmodule.modulestore.split_mongo import BlockKey
@@ -333,6 +333,48 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
 
         return has_changes_subtree(BlockKey.from_usage_key(xblock.location))
 
+    def get_subtree_publish_states(self, xblock):
+        """
+        See superclass doc. Compares the draft and published versions of each block of the subtree
+        in one walk of the draft structure.
+        """
+        draft_course = self._lookup_course(
+            xblock.location.course_key.for_branch(ModuleStoreEnum.BranchName.draft)
+        ).structure
+        try:
+            published_course = self._lookup_course(
+                xblock.location.course_key.for_branch(ModuleStoreEnum.BranchName.published)
+            ).structure
+        except ItemNotFoundError:
+            published_course = None
+        states = {}
+
+        def _compute_states(block_key):
+            """
+            Adds the states of the block at block_key and its descendants, and returns whether it has changes.
+            """
+            draft_block = self._get_block_from_structure(draft_course, block_key)
+            if draft_block is None:  # temporary fix for bad pointers TNL-1141
+                return True
+            published_block = None
+            if published_course is not None:
+                published_block = self._get_block_from_structure(published_course, block_key)
+
+            # check if the draft has changed since the published was created
+            has_changes = (
+                published_block is None or
+                self._get_version(draft_block) != self._get_version(published_block)
+            )
+            # visit all of the children (unlike has_changes) so that each has its state
+            for child_block_key in draft_block.fields.get('children', []):
+                has_changes = _compute_states(child_block_key) or has_changes
+            # BlockKeys are (block_type, block_id) tuples, as returned by publish_state_key
+            states[block_key] = BlockPublishState(has_changes, published_block is not None)
+            return has_changes
+
+        _compute_states(BlockKey.from_usage_key(xblock.location))
+        return states
+
     def publish(self, location, user_id, blacklist=None, **kwargs):
         """
         Publishes the subtree under location from the draft branch to the published branch
@@ -0,0 +1,95 @@
+"""
+Secondary indexes over the blocks of a loaded version of a split structure.
+"""
+from collections import defaultdict
+
+from lazy import lazy
+
+
+def _indexed_values(value):
+    """
+    Yields the values under which a block whose field is set to value is indexed: the value itself
+    or, for a list, each of its (possibly nested) elements, skipping the unhashable ones.
+    """
+    if isinstance(value, list):
+        for element in value:
+            for indexed_value in _indexed_values(element):
+                yield indexed_value
+    else:
+        try:
+            hash(value)
+        except TypeError:
+            return
+        yield value
+
+
+def is_indexable_criteria(criteria):
+    """
+    Is criteria a get_items qualifier which only matches values equal to it (and lists containing it),
+    so that the blocks it matches can be looked up in a field index?
+    """
+    # regexes, functions and {'$in'|'$nin': []} dicts match values other than themselves
+    return isinstance(criteria, (basestring, int, long, float, tuple))
+
+
+class StructureIndex(object):
+    """
+    Lazily built lookups of the BlockKeys of the blocks of one version of a structure, by block type,
+    by block id, by child and by the value of any of their settings fields.
+
+    The blocks must not change once the index is in use, so only index the versions of structures
+    which aren't being edited (the modulestore drops its cached indexes when a version is updated).
+    """
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self._field_indexes = {}
+
+    def _group_by(self, key_function):
+        """
+        Returns {key_function(block_key, block): [block_key]} over all of the blocks.
+        """
+        index = defaultdict(list)
+        # the blocks are only read: don't make a CopyOnWriteBlocks copy them
+        for block_key, block in dict.iteritems(self.blocks):
+            index[key_function(block_key, block)].append(block_key)
+        return dict(index)
+
+    @lazy
+    def by_type(self):
+        """
+        {block_type: [BlockKey]}
+        """
+        return self._group_by(lambda block_key, block: block_key.type)
+
+    @lazy
+    def by_id(self):
+        """
+        {block_id: [BlockKey]}
+        """
+        return self._group_by(lambda block_key, block: block_key.id)
+
+    @lazy
+    def parents(self):
+        """
+        {child BlockKey: [parent BlockKey]}
+        """
+        parents = defaultdict(list)
+        for block_key, block in dict.iteritems(self.blocks):
+            for child in block.fields.get('children', []):
+                parents[child].append(block_key)
+        return dict(parents)
+
+    def by_field(self, field_name):
+        """
+        Returns {value: [BlockKey]} of the blocks which have the settings field field_name explicitly set,
+        by each of the values they'd be found under with get_items(settings={field_name: value}).
+        """
+        index = self._field_indexes.get(field_name)
+        if index is None:
+            index = defaultdict(list)
+            for block_key, block in dict.iteritems(self.blocks):
+                if field_name in block.fields:
+                    for value in set(_indexed_values(block.fields[field_name])):
+                        index[value].append(block_key)
+            index = self._field_indexes[field_name] = dict(index)
+        return index
@@ -1,6 +1,7 @@
 """
  Test contentstore.mongo functionality
 """
+import hashlib
 import logging
 from uuid import uuid4
 import unittest
@@ -8,14 +9,17 @@ import mimetypes
 from tempfile import mkdtemp
 import path
 import shutil
+import threading
 
 from opaque_keys.edx.locator import CourseLocator, AssetLocator
 from opaque_keys.edx.keys import AssetKey
 from xmodule.tests import DATA_DIR
 from xmodule.contentstore.mongo import MongoContentStore
-from xmodule.contentstore.content import StaticContent
+from xmodule.contentstore.content import StaticContent, StaticContentStream
 from xmodule.exceptions import NotFoundError
 import ddt
+import pymongo
+from mock import patch
 from __builtin__ import delattr
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 
@@ -57,7 +61,7 @@ class TestContentstore(unittest.TestCase):
         """
         # since MongoModuleStore and MongoContentStore are basically assumed to be together, create this class
         # as well
-        self.contentstore = MongoContentStore(HOST, DB, port=PORT)
+        self.contentstore = self.make_contentstore()
         self.addCleanup(self.contentstore._drop_database)  # pylint: disable=protected-access
 
         setattr(AssetLocator, 'deprecated', deprecated)
@@ -79,6 +83,12 @@ class TestContentstore(unittest.TestCase):
         load_assets(self.course1_key, self.course1_files)
         load_assets(self.course2_key, self.course2_files)
 
+    def make_contentstore(self):
+        """
+        Returns the contentstore under test.
+        """
+        return MongoContentStore(HOST, DB, port=PORT)
+
     def save_asset(self, filename, asset_key, displayname, locked):
         """
         Load and save the given file.
@@ -146,6 +156,27 @@ class TestContentstore(unittest.TestCase):
         finally:
             shutil.rmtree(root_dir)
 
+    @ddt.data(
+        (True, 1024 * 1024, StaticContent), (False, 1024 * 1024, StaticContent),
+        (True, 0, StaticContentStream), (False, 0, StaticContentStream),
+    )
+    @ddt.unpack
+    def test_iter_all_for_course(self, deprecated, read_ahead_max_size, content_class):
+        """
+        Test that small assets are read ahead and big ones are streamed
+        """
+        self.set_up_assets(deprecated)
+        with patch('xmodule.contentstore.mongo.EXPORT_READ_AHEAD_MAX_SIZE', read_ahead_max_size):
+            exported = list(self.contentstore.iter_all_for_course(self.course1_key, workers=2))
+        self.assertEqual(sorted(content.name for content, __ in exported), sorted(self.course1_files))
+        for content, policy in exported:
+            self.assertIs(type(content), content_class)
+            with open("{}/static/{}".format(DATA_DIR, content.name), "rb") as f:
+                self.assertEqual(''.join(content.stream_data()), f.read())
+            self.assertEqual(policy['displayname'], content.name)
+            self.assertIn('locked', policy)
+            self.assertNotIn('md5', policy)
+
     @ddt.data(True, False)
     def test_get_all_content(self, deprecated):
         """
@@ -209,3 +240,215 @@ class TestContentstore(unittest.TestCase):
         # ensure it didn't remove any from other course
         __, count = self.contentstore.get_all_content_for_course(self.course2_key)
         self.assertEqual(count, len(self.course2_files))
+
+    @ddt.data(True, False)
+    def test_save_many(self, deprecated):
+        """
+        save_many writes new and changed data, and only updates the attrs of unchanged data
+        """
+        self.set_up_assets(deprecated)
+        unchanged_key = self.course1_key.make_asset_key('asset', self.course1_files[0])
+        changed_key = self.course1_key.make_asset_key('asset', self.course1_files[1])
+        new_key = self.course1_key.make_asset_key('asset', 'new.txt')
+        unchanged = self.contentstore.find(unchanged_key)
+        upload_date = unchanged.last_modified_at
+
+        contents = [
+            StaticContent(unchanged_key, 'renamed', unchanged.content_type, unchanged.data, locked=True),
+            StaticContent(changed_key, 'changed', 'text/plain', 'changed data'),
+            StaticContent(new_key, 'new', 'text/plain', 'new data'),
+        ]
+        written = self.contentstore.save_many(contents)
+        self.assertEqual([content.location for content in written], [changed_key, new_key])
+
+        unchanged = self.contentstore.find(unchanged_key)
+        self.assertEqual(unchanged.last_modified_at, upload_date)
+        self.assertEqual(unchanged.name, 'renamed')
+        self.assertTrue(unchanged.locked)
+        self.assertEqual(self.contentstore.find(changed_key).data, 'changed data')
+        self.assertEqual(self.contentstore.find(new_key).data, 'new data')
+        self.assertEqual(self.contentstore.save_many([]), [])
+
+    @ddt.data(True, False)
+    def test_generate_thumbnail_for_asset(self, deprecated):
+        """
+        generate_thumbnail_for_asset stores the thumbnail of a saved image and points the image at it
+        """
+        self.set_up_assets(deprecated)
+        asset_key = self.course1_key.make_asset_key('asset', 'picture1.jpg')
+        self.assertIsNone(self.contentstore.find(asset_key).thumbnail_location)
+
+        thumbnail_content, thumbnail_location = self.contentstore.generate_thumbnail_for_asset(asset_key)
+        self.assertIsNotNone(thumbnail_content)
+        self.assertEqual(self.contentstore.find(asset_key).thumbnail_location, thumbnail_location)
+        self.assertIsNotNone(self.contentstore.find(thumbnail_location))
+
+
+@ddt.ddt
+class TestContentAddressedContentstore(TestContentstore):
+    """
+    Run the contentstore.mongo tests against a content addressed store, plus tests of the blob sharing
+    """
+    def make_contentstore(self):
+        """
+        Returns a content addressed contentstore.
+        """
+        return MongoContentStore(HOST, DB, port=PORT, content_addressed=True)
+
+    def blob_refcounts(self):
+        """
+        Returns a dict of the refcount of each blob by md5
+        """
+        return {blob['md5']: blob['refcount'] for blob in self.contentstore.blob_files.find()}
+
+    @ddt.data(True, False)
+    def test_shared_blobs(self, deprecated):
+        """
+        Assets with the same data share one blob
+        """
+        self.set_up_assets(deprecated)
+        # picture1.jpg is in both courses
+        self.assertEqual(self.contentstore.blob_files.count(), 5)
+        self.assertEqual(sorted(self.blob_refcounts().values()), [1, 1, 1, 1, 2])
+        self.assertEqual(self.contentstore.fs_chunks.count(), 0)  # no per asset chunks
+
+        asset_key = self.course2_key.make_asset_key('asset', 'picture1.jpg')
+        content = self.contentstore.find(asset_key)
+        streamed = self.contentstore.find(asset_key, as_stream=True)
+        self.assertEqual(''.join(streamed.stream_data()), content.data)
+        self.assertEqual(content.length, len(content.data))
+
+    @ddt.data(True, False)
+    def test_copy_and_delete_share_blobs(self, deprecated):
+        """
+        Copying a course's assets only takes references to the blobs, which are deleted once nothing uses them
+        """
+        self.set_up_assets(deprecated)
+        dest_course = CourseLocator('test', 'destination', 'copy')
+        self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+        self.assertEqual(self.contentstore.blob_files.count(), 5)
+        self.assertEqual(sorted(self.blob_refcounts().values()), [1, 1, 2, 2, 3])
+
+        self.contentstore.delete_all_course_assets(self.course1_key)
+        self.contentstore.delete_all_course_assets(self.course2_key)
+        self.assertEqual(self.contentstore.blob_files.count(), 3)
+        for filename in self.course1_files:
+            self.assertIsNotNone(self.contentstore.find(dest_course.make_asset_key('asset', filename)).data)
+
+        self.contentstore.delete_all_course_assets(dest_course)
+        self.assertEqual(self.contentstore.blob_files.count(), 0)
+        self.assertEqual(self.contentstore.blob_chunks.count(), 0)
+
+    @ddt.data(True, False)
+    def test_copy_legacy_assets(self, deprecated):
+        """
+        Copying assets which aren't content addressed moves their data into blobs, shared with the copies
+        """
+        self.set_up_assets(deprecated)
+        legacy_key = self.course1_key.make_asset_key('asset', 'legacy.txt')
+        legacy_contentstore = MongoContentStore(HOST, DB, port=PORT)
+        legacy_contentstore.save(StaticContent(legacy_key, 'legacy.txt', 'text/plain', 'legacy data'))
+        self.assertGreater(self.contentstore.fs_chunks.count(), 0)
+
+        dest_course = CourseLocator('test', 'destination', 'copy')
+        self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+        self.assertEqual(self.contentstore.find(dest_course.make_asset_key('asset', 'legacy.txt')).data, 'legacy data')
+        self.assertEqual(self.contentstore.find(legacy_key).data, 'legacy data')
+        self.assertEqual(legacy_contentstore.find(legacy_key).data, 'legacy data')
+        self.assertEqual(self.contentstore.fs_chunks.count(), 0)
+        self.assertEqual(self.blob_refcounts()[hashlib.md5('legacy data').hexdigest()], 2)
+
+    @ddt.data(True, False)
+    def test_failed_copy_releases_blobs(self, deprecated):
+        """
+        Copies which clash with assets already in the destination don't keep their blobs referenced
+        """
+        self.set_up_assets(deprecated)
+        dest_course = CourseLocator('test', 'destination', 'copy')
+        self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+        refcounts = self.blob_refcounts()
+        self.contentstore.delete(dest_course.make_asset_key('asset', self.course1_files[0]))
+
+        with self.assertRaises(pymongo.errors.DuplicateKeyError):
+            self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+        self.assertEqual(self.blob_refcounts(), refcounts)
+        self.assertIsNotNone(self.contentstore.find(dest_course.make_asset_key('asset', self.course1_files[0])))
+
+    def test_failed_save_releases_blob(self):
+        """
+        A save which loses the race to store its location to a concurrent save doesn't keep its blob referenced
+        """
+        self.set_up_assets(False)
+        asset_key = self.course1_key.make_asset_key('asset', 'contains.sh')
+        # the other save stores the asset between this one's delete and insert
+        with patch.object(self.contentstore, 'delete'):
+            with self.assertRaises(pymongo.errors.DuplicateKeyError):
+                self.contentstore.save(StaticContent(asset_key, 'contains.sh', 'text/plain', 'new data'))
+        self.assertNotEqual(self.contentstore.find(asset_key).data, 'new data')
+        self.assertEqual(self.contentstore.collect_garbage(), 1)
+
+    @ddt.data(True, False)
+    def test_overwrite_releases_blob(self, deprecated):
+        """
+        Saving over an asset releases the blob of its previous data
+        """
+        self.set_up_assets(deprecated)
+        asset_key = self.course1_key.make_asset_key('asset', 'contains.sh')
+        self.contentstore.save(StaticContent(asset_key, 'contains.sh', 'text/plain', 'new data'))
+        self.assertEqual(self.contentstore.find(asset_key).data, 'new data')
+        self.assertEqual(self.contentstore.collect_garbage(), 1)
+        self.assertEqual(self.contentstore.blob_files.count(), 5)
+
+    def test_concurrent_streamed_blobs(self):
+        """
+        Concurrent saves of the same streamed data can't delete each other's blob
+        """
+        self.contentstore = self.make_contentstore()
+        self.addCleanup(self.contentstore._drop_database)  # pylint: disable=protected-access
+        arrivals = [0]
+        condition = threading.Condition()
+
+        def wait_for_other_writer():
+            """
+            Waits until the other writer has arrived at the same point
+            """
+            with condition:
+                arrivals[0] += 1
+                condition.notify_all()
+                rendezvous = arrivals[0] + arrivals[0] % 2
+                for __ in range(10):
+                    if arrivals[0] >= rendezvous:
+                        break
+                    condition.wait(1)
+
+        acquire_blob = self.contentstore._acquire_blob  # pylint: disable=protected-access
+
+        def interleaved_acquire_blob(md5):
+            """
+            Both writers look for an existing blob once both have written theirs, and only then delete theirs
+            """
+            wait_for_other_writer()
+            blob = acquire_blob(md5)
+            wait_for_other_writer()
+            return blob
+
+        blobs = []
+
+        def save():
+            """
+            Saves the streamed data as a blob
+            """
+            blobs.append(self.contentstore._store_blob(iter(['same ', 'data'])))  # pylint: disable=protected-access
+
+        with patch.object(self.contentstore, '_acquire_blob', side_effect=interleaved_acquire_blob):
+            writers = [threading.Thread(target=save) for __ in range(2)]
+            for writer in writers:
+                writer.start()
+            for writer in writers:
+                writer.join()
+
+        self.assertEqual(len(blobs), 2)
+        for blob in blobs:
+            self.assertEqual(self.contentstore.blobs.get(blob['_id']).read(), 'same data')
+        self.assertEqual(sum(blob['refcount'] for blob in self.contentstore.blob_files.find()), 2)
+        self.assertEqual(self.contentstore.blob_files.find({'pending': {'$exists': True}}).count(), 0)
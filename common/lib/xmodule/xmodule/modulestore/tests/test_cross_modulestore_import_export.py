@@ -65,13 +65,14 @@ class MemoryCache(object):
         """
         return self._data.get(key, default)
 
-    def set(self, key, value):
+    def set(self, key, value, timeout=None):  # pylint: disable=unused-argument
         """
         Set a key in the cache.
 
         Args:
             key: The key to update.
             value: The value change the key to.
+            timeout: Ignored, the value never expires.
         """
         self._data[key] = value
 
@@ -32,7 +32,7 @@ from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator, LibraryLocator
 from xmodule.exceptions import InvalidVersionError
 from xmodule.modulestore import ModuleStoreEnum
-from xmodule.modulestore.draft_and_published import UnsupportedRevisionError
+from xmodule.modulestore.draft_and_published import UnsupportedRevisionError, BlockPublishState, publish_state_key
 from xmodule.modulestore.exceptions import ItemNotFoundError, DuplicateCourseError, ReferentialIntegrityError, NoPathToItem
 from xmodule.modulestore.mixed import MixedModuleStore
 from xmodule.modulestore.search import path_to_location
@@ -594,6 +594,28 @@ class TestMixedModuleStore(CourseComparisonTest):
         self.assertFalse(self._has_changes(locations['grandparent']))
         self.assertFalse(self._has_changes(locations['parent']))
 
+    @ddt.data('draft', 'split')
+    def test_get_subtree_publish_states(self, default_ms):
+        """
+        Tests that get_subtree_publish_states() agrees with has_changes() and has_published_version()
+        """
+        locations = self.setup_has_changes(default_ms)
+
+        # Change the child
+        child = self.store.get_item(locations['child'])
+        child.display_name = 'Changed Display Name'
+        self.store.update_item(child, self.user_id)
+
+        states = self.store.get_subtree_publish_states(self.store.get_item(locations['grandparent']))
+        for key in locations:
+            block = self.store.get_item(locations[key])
+            self.assertEqual(
+                states[publish_state_key(locations[key])],
+                BlockPublishState(self.store.has_changes(block), self.store.has_published_version(block))
+            )
+        self.assertTrue(states[publish_state_key(locations['grandparent'])].has_changes)
+        self.assertFalse(states[publish_state_key(locations['child_sibling'])].has_changes)
+
     @ddt.data('draft', 'split')
     def test_has_changes_add_remove_child(self, default_ms):
         """
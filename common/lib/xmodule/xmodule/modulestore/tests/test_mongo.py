@@ -16,6 +16,7 @@ from uuid import uuid4
 from datetime import datetime
 from pytz import UTC
 import unittest
+from mock import patch, Mock
 from xblock.core import XBlock
 
 from xblock.fields import Scope, Reference, ReferenceList, ReferenceValueDict
@@ -39,10 +40,12 @@ from nose.tools import assert_in
 from xmodule.exceptions import NotFoundError
 from git.test.lib.asserts import assert_not_none
 from xmodule.x_module import XModuleMixin
-from xmodule.modulestore.mongo.base import as_draft
+from xmodule.modulestore.mongo.base import as_draft, MetadataInheritanceTree, MongoBulkWriter
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.edit_info import EditInfoMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
+from xmodule.modulestore.tests.factories import check_mongo_calls
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import MemoryCache
 
 
 log = logging.getLogger(__name__)
@@ -213,6 +216,28 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
             assert_false(self.draft_store.has_course(mix_cased))
             assert_true(self.draft_store.has_course(mix_cased, ignore_case=True))
 
+    def test_get_course_depth_none(self):
+        """
+        Test that get_course with depth=None loads the whole course with one query
+        """
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        with patch.object(self.draft_store, '_query_children_for_cache_children') as query_children:
+            course = self.draft_store.get_course(course_key, depth=None)
+        self.assertFalse(query_children.called)
+
+        def descendants(block):
+            """
+            Returns the locations of block and all of its descendants
+            """
+            locations = [block.location]
+            for child in block.get_children():
+                locations.extend(descendants(child))
+            return locations
+
+        with check_mongo_calls(0):
+            locations = descendants(course)
+        self.assertIn(Location('edX', 'toy', '2012_Fall', 'video', 'Welcome'), locations)
+
     def test_no_such_course(self):
         """
         Test get_course and has_course with ids which don't exist
@@ -705,6 +730,162 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
         # Clean up the data so we don't break other tests which apparently expect a particular state
         self.draft_store.delete_course(course.id, self.dummy_user)
 
+    def test_incremental_inheritance_tree(self):
+        """
+        Writes to containers update the cached metadata inheritance tree without recomputing it
+        """
+        store = self.draft_store
+        course = store.create_course("TestX", "Inheritance", "2015", self.dummy_user)
+        chapter = store.create_child(self.dummy_user, course.location, 'chapter')
+        sequential = store.create_child(self.dummy_user, chapter.location, 'sequential')
+        html = store.create_child(self.dummy_user, sequential.location, 'html')
+
+        with patch.object(store, 'metadata_inheritance_cache_subsystem', MemoryCache()):
+            store._get_cached_metadata_inheritance_tree(course.id)
+            with patch.object(store, '_compute_metadata_inheritance_tree') as compute:
+                with store.bulk_operations(course.id):
+                    store._update_single_item(chapter.location, {'metadata.graded': True})
+                tree = store._get_cached_metadata_inheritance_tree(course.id)
+                self.assertTrue(tree.get(unicode(html.location))['graded'])
+                self.assertEqual(tree.tree['updates'], 1)
+
+                # writes to leaves leave the tree as it is
+                with store.bulk_operations(course.id):
+                    store._update_single_item(as_draft(html.location), {'metadata.graded': False})
+                self.assertIs(store._get_cached_metadata_inheritance_tree(course.id).tree, tree.tree)
+
+                # new containers are added to the tree
+                vertical = store.create_child(self.dummy_user, sequential.location, 'vertical')
+                new_html = store.create_child(self.dummy_user, vertical.location, 'html')
+                tree = store._get_cached_metadata_inheritance_tree(course.id)
+                metadata = tree.get(unicode(new_html.location))
+                self.assertTrue(metadata['graded'])
+                self.assertEqual(
+                    metadata['parent'], {ModuleStoreEnum.Branch.draft_preferred: unicode(vertical.location)}
+                )
+                self.assertFalse(compute.called)
+
+        store.delete_course(course.id, self.dummy_user)
+
+    def test_concurrent_inheritance_tree_updates(self):
+        """
+        A tree updated in place isn't cached over a tree updated concurrently: it's recomputed instead
+        """
+        store = self.draft_store
+        course = store.create_course("TestX", "ConcurrentInheritance", "2015", self.dummy_user)
+        chapter = store.create_child(self.dummy_user, course.location, 'chapter')
+        cache = MemoryCache()
+
+        def concurrent_update(*args):
+            """
+            Updates the tree, while another process caches its own update
+            """
+            tree = update_tree(*args)
+            cache.set(unicode(course.id), dict(cache.get(unicode(course.id)), stamp='concurrent'))
+            return tree
+
+        with patch.object(store, 'metadata_inheritance_cache_subsystem', cache):
+            store._get_cached_metadata_inheritance_tree(course.id)
+            update_tree = store._update_metadata_inheritance_tree
+            with patch.object(store, '_update_metadata_inheritance_tree', side_effect=concurrent_update):
+                with patch.object(
+                    store, '_compute_metadata_inheritance_tree', wraps=store._compute_metadata_inheritance_tree
+                ) as compute:
+                    with store.bulk_operations(course.id):
+                        store._update_single_item(chapter.location, {'metadata.graded': True})
+            self.assertTrue(compute.called)
+            self.assertEqual(cache.get(unicode(course.id))['updates'], 0)
+
+        store.delete_course(course.id, self.dummy_user)
+
+    def test_publish_queues_descendants(self):
+        """
+        Publishing writes the published versions of the descendants of the root with bulk writes
+        """
+        store = self.draft_store
+        course = store.create_course("TestX", "BulkPublish", "2015", self.dummy_user)
+        chapter = store.create_child(self.dummy_user, course.location, 'chapter')
+        sequential = store.create_child(self.dummy_user, chapter.location, 'sequential')
+        vertical = store.create_child(self.dummy_user, sequential.location, 'vertical')
+        html_locations = [store.create_child(self.dummy_user, vertical.location, 'html').location for __ in range(3)]
+
+        with patch.object(store, '_update_single_item', wraps=store._update_single_item) as update_single_item:
+            store.publish(vertical.location, self.dummy_user)
+        updated_locations = [call[0][0] for call in update_single_item.call_args_list]
+        self.assertIn(vertical.location, updated_locations)
+        for location in html_locations:
+            self.assertNotIn(location, updated_locations)
+            self.assertIsNone(store.collection.find_one({'_id': as_draft(location).to_deprecated_son()}))
+            published = store.get_item(location, revision=ModuleStoreEnum.RevisionOption.published_only)
+            self.assertEqual(published.published_by, self.dummy_user)
+
+        store.delete_course(course.id, self.dummy_user)
+
+
+class TestMongoBulkWriter(unittest.TestCase):
+    """
+    Tests of MongoBulkWriter
+    """
+    def test_batches(self):
+        collection = Mock()
+        bulk = collection.initialize_unordered_bulk_op.return_value
+        locations = [Location('TestX', 'Bulk', '2015', 'html', 'html{}'.format(index)) for index in range(3)]
+        with MongoBulkWriter(collection, batch_size=2) as bulk_writer:
+            for location in locations[:2]:
+                bulk_writer.upsert(location, {'metadata': {}})
+            self.assertEqual(bulk.execute.call_count, 1)
+            bulk_writer.remove(locations[2])
+            self.assertEqual(bulk.execute.call_count, 1)
+        self.assertEqual(bulk.execute.call_count, 2)
+        bulk.find.assert_any_call({'_id': locations[0].to_deprecated_son()})
+        bulk.find.return_value.upsert.return_value.update_one.assert_called_with({'$set': {'metadata': {}}})
+        bulk.find.return_value.remove_one.assert_called_once_with()
+
+    def test_nothing_queued(self):
+        collection = Mock()
+        with MongoBulkWriter(collection):
+            pass
+        self.assertFalse(collection.initialize_unordered_bulk_op.called)
+
+
+class TestMetadataInheritanceTree(unittest.TestCase):
+    """
+    Tests of MetadataInheritanceTree
+    """
+    def setUp(self):
+        super(TestMetadataInheritanceTree, self).setUp()
+        self.tree = MetadataInheritanceTree.from_nodes('draft', 'course', {
+            'course': {'metadata': {'graded': False, 'due': 'soon'}, 'children': ['chapter']},
+            'chapter': {'metadata': {'graded': True}, 'children': ['html', 'sequential']},
+            'sequential': {'metadata': {}, 'children': ['problem']},
+            'orphan': {'metadata': {'graded': False}, 'children': ['video']},
+        })
+
+    def test_get(self):
+        self.assertEqual(self.tree.get('html'), {'graded': True, 'due': 'soon', 'parent': {'draft': 'chapter'}})
+        self.assertEqual(self.tree.get('problem'), {'graded': True, 'due': 'soon', 'parent': {'draft': 'sequential'}})
+        self.assertEqual(self.tree.get('chapter'), {'graded': False, 'due': 'soon', 'parent': {'draft': 'course'}})
+        self.assertIsNone(self.tree.get('course'))
+        self.assertEqual(self.tree.get('video', {}), {})
+
+    def test_get_returns_copies(self):
+        self.tree.get('html')['graded'] = False
+        self.assertTrue(self.tree.get('html')['graded'])
+
+    def test_updated(self):
+        tree = self.tree.updated(
+            {'chapter': {'metadata': {}, 'children': ['vertical']}, 'vertical': {'metadata': {}, 'children': ['html']}},
+            ['sequential'],
+        )
+        self.assertEqual(tree.get('html'), {'graded': False, 'due': 'soon', 'parent': {'draft': 'vertical'}})
+        self.assertIsNone(tree.get('problem'))
+        self.assertEqual(tree.tree['updates'], 1)
+        # the containers no longer in the course are dropped
+        self.assertItemsEqual(tree.tree['nodes'].keys(), ['course', 'chapter', 'vertical'])
+        # the original is left as it was
+        self.assertEqual(self.tree.get('problem')['parent'], {'draft': 'sequential'})
+        self.assertEqual(self.tree.tree['updates'], 0)
+
 
 class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
     '''
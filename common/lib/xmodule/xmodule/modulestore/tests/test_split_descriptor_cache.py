@@ -0,0 +1,50 @@
+"""
+Tests of the process level cache of published descriptors.
+"""
+import threading
+import unittest
+
+from xmodule.modulestore.split_mongo.descriptor_cache import PublishedDescriptorCache
+
+
+class TestPublishedDescriptorCache(unittest.TestCase):
+    """
+    Tests of PublishedDescriptorCache
+    """
+    def setUp(self):
+        super(TestPublishedDescriptorCache, self).setUp()
+        self.cache = PublishedDescriptorCache(2)
+
+    def test_get(self):
+        block = object()
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.set('a', block)
+        self.assertIs(self.cache.get('a'), block)
+        self.assertEqual(
+            self.cache.stats(), {'size': 1, 'max_size': 2, 'hits': 1, 'misses': 1, 'evictions': 0}
+        )
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('a', 'block a')
+        self.cache.set('b', 'block b')
+        self.cache.get('a')
+        self.cache.set('c', 'block c')
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 'block a')
+        self.assertEqual(self.cache.get('c'), 'block c')
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        self.assertEqual(self.cache.stats()['size'], 2)
+
+    def test_clear(self):
+        self.cache.set('a', 'block a')
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_per_thread(self):
+        self.cache.set('a', 'block a')
+        found = []
+        thread = threading.Thread(target=lambda: found.append(self.cache.get('a')))
+        thread.start()
+        thread.join()
+        self.assertEqual(found, [None])
+        self.assertEqual(self.cache.get('a'), 'block a')
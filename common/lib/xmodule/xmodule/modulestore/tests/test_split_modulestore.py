@@ -10,6 +10,7 @@ import unittest
 import uuid
 
 from contracts import contract
+from mock import Mock, patch
 from nose.plugins.attrib import attr
 
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict
@@ -27,6 +28,7 @@ from xmodule.fields import Date, Timedelta
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.descriptor_cache import PublishedDescriptorCache
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from xmodule.modulestore.edit_info import EditInfoMixin
 
@@ -924,6 +926,12 @@ class SplitModuleItemTests(SplitModuleTest):
             settings={'display_name': re.compile(r'Hera')},
         )
         self.assertEqual(len(matches), 2)
+        matches = modulestore().get_items(locator, settings={'display_name': 'Hercules'})
+        self.assertEqual(len(matches), 1)
+        matches = modulestore().get_items(locator, qualifiers={'children': BlockKey('chapter', 'chapter1')})
+        self.assertEqual([match.location.block_id for match in matches], ['head12345'])
+        matches = modulestore().get_items(locator, qualifiers={'name': 'chapter2'})
+        self.assertEqual(len(matches), 1)
 
     def test_get_parents(self):
         '''
@@ -1904,6 +1912,179 @@ class TestSchema(SplitModuleTest):
             )
 
 
+class TestDefinitionPrefetch(SplitModuleTest):
+    """
+    Test loading the definitions of the subtrees being loaded in one query
+    """
+    def setUp(self):
+        super(TestDefinitionPrefetch, self).setUp()
+        modulestore().request_cache = Mock(data={})
+
+    def test_prefetch_definitions(self):
+        locator = BlockUsageLocator(
+            CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT), 'chapter', 'chapter3'
+        )
+        db_connection = modulestore().db_connection
+        with patch.object(db_connection, 'get_definition', wraps=db_connection.get_definition) as get_definition:
+            chapter = modulestore().get_item(locator, depth=1)
+            for problem in chapter.get_children():
+                self.assertIsNotNone(problem.data)
+            self.assertEqual(get_definition.call_count, 0)
+
+        counters = modulestore().definition_cache_counters()
+        self.assertEqual(counters['prefetch_queries'], 1)
+        self.assertEqual(counters['misses'], 0)
+        self.assertGreaterEqual(counters['prefetched'], 2)
+        self.assertGreaterEqual(counters['hits'], 2)
+
+    def test_no_prefetch_at_depth_0(self):
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        for problem in modulestore().get_items(locator, qualifiers={'category': 'problem'}):
+            self.assertIsNotNone(problem.data)
+
+        counters = modulestore().definition_cache_counters()
+        self.assertEqual(counters['prefetch_queries'], 0)
+        self.assertGreater(counters['misses'], 0)
+
+    def test_definition_cache(self):
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        definition_id = modulestore().get_course(locator).definition_locator.definition_id
+        definition = modulestore().get_definition(locator, definition_id)
+        hits = modulestore().definition_cache_counters()['hits']
+        self.assertIs(modulestore().get_definition(locator, definition_id), definition)
+        self.assertEqual(modulestore().definition_cache_counters()['hits'], hits + 1)
+
+
+class TestPublishedDescriptorCache(SplitModuleTest):
+    """
+    Test keeping the descriptors of published course versions across requests
+    """
+    def setUp(self):
+        super(TestPublishedDescriptorCache, self).setUp()
+        modulestore().request_cache = Mock(data={})
+        modulestore().published_descriptor_cache = PublishedDescriptorCache(100)
+
+    def test_shared_across_requests(self):
+        locator = CourseLocator(org='testx', course='wonderful', run="run", branch=BRANCH_NAME_PUBLISHED)
+        course = modulestore().get_course(locator)
+        student_runtime = Mock()
+        authored_data = course._field_data
+        course.bind_for_student(student_runtime, Mock())
+
+        # still bound for the rest of the request
+        self.assertIs(modulestore().get_course(locator), course)
+        self.assertIs(course.xmodule_runtime, student_runtime)
+
+        # unbound from the previous request's student
+        modulestore().request_cache.data = {}
+        self.assertIs(modulestore().get_course(locator), course)
+        self.assertIsNone(course.xmodule_runtime)
+        self.assertIs(course._field_data, authored_data)
+        self.assertEqual(modulestore().published_descriptor_cache.stats()['hits'], 2)
+
+    def test_unsaved_student_values_dropped(self):
+        locator = CourseLocator(org='testx', course='wonderful', run="run", branch=BRANCH_NAME_PUBLISHED)
+        course = modulestore().get_course(locator)
+        course.bind_for_student(Mock(), Mock())
+        course.position = 3
+
+        # the previous student's value, which wasn't saved, isn't saved for the next one
+        modulestore().request_cache.data = {}
+        self.assertIs(modulestore().get_course(locator), course)
+        self.assertNotIn(course.fields['position'], course._dirty_fields)
+        self.assertNotIn('position', course._field_data_cache)
+
+    def test_shared_in_bulk_operation(self):
+        locator = CourseLocator(org='testx', course='wonderful', run="run", branch=BRANCH_NAME_PUBLISHED)
+        with modulestore().bulk_operations(locator):
+            course = modulestore().get_course(locator)
+        modulestore().request_cache.data = {}
+        with modulestore().bulk_operations(locator):
+            self.assertIs(modulestore().get_course(locator), course)
+        self.assertEqual(modulestore().published_descriptor_cache.stats()['hits'], 1)
+
+    def test_not_shared_when_edited_in_bulk_operation(self):
+        locator = CourseLocator(org='testx', course='wonderful', run="run", branch=BRANCH_NAME_PUBLISHED)
+        with modulestore().bulk_operations(locator):
+            course = modulestore().get_course(locator)
+            course.display_name = 'Edited'
+            modulestore().update_item(course, 'testbot')
+            modulestore().request_cache.data = {}
+            self.assertEqual(modulestore().get_course(locator).display_name, 'Edited')
+        self.assertEqual(modulestore().published_descriptor_cache.stats()['hits'], 0)
+
+    def test_draft_not_shared(self):
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        self.assertIsNot(modulestore().get_course(locator), modulestore().get_course(locator))
+        self.assertEqual(modulestore().published_descriptor_cache.stats()['size'], 0)
+
+
+class TestStructureDeltas(SplitModuleTest):
+    """
+    Test storing the structure history as full snapshots plus deltas
+    """
+    def _stored_structures(self):
+        """
+        Returns {structure id: {block key: storable block}} for all the stored structures.
+        """
+        db_connection = modulestore().db_connection
+        return {
+            structure_id: {
+                block_key: block.to_storable()
+                for block_key, block in db_connection.get_structure(structure_id)['blocks'].iteritems()
+            }
+            for structure_id in db_connection.structures.distinct('_id')
+        }
+
+    def test_compact_structures(self):
+        db_connection = modulestore().db_connection
+        structures = self._stored_structures()
+        original_versions = db_connection.structures.distinct('original_version')
+
+        compacted = sum(
+            db_connection.compact_structures(original_version, 3) for original_version in original_versions
+        )
+        self.assertGreater(compacted, 0)
+        self.assertEqual(db_connection.structures.find({'delta': {'$exists': True}}).count(), compacted)
+        self.assertEqual(self._stored_structures(), structures)
+        for delta in db_connection.structures.find({'delta': {'$exists': True}}):
+            self.assertLess(delta['delta_depth'], 3)
+            self.assertNotIn('delta', db_connection.structures.find_one({'_id': delta['snapshot_version']}))
+
+        # compacting again has nothing left to do
+        self.assertEqual(
+            sum(db_connection.compact_structures(original_version, 3) for original_version in original_versions),
+            0
+        )
+
+    def test_insert_deltas(self):
+        db_connection = modulestore().db_connection
+        db_connection.structure_snapshot_interval = 3
+        locator = BlockUsageLocator(
+            CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT), 'problem', 'problem1'
+        )
+        versions = []
+        for index in range(5):
+            problem = modulestore().get_item(locator)
+            problem.max_attempts = index
+            problem = modulestore().update_item(problem, self.user_id)
+            versions.append(problem.location.version_guid)
+            stored = db_connection.structures.find_one({'_id': versions[-1]})
+            # every third version is a full snapshot
+            self.assertEqual('delta' in stored, index % 3 != 2)
+            self.assertEqual(modulestore().get_item(locator).max_attempts, index)
+
+        # the block generations are found in the deltas as well as in the snapshots
+        generations = [modulestore().get_block_generations(locator)]
+        found = set()
+        while generations:
+            generation = generations.pop()
+            found.add(generation.locator.version_guid)
+            generations.extend(generation.children)
+        self.assertLessEqual(set(versions), found)
+        self.assertEqual(db_connection.structures.find({'delta': {'$exists': True}}).count(), 4)
+
+
 # ===========================================
 def modulestore():
     """
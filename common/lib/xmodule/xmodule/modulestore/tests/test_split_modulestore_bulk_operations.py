@@ -3,8 +3,10 @@ import ddt
 import unittest
 from bson.objectid import ObjectId
 from mock import MagicMock, Mock, call
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey, CopyOnWriteBlocks
 from xmodule.modulestore.split_mongo.split import SplitBulkWriteMixin
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, structure_to_mongo
 
 from opaque_keys.edx.locator import CourseLocator
 
@@ -258,6 +260,89 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         get_result = self.bulk.get_structure(self.course_key, version_result['_id'])
         self.assertEquals(version_result, get_result)
 
+    def test_version_structure_shares_blocks(self):
+        block_keys = [BlockKey('html', 'block{}'.format(index)) for index in range(3)]
+        self.structure['blocks'] = {block_key: BlockData(fields={'index': 0}) for block_key in block_keys}
+        self.structure['root'] = block_keys[0]
+        original_blocks = dict(self.structure['blocks'])
+
+        new_structure = self.bulk.version_structure(self.course_key, self.structure, 'user_id')
+        self.assertIsInstance(new_structure['blocks'], CopyOnWriteBlocks)
+        new_structure['blocks'][block_keys[1]].fields['index'] = 1
+
+        # only the edited block was copied, and the original structure is unchanged
+        self.assertEqual(self.structure['blocks'], original_blocks)
+        self.assertEqual(original_blocks[block_keys[1]].fields, {'index': 0})
+        self.assertIs(dict.__getitem__(new_structure['blocks'], block_keys[0]), original_blocks[block_keys[0]])
+        self.assertIsNot(dict.__getitem__(new_structure['blocks'], block_keys[1]), original_blocks[block_keys[1]])
+
+        # serializing the new structure doesn't copy the blocks
+        stored_blocks = structure_to_mongo(new_structure)['blocks']
+        self.assertEqual(sorted(block['fields']['index'] for block in stored_blocks), [0, 0, 1])
+        self.assertIs(dict.__getitem__(new_structure['blocks'], block_keys[2]), original_blocks[block_keys[2]])
+
+
+class TestCopyOnWriteBlocks(unittest.TestCase):
+    """
+    Tests of the copy-on-write block maps of versioned structures.
+    """
+    def setUp(self):
+        super(TestCopyOnWriteBlocks, self).setUp()
+        self.block_keys = [BlockKey('html', 'block{}'.format(index)) for index in range(3)]
+        self.blocks = {block_key: BlockData(fields={'index': 0}) for block_key in self.block_keys}
+
+    def assertShared(self, blocks, block_key, shared=True):
+        """
+        Assert whether blocks still holds the original BlockData at block_key.
+        """
+        if shared:
+            self.assertIs(dict.__getitem__(blocks, block_key), self.blocks[block_key])
+        else:
+            self.assertIsNot(dict.__getitem__(blocks, block_key), self.blocks[block_key])
+
+    def test_get_copies_once(self):
+        blocks = CopyOnWriteBlocks(self.blocks)
+        block = blocks.get(self.block_keys[0])
+        self.assertShared(blocks, self.block_keys[0], shared=False)
+        self.assertIs(blocks[self.block_keys[0]], block)
+        self.assertShared(blocks, self.block_keys[1])
+        self.assertIsNone(blocks.get(BlockKey('html', 'missing')))
+
+    def test_iteration_copies(self):
+        blocks = CopyOnWriteBlocks(self.blocks)
+        for block in blocks.itervalues():
+            block.fields['index'] = 1
+        self.assertTrue(all(block.fields['index'] == 1 for __, block in blocks.items()))
+        self.assertTrue(all(block.fields['index'] == 0 for block in self.blocks.itervalues()))
+
+    def test_set_and_delete(self):
+        blocks = CopyOnWriteBlocks(self.blocks)
+        new_block = BlockData()
+        blocks[self.block_keys[0]] = new_block
+        self.assertIs(blocks[self.block_keys[0]], new_block)
+        del blocks[self.block_keys[1]]
+        self.assertNotIn(self.block_keys[1], blocks)
+        self.assertIn(self.block_keys[1], self.blocks)
+        popped = blocks.pop(self.block_keys[2])
+        self.assertIsNot(popped, self.blocks[self.block_keys[2]])
+        self.assertEqual(len(blocks), 1)
+
+    def test_versions_of_versions(self):
+        first = CopyOnWriteBlocks(self.blocks)
+        first[self.block_keys[0]].fields['index'] = 1
+        second = CopyOnWriteBlocks(first)
+        # the block first owned is now shared with second, so editing it in either doesn't affect the other
+        second[self.block_keys[0]].fields['index'] = 2
+        first[self.block_keys[0]].fields['index'] = 3
+        self.assertEqual(second[self.block_keys[0]].fields['index'], 2)
+        self.assertEqual(self.blocks[self.block_keys[0]].fields['index'], 0)
+
+    def test_deepcopy(self):
+        blocks = CopyOnWriteBlocks(self.blocks)
+        copied = copy.deepcopy(blocks)
+        self.assertEqual(set(copied), set(self.block_keys))
+        self.assertTrue(all(copied[block_key] is not self.blocks[block_key] for block_key in self.block_keys))
+
 
 class TestBulkWriteMixinClosedAfterPrevTransaction(TestBulkWriteMixinClosed, TestBulkWriteMixinPreviousTransaction):
     """
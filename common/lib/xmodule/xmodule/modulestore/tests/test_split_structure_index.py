@@ -0,0 +1,69 @@
+"""
+Tests of the secondary indexes over the blocks of split structures.
+"""
+import re
+import unittest
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey, CopyOnWriteBlocks
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, is_indexable_criteria
+
+
+class TestStructureIndex(unittest.TestCase):
+    """
+    Tests of StructureIndex
+    """
+    def setUp(self):
+        super(TestStructureIndex, self).setUp()
+        self.course = BlockKey('course', 'course')
+        self.chapters = [BlockKey('chapter', 'chapter{}'.format(index)) for index in range(2)]
+        self.html = BlockKey('html', 'shared')
+        self.blocks = {
+            self.course: self._block('course', {'children': self.chapters}),
+            self.chapters[0]: self._block('chapter', {'children': [self.html], 'format': 'Homework'}),
+            self.chapters[1]: self._block('chapter', {'children': [self.html], 'tags': ['a', ['b']]}),
+            self.html: self._block('html', {'format': 'Lab', 'tags': [{'not': 'hashable'}]}),
+        }
+        self.index = StructureIndex(self.blocks)
+
+    def _block(self, block_type, fields):
+        """
+        Returns a BlockData of block_type with the given fields.
+        """
+        return BlockData(block_type=block_type, definition=ObjectId(), fields=fields)
+
+    def test_by_type(self):
+        self.assertItemsEqual(self.index.by_type['chapter'], self.chapters)
+        self.assertEqual(self.index.by_type['course'], [self.course])
+        self.assertNotIn('problem', self.index.by_type)
+
+    def test_by_id(self):
+        self.assertEqual(self.index.by_id['shared'], [self.html])
+        self.assertNotIn('course1', self.index.by_id)
+
+    def test_parents(self):
+        self.assertItemsEqual(self.index.parents[self.html], self.chapters)
+        self.assertEqual(self.index.parents[self.chapters[1]], [self.course])
+        self.assertNotIn(self.course, self.index.parents)
+
+    def test_by_field(self):
+        self.assertEqual(self.index.by_field('format'), {'Homework': [self.chapters[0]], 'Lab': [self.html]})
+        # list values are indexed by each of their elements, as get_items matches them
+        self.assertEqual(self.index.by_field('tags'), {'a': [self.chapters[1]], 'b': [self.chapters[1]]})
+        self.assertEqual(self.index.by_field('children')[self.html], self.index.parents[self.html])
+        self.assertIs(self.index.by_field('format'), self.index.by_field('format'))
+        self.assertEqual(self.index.by_field('display_name'), {})
+
+    def test_copy_on_write_blocks_not_copied(self):
+        blocks = CopyOnWriteBlocks(self.blocks)
+        StructureIndex(blocks).by_field('format')
+        for block_key, block in self.blocks.iteritems():
+            self.assertIs(dict.__getitem__(blocks, block_key), block)
+
+    def test_is_indexable_criteria(self):
+        for criteria in ('chapter', u'chapter', 1, 1.5, True, self.html):
+            self.assertTrue(is_indexable_criteria(criteria))
+        for criteria in (re.compile('chapter'), lambda value: True, {'$in': ['chapter']}, None, ['chapter']):
+            self.assertFalse(is_indexable_criteria(criteria))
@@ -9,7 +9,9 @@ from xmodule.x_module import XModuleMixin
 from opaque_keys.edx.locations import Location
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.inheritance import InheritanceMixin
-from xmodule.modulestore.xml_importer import _import_module_and_update_references
+from xmodule.modulestore.xml_importer import (
+    _import_module_and_update_references, ImportProgress, PROGRESS_REPORT_INTERVAL
+)
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from xmodule.tests import DATA_DIR
@@ -229,3 +231,29 @@ class RemapNamespaceTest(ModuleStoreNoSettings):
         self.assertNotIn(
             'graded', new_version.get_explicitly_set_fields_by_scope(scope=Scope.settings)
         )
+
+
+class ImportProgressTest(unittest.TestCase):
+    """
+    Test the reporting of the progress of an import.
+    """
+    def test_reports(self):
+        callback = mock.Mock()
+        progress = ImportProgress(callback)
+        for __ in range(PROGRESS_REPORT_INTERVAL - 1):
+            progress.block_imported()
+        self.assertFalse(callback.called)
+
+        progress.block_imported()
+        callback.assert_called_once_with(blocks_imported=PROGRESS_REPORT_INTERVAL, assets_imported=0)
+
+        progress.assets_saved(3)
+        callback.assert_called_with(blocks_imported=PROGRESS_REPORT_INTERVAL, assets_imported=3)
+        self.assertEqual(callback.call_count, 2)
+
+    def test_no_callback(self):
+        progress = ImportProgress()
+        progress.block_imported()
+        progress.assets_saved(1)
+        progress.report()
+        self.assertEqual((progress.blocks_imported, progress.assets_imported), (1, 1))
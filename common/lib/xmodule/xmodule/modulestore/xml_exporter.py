@@ -2,8 +2,12 @@
 Methods for exporting course data to XML
 """
 
+import calendar
 import logging
 import lxml.etree
+import posixpath
+import tarfile
+from tempfile import mkdtemp
 from xblock.fields import Scope, Reference, ReferenceList, ReferenceValueDict
 from xmodule.contentstore.content import StaticContent
 from xmodule.exceptions import NotFoundError
@@ -17,6 +21,8 @@ import json
 import os
 from path import path
 import shutil
+import time
+from StringIO import StringIO
 from xmodule.modulestore.draft_and_published import DIRECT_ONLY_CATEGORIES
 from opaque_keys.edx.locator import CourseLocator
 
@@ -27,8 +33,11 @@ EXPORT_VERSION_KEY = "export_format"
 
 DEFAULT_CONTENT_FIELDS = ['metadata', 'data']
 
+# Name of the legacy copy of the default course image in the static directory
+LEGACY_COURSE_IMAGE_PATH = 'images/course_image.jpg'
 
-def export_to_xml(modulestore, contentstore, course_key, root_dir, course_dir):
+
+def export_to_xml(modulestore, contentstore, course_key, root_dir, course_dir, export_static=True):
     """
     Export all modules from `modulestore` and content from `contentstore` as xml to `root_dir`.
 
@@ -37,6 +46,7 @@ def export_to_xml(modulestore, contentstore, course_key, root_dir, course_dir):
     `course_key`: The `CourseKey` of the `CourseModuleDescriptor` to export
     `root_dir`: The directory to write the exported xml to
     `course_dir`: The name of the directory inside `root_dir` to write the course content to
+    `export_static`: Whether to export the static assets of `contentstore` (and their policy)
     """
 
     with modulestore.bulk_operations(course_key):
@@ -74,31 +84,20 @@ def export_to_xml(modulestore, contentstore, course_key, root_dir, course_dir):
 
         # export the static assets
         policies_dir = export_fs.makeopendir('policies')
-        if contentstore:
+        if contentstore and export_static:
             contentstore.export_all_for_course(
                 course_key,
                 root_course_dir + '/static/',
                 root_course_dir + '/policies/assets.json',
             )
 
-            # If we are using the default course image, export it to the
-            # legacy location to support backwards compatibility.
-            if course.course_image == course.fields['course_image'].default:
-                try:
-                    course_image = contentstore.find(
-                        StaticContent.compute_location(
-                            course.id,
-                            course.course_image
-                        ),
-                    )
-                except NotFoundError:
-                    pass
-                else:
-                    output_dir = root_course_dir + '/static/images/'
-                    if not os.path.isdir(output_dir):
-                        os.makedirs(output_dir)
-                    with OSFS(output_dir).open('course_image.jpg', 'wb') as course_image_file:
-                        course_image_file.write(course_image.data)
+            course_image = _default_course_image(course, contentstore)
+            if course_image is not None:
+                output_dir = root_course_dir + '/static/' + posixpath.dirname(LEGACY_COURSE_IMAGE_PATH)
+                if not os.path.isdir(output_dir):
+                    os.makedirs(output_dir)
+                with OSFS(output_dir).open(posixpath.basename(LEGACY_COURSE_IMAGE_PATH), 'wb') as course_image_file:
+                    course_image_file.write(course_image.data)
 
         # export the static tabs
         export_extra_content(export_fs, modulestore, course_key, xml_centric_course_key, 'static_tab', 'tabs', '.html')
@@ -190,6 +189,122 @@ def export_to_xml(modulestore, contentstore, course_key, root_dir, course_dir):
                         draft_node.module.add_xml_to_node(node)
 
 
+def _default_course_image(course, contentstore):
+    """
+    If the course uses the default course image, returns its content (which is exported to the legacy
+    location to support backwards compatibility), or None.
+    """
+    if course.course_image != course.fields['course_image'].default:
+        return None
+    try:
+        return contentstore.find(StaticContent.compute_location(course.id, course.course_image))
+    except NotFoundError:
+        return None
+
+
+def iter_export_to_tar(modulestore, contentstore, course_key, course_dir):
+    """
+    Export the course like `export_to_xml`, as a gzipped tar file of the `course_dir` directory, which is
+    yielded a piece at a time as it's generated.
+
+    The xml is exported (to a temporary directory) before the first piece is yielded, so any export
+    error is raised by the first call to `next`. The static assets are then streamed from `contentstore`
+    straight into the archive, reading them ahead concurrently, so the memory used stays bounded
+    however big the course is.
+    """
+    root_dir = path(mkdtemp())
+    try:
+        export_to_xml(modulestore, contentstore, course_key, root_dir, course_dir, export_static=False)
+
+        output = _StreamedOutput()
+        tar_file = tarfile.open(fileobj=output, mode='w|gz')
+        tar_file.add(root_dir / course_dir, arcname=course_dir)
+        shutil.rmtree(root_dir)
+        yield output.flush()
+
+        if contentstore:
+            static_dir = posixpath.join(course_dir, 'static')
+            policy = {}
+            for content, attrs in contentstore.iter_all_for_course(course_key):
+                asset_dir = static_dir
+                if content.import_path is not None:
+                    asset_dir = posixpath.join(static_dir, posixpath.dirname(content.import_path))
+                for __ in _add_streamed_file(tar_file, posixpath.join(asset_dir, content.name), content):
+                    yield output.flush()
+                policy[content.location.name] = attrs
+
+            course_image = _default_course_image(modulestore.get_course(course_key), contentstore)
+            if course_image is not None:
+                course_image_path = posixpath.join(static_dir, LEGACY_COURSE_IMAGE_PATH)
+                for __ in _add_streamed_file(tar_file, course_image_path, course_image):
+                    yield output.flush()
+
+            policy_data = json.dumps(policy, sort_keys=True, indent=4)
+            policy_info = tarfile.TarInfo(posixpath.join(course_dir, 'policies', 'assets.json'))
+            policy_info.size = len(policy_data)
+            policy_info.mtime = time.time()
+            tar_file.addfile(policy_info, StringIO(policy_data))
+
+        tar_file.close()
+        yield output.flush()
+    finally:
+        if root_dir.isdir():
+            shutil.rmtree(root_dir)
+
+
+class _StreamedOutput(object):
+    """
+    A file object which keeps what's written to it until it's flushed out.
+    """
+    def __init__(self):
+        self.pieces = []
+
+    def write(self, data):
+        """
+        Keep data until the next flush.
+        """
+        self.pieces.append(data)
+
+    def flush(self):
+        """
+        Returns (and forgets) all of the data written since the last flush.
+        """
+        data = ''.join(self.pieces)
+        self.pieces = []
+        return data
+
+
+def _add_streamed_file(tar_file, name, content):
+    """
+    Add the data of the StaticContent `content` to `tar_file`, a tar file opened for streaming, as the
+    file called `name`, yielding after each chunk of data is written.
+
+    Unlike `TarFile.addfile`, this never needs the whole data at once.
+    """
+    info = tarfile.TarInfo(name)
+    info.size = len(content.data) if content.length is None else content.length
+    if content.last_modified_at is not None:
+        info.mtime = calendar.timegm(content.last_modified_at.utctimetuple())
+    header = info.tobuf(tar_file.format, tar_file.encoding, tar_file.errors)
+    tar_file.fileobj.write(header)
+    tar_file.offset += len(header)
+
+    written = 0
+    for chunk in content.stream_data():
+        tar_file.fileobj.write(chunk)
+        written += len(chunk)
+        yield
+    if written != info.size:
+        raise IOError(u'{} should have {} bytes but has {}'.format(name, info.size, written))
+
+    blocks, remainder = divmod(info.size, tarfile.BLOCKSIZE)
+    if remainder > 0:
+        tar_file.fileobj.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+        blocks += 1
+    tar_file.offset += blocks * tarfile.BLOCKSIZE
+    tar_file.members.append(info)
+
+
 def adapt_references(subtree, destination_course_key, export_fs):
     """
     Map every reference in the subtree into destination_course_key and set it back into the xblock fields
@@ -49,12 +49,61 @@ from xmodule.modulestore.store_utilities import draft_node_constructor, get_draf
 
 log = logging.getLogger(__name__)
 
+# Number of static files read into memory and saved together by import_static_content
+STATIC_CONTENT_BATCH_SIZE = 100
+
+# Number of blocks imported between two reports to an import's progress_callback
+PROGRESS_REPORT_INTERVAL = 50
+
+
+class ImportProgress(object):
+    """
+    Counts the blocks and static files imported so far, and reports them to a callback now and then.
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.blocks_imported = 0
+        self.assets_imported = 0
+
+    def block_imported(self):
+        """
+        Count one more imported block, reporting every PROGRESS_REPORT_INTERVAL blocks.
+        """
+        self.blocks_imported += 1
+        if self.blocks_imported % PROGRESS_REPORT_INTERVAL == 0:
+            self.report()
+
+    def assets_saved(self, count):
+        """
+        Count another batch of imported static files, and report it.
+        """
+        self.assets_imported += count
+        self.report()
+
+    def report(self):
+        """
+        Call the callback with the current counts.
+        """
+        if self.callback is not None:
+            self.callback(blocks_imported=self.blocks_imported, assets_imported=self.assets_imported)
+
 
 def import_static_content(
         course_data_path, static_content_store,
-        target_course_id, subpath='static', verbose=False):
+        target_course_id, subpath='static', verbose=False, thumbnail_queue=None, progress=None):
+    """
+    Import the files under course_data_path/subpath into static_content_store, a batch at a time.
+
+    If thumbnail_queue is given, thumbnails aren't generated here; instead it's called with the
+    keys of each batch of newly written images so their thumbnails can be generated later.
+    Otherwise thumbnails are generated inline.
 
+    If given, progress (an ImportProgress) is told about each saved batch.
+
+    Returns a dict mapping the imported files' paths to their asset keys.
+    """
     remap_dict = {}
+    batch = []
 
     # now import all static assets
     static_dir = course_data_path / subpath
@@ -115,34 +164,61 @@ def import_static_content(
                 import_path=fullname_with_subpath, locked=locked
             )
 
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
+            if thumbnail_queue is None:
+                # first let's save a thumbnail so we can get back a thumbnail location
+                thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
 
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
+                if thumbnail_content is not None:
+                    content.thumbnail_location = thumbnail_location
 
-            # then commit the content
-            try:
-                static_content_store.save(content)
-            except Exception as err:
-                log.exception(u'Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
-                ))
+            # then commit the content along with the rest of its batch
+            batch.append(content)
+            if len(batch) >= STATIC_CONTENT_BATCH_SIZE:
+                _save_static_content_batch(static_content_store, batch, thumbnail_queue, progress)
+                batch = []
 
             # store the remapping information which will be needed
             # to subsitute in the module data
             remap_dict[fullname_with_subpath] = asset_key
 
+    _save_static_content_batch(static_content_store, batch, thumbnail_queue, progress)
+
     return remap_dict
 
 
+def _save_static_content_batch(static_content_store, batch, thumbnail_queue, progress=None):
+    """
+    Save a batch of static content, and queue the thumbnails of the images which were written.
+    """
+    if not batch:
+        return
+    try:
+        saved = static_content_store.save_many(batch)
+    except Exception as err:  # pylint: disable=broad-except
+        log.exception(u'Error importing {0}, error={1}'.format(
+            u', '.join(content.import_path for content in batch), err
+        ))
+        return
+
+    if progress is not None:
+        progress.assets_saved(len(batch))
+
+    if thumbnail_queue is not None:
+        images = [
+            content.location for content in saved
+            if content.content_type is not None and content.content_type.split('/')[0] == 'image'
+        ]
+        if images:
+            thumbnail_queue(images)
+
+
 def import_from_xml(
         store, user_id, data_dir, course_dirs=None,
         default_class='xmodule.raw_module.RawDescriptor',
         load_error_modules=True, static_content_store=None,
         target_course_id=None, verbose=False,
         do_import_static=True, create_course_if_not_present=False,
-        raise_on_failure=False):
+        raise_on_failure=False, thumbnail_queue=None, progress_callback=None):
     """
     Import xml-based courses from data_dir into modulestore.
 
@@ -173,6 +249,12 @@ def import_from_xml(
         create_course_if_not_present: If True, then a new course is created if it doesn't already exist.
             Otherwise, it throws an InvalidLocationError if the course does not exist.
 
+        thumbnail_queue: if given, a callable which gets the keys of imported images so that their thumbnails
+            can be generated in the background rather than during the import (see import_static_content).
+
+        progress_callback: if given, a callable which is regularly called with the `blocks_imported` and
+            `assets_imported` counts (of the course being imported) as keyword arguments.
+
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
     """
 
@@ -218,6 +300,7 @@ def import_from_xml(
                 )
                 continue
 
+        progress = ImportProgress(progress_callback)
         with store.bulk_operations(dest_course_id):
             source_course = xml_module_store.get_course(course_key)
             # STEP 1: find and import course module
@@ -227,10 +310,12 @@ def import_from_xml(
                 do_import_static, verbose
             )
             new_courses.append(course)
+            progress.block_imported()
 
             # STEP 2: import static content
             _import_static_content_wrapper(
-                static_content_store, do_import_static, course_data_path, dest_course_id, verbose
+                static_content_store, do_import_static, course_data_path, dest_course_id, verbose,
+                thumbnail_queue=thumbnail_queue, progress=progress
             )
 
             # Import asset metadata stored in XML.
@@ -266,6 +351,7 @@ def import_from_xml(
                                 do_import_static=do_import_static,
                                 runtime=course.runtime
                             )
+                            progress.block_imported()
                             depth_first(child)
 
                 depth_first(source_course)
@@ -282,6 +368,7 @@ def import_from_xml(
                         do_import_static=do_import_static,
                         runtime=course.runtime
                     )
+                    progress.block_imported()
 
             # STEP 4: import any DRAFT items
             with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, dest_course_id):
@@ -294,6 +381,7 @@ def import_from_xml(
                     dest_course_id,
                     course.runtime
                 )
+            progress.report()
 
     return new_courses
 
@@ -421,13 +509,15 @@ def _import_course_module(
     return course, course_data_path
 
 
-def _import_static_content_wrapper(static_content_store, do_import_static, course_data_path, dest_course_id, verbose):
+def _import_static_content_wrapper(static_content_store, do_import_static, course_data_path, dest_course_id, verbose,
+                                   thumbnail_queue=None, progress=None):
     # then import all the static content
     if static_content_store is not None and do_import_static:
         # first pass to find everything in /static/
         import_static_content(
             course_data_path, static_content_store,
-            dest_course_id, subpath='static', verbose=verbose
+            dest_course_id, subpath='static', verbose=verbose, thumbnail_queue=thumbnail_queue,
+            progress=progress
         )
 
     elif verbose and not do_import_static:
@@ -450,7 +540,8 @@ def _import_static_content_wrapper(static_content_store, do_import_static, cours
     if os.path.exists(course_data_path / simport):
         import_static_content(
             course_data_path, static_content_store,
-            dest_course_id, subpath=simport, verbose=verbose
+            dest_course_id, subpath=simport, verbose=verbose, thumbnail_queue=thumbnail_queue,
+            progress=progress
         )
 
 
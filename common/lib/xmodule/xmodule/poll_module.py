@@ -19,6 +19,7 @@ from xmodule.x_module import XModule
 from xmodule.stringify import stringify_children
 from xmodule.mako_module import MakoModuleDescriptor
 from xmodule.xml_module import XmlDescriptor
+from xblock.core import XBlock
 from xblock.fields import Scope, String, Dict, Boolean, List
 
 log = logging.getLogger(__name__)
@@ -38,6 +39,7 @@ class PollFields(object):
     question = String(help="Poll question", scope=Scope.content, default='')
 
 
+@XBlock.wants('counters')
 class PollModule(PollFields, XModule):
     """Poll Module"""
     js = {
@@ -60,38 +62,64 @@ class PollModule(PollFields, XModule):
         Returns:
             json string
         """
-        if dispatch in self.poll_answers and not self.voted:
-            # FIXME: fix this, when xblock will support mutable types.
-            # Now we use this hack.
-            temp_poll_answers = self.poll_answers
-            temp_poll_answers[dispatch] += 1
-            self.poll_answers = temp_poll_answers
+        if dispatch in self.get_poll_answers() and not self.voted:
+            self.count_vote(dispatch, 1)
 
             self.voted = True
             self.poll_answer = dispatch
-            return json.dumps({'poll_answers': self.poll_answers,
-                               'total': sum(self.poll_answers.values()),
+            poll_answers = self.get_poll_answers()
+            return json.dumps({'poll_answers': poll_answers,
+                               'total': sum(poll_answers.values()),
                                'callback': {'objectName': 'Conditional'}
                                })
         elif dispatch == 'get_state':
+            poll_answers = self.get_poll_answers()
             return json.dumps({'poll_answer': self.poll_answer,
-                               'poll_answers': self.poll_answers,
-                               'total': sum(self.poll_answers.values())
+                               'poll_answers': poll_answers,
+                               'total': sum(poll_answers.values())
                                })
         elif dispatch == 'reset_poll' and self.voted and \
                 self.descriptor.xml_attributes.get('reset', 'True').lower() != 'false':
             self.voted = False
+            self.count_vote(self.poll_answer, -1)
+            self.poll_answer = ''
+            return json.dumps({'status': 'success'})
+        else:  # return error message
+            return json.dumps({'error': 'Unknown Command!'})
+
+    def count_vote(self, answer, delta):
+        """Adds delta to the number of votes for answer.
 
+        The votes are counted by the counters service where the runtime
+        provides it, so that concurrent votes don't all rewrite the
+        poll_answers of the poll.
+        """
+        counters = self.runtime.service(self, 'counters')
+        if counters is not None:
+            counters.increment(self, 'poll_answers', answer, delta)
+        else:
             # FIXME: fix this, when xblock will support mutable types.
             # Now we use this hack.
-            temp_poll_answers = self.poll_answers
-            temp_poll_answers[self.poll_answer] -= 1
+            temp_poll_answers = self.poll_answers or {}
+            temp_poll_answers[answer] = temp_poll_answers.get(answer, 0) + delta
             self.poll_answers = temp_poll_answers
 
-            self.poll_answer = ''
-            return json.dumps({'status': 'success'})
-        else:  # return error message
-            return json.dumps({'error': 'Unknown Command!'})
+    def get_poll_answers(self):
+        """Returns the number of votes for each answer.
+
+        These are the votes stored in poll_answers, plus those counted by
+        the counters service.
+        """
+        poll_answers = dict((answer['id'], 0) for answer in self.answers)
+        # FIXME: hack for resolving caching `default={}` during definition
+        # poll_answers field
+        poll_answers.update(self.poll_answers or {})
+
+        counters = self.runtime.service(self, 'counters')
+        if counters is not None:
+            for answer, count in counters.get_counts(self, 'poll_answers').iteritems():
+                poll_answers[answer] = poll_answers.get(answer, 0) + count
+        return poll_answers
 
     def get_html(self):
         """Renders parameters to template."""
@@ -110,36 +138,23 @@ class PollModule(PollFields, XModule):
         Returns:
             string - Serialize json.
         """
-        # FIXME: hack for resolving caching `default={}` during definition
-        # poll_answers field
-        if self.poll_answers is None:
-            self.poll_answers = {}
-
         answers_to_json = OrderedDict()
-
-        # FIXME: fix this, when xblock support mutable types.
-        # Now we use this hack.
-        temp_poll_answers = self.poll_answers
-
-        # Fill self.poll_answers, prepare data for template context.
         for answer in self.answers:
-            # Set default count for answer = 0.
-            if answer['id'] not in temp_poll_answers:
-                temp_poll_answers[answer['id']] = 0
             answers_to_json[answer['id']] = cgi.escape(answer['text'])
-        self.poll_answers = temp_poll_answers
+        poll_answers = self.get_poll_answers()
 
         return json.dumps({
             'answers': answers_to_json,
             'question': cgi.escape(self.question),
             # to show answered poll after reload:
             'poll_answer': self.poll_answer,
-            'poll_answers': self.poll_answers if self.voted else {},
-            'total': sum(self.poll_answers.values()) if self.voted else 0,
+            'poll_answers': poll_answers if self.voted else {},
+            'total': sum(poll_answers.values()) if self.voted else 0,
             'reset': str(self.descriptor.xml_attributes.get('reset', 'true')).lower()
         })
 
 
+@XBlock.wants('counters')
 class PollDescriptor(PollFields, MakoModuleDescriptor, XmlDescriptor):
     _tag_name = 'poll_question'
     _child_tag_name = 'answer'
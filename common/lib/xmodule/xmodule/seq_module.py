@@ -55,6 +55,22 @@ class SequenceFields(object):
         scope=Scope.content,
     )
 
+    lazy_units = Boolean(
+        display_name=_("Load Units on Demand"),
+        help=_(
+            "Render only the unit being viewed with the page, and each other unit when the learner goes to it. "
+            "The JavaScript and CSS of the units' components must be part of the courseware page."
+        ),
+        default=False,
+        scope=Scope.settings,
+    )
+    prefetch_next_unit = Boolean(
+        display_name=_("Prefetch Next Unit"),
+        help=_("When units are loaded on demand, load the unit after the one being viewed in the background."),
+        default=True,
+        scope=Scope.settings,
+    )
+
 
 class SequenceModule(SequenceFields, XModule):
     ''' Layout module which lays out content in a temporal sequence
@@ -106,6 +122,13 @@ class SequenceModule(SequenceFields, XModule):
             else:
                 self.position = 1
             return json.dumps({'success': True})
+        elif dispatch == 'render_unit':
+            # render a unit which wasn't rendered with the page (see lazy_units)
+            children = self.get_display_items()
+            position = data.get('position', u'')
+            if not position.isdigit() or not 1 <= int(position) <= len(children):
+                raise NotFoundError('Unexpected position {}'.format(position))
+            return json.dumps({'html': children[int(position) - 1].render(STUDENT_VIEW).content})
         raise NotFoundError('Unexpected dispatch type')
 
     def student_view(self, context):
@@ -119,14 +142,19 @@ class SequenceModule(SequenceFields, XModule):
 
         fragment = Fragment()
 
-        for child in self.get_display_items():
+        for index, child in enumerate(self.get_display_items()):
             progress = child.get_progress()
-            rendered_child = child.render(STUDENT_VIEW, context)
-            fragment.add_frag_resources(rendered_child)
+            if self.lazy_units and index != self.position - 1:
+                # rendered when the learner goes to it, with handle_ajax('render_unit')
+                content = None
+            else:
+                rendered_child = child.render(STUDENT_VIEW, context)
+                fragment.add_frag_resources(rendered_child)
+                content = rendered_child.content
 
             titles = child.get_content_titles()
             childinfo = {
-                'content': rendered_child.content,
+                'content': content,
                 'title': "\n".join(titles),
                 'page_title': titles[0] if titles else '',
                 'progress_status': Progress.to_js_status_str(progress),
@@ -144,6 +172,7 @@ class SequenceModule(SequenceFields, XModule):
                   'position': self.position,
                   'tag': self.location.category,
                   'ajax_url': self.system.ajax_url,
+                  'prefetch': self.lazy_units and self.prefetch_next_unit,
                   }
 
         fragment.add_content(self.system.render_template('seq_module.html', params))
@@ -13,6 +13,7 @@ import pprint
 import unittest
 import inspect
 
+from collections import defaultdict
 from contextlib import contextmanager
 from lazy import lazy
 from mock import Mock
@@ -179,6 +180,26 @@ class ModelsTest(unittest.TestCase):
         self.assertEqual(str(vc), vc_str)
 
 
+class DictCountersService(object):
+    """
+    An in-memory counters service, counting by block usage id, counts name and key.
+    """
+    def __init__(self):
+        self.counts = defaultdict(lambda: defaultdict(int))
+
+    def increment(self, block, name, key, delta=1):
+        """
+        Adds delta to the count of key in the counts called name of block.
+        """
+        self.counts[(block.scope_ids.usage_id, name)][key] += delta
+
+    def get_counts(self, block, name):
+        """
+        Returns the {key: count} dict of the counts called name of block.
+        """
+        return dict(self.counts[(block.scope_ids.usage_id, name)])
+
+
 class LogicTest(unittest.TestCase):
     """Base class for testing xmodule logic."""
     descriptor_class = None
@@ -0,0 +1,41 @@
+"""
+Tests of the sets of block types computed from their XBlock classes.
+"""
+import unittest
+
+from mock import Mock, patch
+from xblock.core import XBlock
+
+from xmodule.block_types import LazyBlockTypes
+
+
+def has_children(block_class):
+    """
+    Returns whether the instances of block_class have children.
+    """
+    return getattr(block_class, 'has_children', False)
+
+
+class LazyBlockTypesTest(unittest.TestCase):
+    """
+    Tests of LazyBlockTypes.
+    """
+    def test_contains(self):
+        block_types = LazyBlockTypes(has_children)
+        with patch.object(XBlock, 'load_classes') as mock_load_classes:
+            self.assertIn('sequential', block_types)
+            self.assertNotIn('html', block_types)
+        # only the classes of the block types asked for are loaded
+        self.assertFalse(mock_load_classes.called)
+
+    def test_iter(self):
+        self.assertEqual(
+            set(LazyBlockTypes(has_children)),
+            set(name for name, block_class in XBlock.load_classes() if has_children(block_class))
+        )
+
+    def test_contains_unregistered(self):
+        block_types = LazyBlockTypes(has_children)
+        with patch.object(XBlock, 'load_classes', return_value=[('temp_block', Mock(has_children=True))]):
+            self.assertIn('temp_block', block_types)
+            self.assertNotIn('no_such_block', block_types)
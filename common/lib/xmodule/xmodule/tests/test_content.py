@@ -80,6 +80,24 @@ class FakeGridFsItem:
         return chunk
 
 
+class FakeGridOut(FakeGridFsItem):
+    """
+    A FakeGridFsItem which, like GridOut, can also be read one stored chunk at a time
+    """
+    def __init__(self, string_data, chunk_size):
+        FakeGridFsItem.__init__(self, string_data)
+        self.chunk_size = chunk_size
+        self.reads = 0
+
+    def readchunk(self):
+        """
+        Read from the cursor to the end of the chunk it is in and move the cursor
+        """
+        self.reads += 1
+        chunk_end = (self.cursor // self.chunk_size + 1) * self.chunk_size
+        return self.read(chunk_end - self.cursor)
+
+
 @ddt.ddt
 class ContentTest(unittest.TestCase):
     def test_thumbnail_none(self):
@@ -161,6 +179,28 @@ class ContentTest(unittest.TestCase):
 
         self.assertEqual(total_length, last_byte - first_byte + 1)
 
+    def test_static_content_stream_reads_whole_chunks(self):
+        """
+        Test that StaticContentStream reads GridFS-like streams one stored chunk at a time,
+        including when the range starts and ends in the middle of chunks
+        """
+        item = FakeGridOut(SAMPLE_STRING, 256)
+        static_content_stream = StaticContentStream('loc', 'name', 'type', item, length=item.length)
+
+        self.assertEqual(''.join(static_content_stream.stream_data()), SAMPLE_STRING)
+        self.assertEqual(item.reads, item.length // 256 + 2)
+
+        data = ''.join(static_content_stream.stream_data_in_range(100, 1500))
+        self.assertEqual(data, SAMPLE_STRING[100:1501])
+
+    def test_static_content_stream_data_in_range(self):
+        """
+        Test that in memory StaticContent can also be streamed within a range
+        """
+        content = StaticContent('loc', 'name', 'type', SAMPLE_STRING, length=len(SAMPLE_STRING))
+        data = ''.join(content.stream_data_in_range(100, 1500))
+        self.assertEqual(data, SAMPLE_STRING[100:1501])
+
     def test_static_content_write_js(self):
         """
         Test that only one filename starts with 000.
@@ -3,6 +3,7 @@ Tests that check that we ignore the appropriate files when importing courses.
 """
 import unittest
 from mock import Mock
+from xmodule.modulestore import xml_importer
 from xmodule.modulestore.xml_importer import import_static_content
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from xmodule.tests import DATA_DIR
@@ -16,7 +17,7 @@ class IgnoredFilesTestCase(unittest.TestCase):
         content_store = Mock()
         content_store.generate_thumbnail.return_value = ("content", "location")
         import_static_content(course_dir, content_store, course_id)
-        saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
+        saved_static_content = [content for call in content_store.save_many.call_args_list for content in call[0][0]]
         name_val = {sc.name: sc.data for sc in saved_static_content}
         self.assertIn("example.txt", name_val)
         self.assertNotIn("example.txt~", name_val)
@@ -31,7 +32,7 @@ class IgnoredFilesTestCase(unittest.TestCase):
         content_store = Mock()
         content_store.generate_thumbnail.return_value = ("content", "location")
         import_static_content(course_dir, content_store, course_id)
-        saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
+        saved_static_content = [content for call in content_store.save_many.call_args_list for content in call[0][0]]
         name_val = {sc.name: sc.data for sc in saved_static_content}
         self.assertIn("example.txt", name_val)
         self.assertIn(".example.txt", name_val)
@@ -39,3 +40,36 @@ class IgnoredFilesTestCase(unittest.TestCase):
         self.assertNotIn(".DS_Store", name_val)
         self.assertIn("GREEN", name_val["example.txt"])
         self.assertIn("BLUE", name_val[".example.txt"])
+
+
+class ImportStaticBatchTestCase(unittest.TestCase):
+    "Tests for the batched saving of static content"
+    def setUp(self):
+        self.course_dir = DATA_DIR / "dot-underscore"
+        self.course_id = SlashSeparatedCourseKey("edX", "dot-underscore", "2014_Fall")
+        self.content_store = Mock()
+        self.content_store.save_many.side_effect = list
+
+    def test_batches(self):
+        """
+        Test that static content is saved in batches of STATIC_CONTENT_BATCH_SIZE
+        """
+        original_batch_size = xml_importer.STATIC_CONTENT_BATCH_SIZE
+        xml_importer.STATIC_CONTENT_BATCH_SIZE = 1
+        try:
+            import_static_content(self.course_dir, self.content_store, self.course_id)
+        finally:
+            xml_importer.STATIC_CONTENT_BATCH_SIZE = original_batch_size
+        batches = [call[0][0] for call in self.content_store.save_many.call_args_list]
+        self.assertEqual(len(batches), 2)
+        self.assertTrue(all(len(batch) == 1 for batch in batches))
+
+    def test_thumbnail_queue(self):
+        """
+        Test that no thumbnail is generated inline when a thumbnail queue is given
+        """
+        thumbnail_queue = Mock()
+        import_static_content(self.course_dir, self.content_store, self.course_id, thumbnail_queue=thumbnail_queue)
+        self.assertFalse(self.content_store.generate_thumbnail.called)
+        # there are no images in this course
+        self.assertFalse(thumbnail_queue.called)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """Test for Poll Xmodule functional logic."""
 from xmodule.poll_module import PollDescriptor
-from . import LogicTest
+from . import DictCountersService, LogicTest
 
 
 class PollModuleTest(LogicTest):
@@ -30,3 +30,24 @@ class PollModuleTest(LogicTest):
         self.assertEqual(total, 2)
         self.assertDictEqual(callback, {'objectName': 'Conditional'})
         self.assertEqual(self.xmodule.poll_answer, 'No')
+
+
+class PollModuleCountersTest(PollModuleTest):
+    """Logic tests for Poll Xmodule, counting the votes with the counters service."""
+
+    def setUp(self):
+        super(PollModuleCountersTest, self).setUp()
+        self.counters = DictCountersService()
+        self.system._services['counters'] = self.counters  # pylint: disable=protected-access
+
+    def test_good_ajax_request(self):
+        super(PollModuleCountersTest, self).test_good_ajax_request()
+        # the vote is counted without rewriting the votes of all students
+        self.assertEqual(self.xmodule.poll_answers, {'Yes': 1, 'Dont_know': 0, 'No': 0})
+        self.assertEqual(self.counters.get_counts(self.xmodule, 'poll_answers'), {'No': 1})
+
+    def test_reset_poll(self):
+        self.ajax_request('No', {})
+        self.assertDictEqual(self.ajax_request('reset_poll', {}), {'status': 'success'})
+        self.assertEqual(self.counters.get_counts(self.xmodule, 'poll_answers'), {'No': 0})
+        self.assertEqual(self.ajax_request('get_state', {})['total'], 1)
@@ -0,0 +1,56 @@
+"""
+Tests for sequence module.
+"""
+import json
+
+from fs.memoryfs import MemoryFS
+from xmodule.exceptions import NotFoundError
+from xmodule.tests import get_test_system
+from xmodule.tests.xml import XModuleXmlImportTest
+from xmodule.tests.xml import factories as xml
+from xmodule.x_module import STUDENT_VIEW
+
+
+class SequenceModuleTestCase(XModuleXmlImportTest):
+    """
+    Tests of rendering the units of a sequence
+    """
+    test_html_1 = 'Test HTML 1'
+    test_html_2 = 'Test HTML 2'
+
+    def setUp(self):
+        super(SequenceModuleTestCase, self).setUp()
+        course = xml.CourseFactory.build()
+        sequence = xml.SequenceFactory.build(parent=course)
+        for text in (self.test_html_1, self.test_html_2):
+            vertical = xml.VerticalFactory.build(parent=sequence)
+            xml.HtmlFactory(parent=vertical, text=text)
+
+        self.course = self.process_xml(course)
+        self.module_system = get_test_system()
+        self.module_system.descriptor_runtime = self.course._runtime  # pylint: disable=protected-access
+        self.course.runtime.export_fs = MemoryFS()
+
+        self.sequence = self.course.get_children()[0]
+        self.sequence.xmodule_runtime = self.module_system
+
+    def test_render_student_view(self):
+        html = self.module_system.render(self.sequence, STUDENT_VIEW, {}).content
+        self.assertIn(self.test_html_1, html)
+        self.assertIn(self.test_html_2, html)
+
+    def test_render_lazy_units(self):
+        self.sequence.lazy_units = True
+        self.sequence.position = 2
+        html = self.module_system.render(self.sequence, STUDENT_VIEW, {}).content
+        self.assertNotIn(self.test_html_1, html)
+        self.assertIn(self.test_html_2, html)
+
+        unit = json.loads(self.sequence.handle_ajax('render_unit', {'position': u'1'}))
+        self.assertIn(self.test_html_1, unit['html'])
+        self.assertNotIn(self.test_html_2, unit['html'])
+
+    def test_render_unit_bad_position(self):
+        for position in (u'0', u'3', u'first'):
+            with self.assertRaises(NotFoundError):
+                self.sequence.handle_ajax('render_unit', {'position': position})
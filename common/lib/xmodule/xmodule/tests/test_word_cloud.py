@@ -3,7 +3,7 @@
 
 from webob.multidict import MultiDict
 from xmodule.word_cloud_module import WordCloudDescriptor
-from . import LogicTest
+from . import DictCountersService, LogicTest
 
 
 class WordCloudModuleTest(LogicTest):
@@ -46,3 +46,27 @@ class WordCloudModuleTest(LogicTest):
         self.assertEqual(
             100.0,
             sum(i['percent'] for i in response['top_words']))
+
+
+class WordCloudModuleCountersTest(WordCloudModuleTest):
+    """Logic tests for Word Cloud Xmodule, counting the words with the counters service."""
+
+    def setUp(self):
+        super(WordCloudModuleCountersTest, self).setUp()
+        self.counters = DictCountersService()
+        self.system._services['counters'] = self.counters  # pylint: disable=protected-access
+
+    def test_good_ajax_request(self):
+        super(WordCloudModuleCountersTest, self).test_good_ajax_request()
+        # the words are counted without rewriting the words of all students
+        self.assertEqual(self.xmodule.all_words, {'cat': 10, 'dog': 5, 'mom': 1, 'dad': 2})
+        self.assertEqual(self.counters.get_counts(self.xmodule, 'all_words'), {'cat': 2, 'dog': 1, 'sun': 1})
+
+    def test_top_words(self):
+        self.xmodule.num_top_words = 2
+        post_data = MultiDict(('student_words[]', word) for word in ['dad', 'dad', 'dad', 'dad'])
+        response = self.ajax_request('submit', post_data)
+        self.assertEqual(
+            sorted((word['text'], word['size']) for word in response['top_words']),
+            [('cat', 10), ('dad', 6)]
+        )
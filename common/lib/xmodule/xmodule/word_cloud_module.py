@@ -6,14 +6,18 @@ If student does not yet answered - `num_inputs` numbers of text inputs.
 If student have answered - words he entered and cloud.
 """
 
+import heapq
 import json
 import logging
+from collections import Counter
+from operator import itemgetter
 
 from pkg_resources import resource_string
 from xmodule.raw_module import EmptyDataRawDescriptor
 from xmodule.editing_module import MetadataOnlyEditingDescriptor
 from xmodule.x_module import XModule
 
+from xblock.core import XBlock
 from xblock.fields import Scope, Dict, Boolean, List, Integer, String
 
 log = logging.getLogger(__name__)
@@ -82,6 +86,7 @@ class WordCloudFields(object):
     )
 
 
+@XBlock.wants('counters')
 class WordCloudModule(WordCloudFields, XModule):
     """WordCloud Xmodule"""
     js = {
@@ -99,7 +104,12 @@ class WordCloudModule(WordCloudFields, XModule):
     def get_state(self):
         """Return success json answer for client."""
         if self.submitted:
-            total_count = sum(self.all_words.itervalues())
+            all_words = self.get_all_words()
+            if self.runtime.service(self, 'counters') is not None:
+                top_words = self.top_dict(all_words, self.num_top_words)
+            else:
+                top_words = self.top_words
+            total_count = sum(all_words.itervalues())
             return json.dumps({
                 'status': 'success',
                 'submitted': True,
@@ -107,10 +117,11 @@ class WordCloudModule(WordCloudFields, XModule):
                     self.display_student_percents
                 ),
                 'student_words': {
-                    word: self.all_words[word] for word in self.student_words
+                    # the cached counts of the counters service may not include the student's words yet
+                    word: all_words.get(word, 0) for word in self.student_words
                 },
                 'total_count': total_count,
-                'top_words': self.prepare_words(self.top_words, total_count)
+                'top_words': self.prepare_words(top_words, total_count)
             })
         else:
             return json.dumps({
@@ -122,6 +133,19 @@ class WordCloudModule(WordCloudFields, XModule):
                 'top_words': {}
             })
 
+    def get_all_words(self):
+        """Return the number of occurrences of every word from all students.
+
+        These are the words stored in all_words, plus those counted by the
+        counters service.
+        """
+        all_words = dict(self.all_words)
+        counters = self.runtime.service(self, 'counters')
+        if counters is not None:
+            for word, count in counters.get_counts(self, 'all_words').iteritems():
+                all_words[word] = all_words.get(word, 0) + count
+        return all_words
+
     def good_word(self, word):
         """Convert raw word to suitable word."""
         return word.strip().lower()
@@ -170,13 +194,7 @@ class WordCloudModule(WordCloudFields, XModule):
         :type amount: int
         :rtype: dict
         """
-        return dict(
-            sorted(
-                dict_obj.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:amount]
-        )
+        return dict(heapq.nlargest(amount, dict_obj.iteritems(), key=itemgetter(1)))
 
     def handle_ajax(self, dispatch, data):
         """Ajax handler.
@@ -201,14 +219,22 @@ class WordCloudModule(WordCloudFields, XModule):
             student_words = filter(None, map(self.good_word, raw_student_words))
 
             self.student_words = student_words
+            self.submitted = True
+
+            counters = self.runtime.service(self, 'counters')
+            if counters is not None:
+                # Count the words without rewriting all_words and top_words,
+                # which every other student submitting at the same time
+                # would rewrite too.
+                for word, count in Counter(student_words).iteritems():
+                    counters.increment(self, 'all_words', word, count)
+                return self.get_state()
 
             # FIXME: fix this, when xblock will support mutable types.
             # Now we use this hack.
             # speed issues
             temp_all_words = self.all_words
 
-            self.submitted = True
-
             # Save in all_words.
             for word in self.student_words:
                 temp_all_words[word] = temp_all_words.get(word, 0) + 1
@@ -244,6 +270,7 @@ class WordCloudModule(WordCloudFields, XModule):
         return self.content
 
 
+@XBlock.wants('counters')
 class WordCloudDescriptor(WordCloudFields, MetadataOnlyEditingDescriptor, EmptyDataRawDescriptor):
     """Descriptor for WordCloud Xmodule."""
     module_class = WordCloudModule
@@ -17,7 +17,7 @@ from webob import Response
 from webob.multidict import MultiDict
 
 from xblock.core import XBlock, XBlockAside
-from xblock.fields import Scope, Integer, Float, List, XBlockMixin, String, Dict, ScopeIds, Reference, \
+from xblock.fields import Scope, UserScope, Integer, Float, List, XBlockMixin, String, Dict, ScopeIds, Reference, \
     ReferenceList, ReferenceValueDict
 from xblock.fragment import Fragment
 from xblock.runtime import Runtime, IdReader, IdGenerator
@@ -534,9 +534,43 @@ class XModuleMixin(XBlockMixin):
             field_data (:class:`FieldData`): The :class:`FieldData` to use for all subsequent data access
         """
         # pylint: disable=attribute-defined-outside-init
+        if self.xmodule_runtime is None:
+            # keep the authored field data to unbind back to
+            self._unbound_field_data = self._field_data
+        self._clear_student_field_values()
         self.xmodule_runtime = xmodule_runtime
         self._field_data = field_data
 
+    def unbind(self):
+        """
+        Undo bind_for_student, so that a descriptor kept across requests (see
+        xmodule.modulestore.split_mongo.descriptor_cache) doesn't act for the student of a previous one.
+        """
+        if self.xmodule_runtime is None:
+            return
+        # pylint: disable=attribute-defined-outside-init
+        # the values not saved yet are the previous student's too
+        self._clear_student_field_values(keep_dirty=False)
+        self._field_data = getattr(self, '_unbound_field_data', self._field_data)
+        self.xmodule_runtime = None
+        # the bound children were loaded (and filtered by access) for the previous student
+        self._child_instances = None
+
+    def _clear_student_field_values(self, keep_dirty=True):
+        """
+        Drops the cached values of the fields of the student the block was bound to, except the
+        values which haven't been saved yet if keep_dirty (otherwise they're dropped unsaved).
+        """
+        if not keep_dirty:
+            for field in self._dirty_fields.keys():
+                if field.scope.user != UserScope.NONE:
+                    del self._dirty_fields[field]
+        dirty_field_names = set(field.name for field in self._dirty_fields)
+        for field_name in self._field_data_cache.keys():
+            field = self.fields.get(field_name)
+            if field is not None and field.scope.user != UserScope.NONE and field_name not in dirty_field_names:
+                del self._field_data_cache[field_name]
+
 
 class ProxyAttribute(object):
     """
@@ -0,0 +1,74 @@
+"""
+Counts aggregated over all the students of an xmodule, such as the votes of a poll or the words of a
+word cloud, stored without a single hot row.
+
+Each count is split across COUNTER_SHARDS rows of XModuleUserStateSummaryCounter: an increment
+updates one random shard in place (no read-modify-write, so no lost updates), and reading sums the
+shards. The sums are cached for settings.USER_STATE_SUMMARY_COUNTER_CACHE_TIMEOUT seconds
+(0 disables the cache), so that the requests which only read them (e.g. showing the results of a
+poll) don't re-aggregate them every time. An increment invalidates the cached sums rather than
+updating them, as concurrent updates of the cached sums would overwrite each other.
+"""
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import XModuleUserStateSummaryCounter
+
+# Number of rows each count is split across
+COUNTER_SHARDS = 16
+
+
+def _cache_key(usage_id, field_name):
+    """
+    Returns the cache key of the counts of field_name for usage_id.
+    """
+    return u'user_state_summary_counts.{}.{}'.format(usage_id, field_name)
+
+
+def increment(usage_id, field_name, key, delta=1):
+    """
+    Adds delta to the count of key in the field_name counts of usage_id.
+    """
+    shard = random.randrange(COUNTER_SHARDS)
+    rows = XModuleUserStateSummaryCounter.objects.filter(
+        usage_id=usage_id, field_name=field_name, key=key, shard=shard
+    )
+    if not rows.update(count=F('count') + delta):
+        savepoint = transaction.savepoint()
+        try:
+            XModuleUserStateSummaryCounter.objects.create(
+                usage_id=usage_id, field_name=field_name, key=key, shard=shard, count=delta
+            )
+            transaction.savepoint_commit(savepoint)
+        except IntegrityError:
+            # Another request has just created this shard
+            transaction.savepoint_rollback(savepoint)
+            rows.update(count=F('count') + delta)
+
+    cache.delete(_cache_key(usage_id, field_name))
+
+
+def get_counts(usage_id, field_name):
+    """
+    Returns the {key: count} dict of the field_name counts of usage_id.
+    """
+    timeout = settings.USER_STATE_SUMMARY_COUNTER_CACHE_TIMEOUT
+    cache_key = _cache_key(usage_id, field_name)
+    if timeout:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+
+    counts = {
+        row['key']: row['total']
+        for row in XModuleUserStateSummaryCounter.objects.filter(
+            usage_id=usage_id, field_name=field_name
+        ).values('key').annotate(total=Sum('count'))
+    }
+    if timeout:
+        cache.set(cache_key, counts, timeout)
+    return dict(counts)
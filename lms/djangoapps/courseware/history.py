@@ -0,0 +1,141 @@
+"""
+Writing of the StudentModuleHistory rows recorded when StudentModules are saved.
+
+settings.STUDENT_MODULE_HISTORY_WRITE_MODE chooses how they are written:
+
+- 'immediate': each row is inserted when its StudentModule is saved.
+- 'batched': the rows recorded while handling a request are inserted together,
+  with bulk_create, once the response has been returned.
+- 'async': as batched, but the rows are inserted by a celery task.
+
+Outside of requests (e.g. in celery tasks and management commands), the rows are
+always inserted immediately. In the buffered modes, at most
+settings.STUDENT_MODULE_HISTORY_BATCH_SIZE rows are buffered at once: beyond that,
+they're inserted in the request's transaction. The rows buffered by a request whose
+transaction is rolled back are discarded, as its StudentModules weren't saved.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.core.signals import got_request_exception, request_finished, request_started
+from django.dispatch import receiver
+
+log = logging.getLogger(__name__)
+
+IMMEDIATE = 'immediate'
+BATCHED = 'batched'
+ASYNC = 'async'
+
+# Number of entries buffered at most, unless settings.STUDENT_MODULE_HISTORY_BATCH_SIZE is set
+DEFAULT_BATCH_SIZE = 100
+
+# Fields of StudentModuleHistory passed to the celery task in the 'async' mode
+HISTORY_FIELDS = ('student_module_id', 'version', 'created', 'state', 'grade', 'max_grade')
+
+
+def write_mode():
+    """
+    Returns the STUDENT_MODULE_HISTORY_WRITE_MODE, which is only set in the LMS.
+    """
+    return getattr(settings, 'STUDENT_MODULE_HISTORY_WRITE_MODE', IMMEDIATE)
+
+
+class StudentModuleHistoryWriter(threading.local):
+    """
+    Buffers the StudentModuleHistory entries recorded by each thread while it handles a request.
+    """
+    def __init__(self):
+        super(StudentModuleHistoryWriter, self).__init__()
+        self.buffering = False
+        self.entries = []
+
+    def add(self, entry):
+        """
+        Writes the unsaved StudentModuleHistory entry, now or when this thread's request is done.
+        """
+        if not self.buffering or write_mode() == IMMEDIATE:
+            entry.save()
+            return
+
+        self.entries.append(entry)
+        if len(self.entries) >= getattr(settings, 'STUDENT_MODULE_HISTORY_BATCH_SIZE', DEFAULT_BATCH_SIZE):
+            # in the request's transaction, even in the 'async' mode, so that they're rolled back with it
+            entries, self.entries = self.entries, []
+            type(entries[0]).objects.bulk_create(entries)
+
+    def start_buffering(self):
+        """
+        Buffers the entries added from now on, until `stop_buffering`.
+        """
+        self.buffering = True
+
+    def stop_buffering(self):
+        """
+        Writes the buffered entries, and writes the entries added from now on immediately.
+        """
+        self.buffering = False
+        self.flush()
+
+    def discard(self):
+        """
+        Forgets the buffered entries, whose StudentModules have been rolled back.
+        """
+        self.entries = []
+
+    def flush(self):
+        """
+        Writes the buffered entries.
+        """
+        entries, self.entries = self.entries, []
+        if not entries:
+            return
+
+        if write_mode() == ASYNC:
+            # imported here, as the tasks use the models which use this module
+            from courseware.tasks import save_student_module_history
+            save_student_module_history.delay([task_entry(entry) for entry in entries])
+        else:
+            type(entries[0]).objects.bulk_create(entries)
+
+
+def task_entry(entry):
+    """
+    Returns the dict of the HISTORY_FIELDS of the entry passed to the celery task, which must be JSON
+    serializable: the datetime `created` is passed in the ISO 8601 format.
+    """
+    task_fields = {field: getattr(entry, field) for field in HISTORY_FIELDS}
+    task_fields['created'] = task_fields['created'].isoformat()
+    return task_fields
+
+
+history_writer = StudentModuleHistoryWriter()  # pylint: disable=invalid-name
+
+
+@receiver(request_started)
+def start_buffering_history(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Buffers the history entries recorded while handling the request.
+    """
+    if write_mode() != IMMEDIATE:
+        history_writer.start_buffering()
+
+
+@receiver(request_finished)
+def flush_history(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Writes the history entries recorded while handling the request.
+    """
+    try:
+        history_writer.stop_buffering()
+    except Exception:  # pylint: disable=broad-except
+        # The response has already been returned: all that's left to do is to report it.
+        log.exception("Couldn't write the history of the student modules saved by the request")
+
+
+@receiver(got_request_exception)
+def discard_history(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discards the history entries recorded by a request which failed, as its transaction was rolled back.
+    """
+    history_writer.discard()
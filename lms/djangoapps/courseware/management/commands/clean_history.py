@@ -4,19 +4,25 @@ When we added XBlock storage, each field modification wrote a new history row
 to the db.  Now that we have bulk saves to avoid that database hammering, we
 need to clean out the unnecessary rows from the database.
 
-This command that does that.
+This command that does that.  It can also delete the rows older than a
+retention period, and process ranges of student_module_ids in parallel.
 
 """
 
 import datetime
 import json
 import logging
+import multiprocessing
 import optparse
 import time
 import traceback
 
 from django.core.management.base import NoArgsCommand
 from django.db import connection
+from django.utils import timezone
+
+# History rows this close can be discarded.
+DEFAULT_DELETE_GAP_SECS = 0.5
 
 
 class Command(NoArgsCommand):
@@ -43,29 +49,114 @@ class Command(NoArgsCommand):
             default=0,
             help="Seconds to sleep between batches.",
         ),
+        optparse.make_option(
+            '--gap',
+            type='float',
+            default=DEFAULT_DELETE_GAP_SECS,
+            help="Seconds within which a row is discarded if followed by another.",
+        ),
+        optparse.make_option(
+            '--keep-days',
+            type='int',
+            default=None,
+            help="Delete the rows older than this many days, except the latest of each student module.",
+        ),
+        optparse.make_option(
+            '--workers',
+            type='int',
+            default=1,
+            help="Number of processes cleaning ranges of student_module_ids in parallel.",
+        ),
     )
 
     def handle_noargs(self, **options):
         # We don't want to see the SQL output from the db layer.
         logging.getLogger("django.db.backends").setLevel(logging.INFO)
 
-        smhc = StudentModuleHistoryCleaner(
-            dry_run=options["dry_run"],
+        cleaner_kwargs = {
+            'dry_run': options["dry_run"],
+            'delete_gap_secs': options["gap"],
+            'keep_days': options["keep_days"],
+        }
+        if options["workers"] > 1:
+            clean_in_parallel(options["workers"], options["batch"], options["sleep"], cleaner_kwargs)
+        else:
+            smhc = StudentModuleHistoryCleaner(**cleaner_kwargs)
+            smhc.main(batch_size=options["batch"], sleep=options["sleep"])
+
+
+def id_ranges(last_id, count):
+    """
+    Split the ids from 0 to `last_id` (included) into `count` ranges.
+
+    Returns a list of (first_id, last_id) tuples, ignoring empty ranges.
+
+    """
+    size = last_id // count + 1
+    return [
+        (first, min(first + size - 1, last_id))
+        for first in range(0, last_id + 1, size)
+    ]
+
+
+def clean_range(index, first_id, last_id, batch_size, sleep, cleaner_kwargs):
+    """
+    Clean the history of the student_module_ids from `first_id` to `last_id`.
+
+    Runs in a worker process started by `clean_in_parallel`, keeping its
+    progress in its own state file.
+
+    """
+    smhc = StudentModuleHistoryCleaner(
+        first_student_module_id=first_id,
+        last_student_module_id=last_id,
+        state_file="clean_history.{}.json".format(index),
+        **cleaner_kwargs
+    )
+    smhc.main(batch_size=batch_size, sleep=sleep)
+
+
+def clean_in_parallel(workers, batch_size, sleep, cleaner_kwargs):
+    """
+    Clean the history with `workers` processes, each cleaning a range of student_module_ids.
+    """
+    last_id = StudentModuleHistoryCleaner(**cleaner_kwargs).get_last_student_module_id()
+    if last_id is None:
+        return
+
+    # The workers must not share the connection of this process.
+    connection.close()
+    processes = [
+        multiprocessing.Process(
+            target=clean_range,
+            args=(index, first_id, range_last_id, batch_size, sleep, cleaner_kwargs),
         )
-        smhc.main(batch_size=options["batch"], sleep=options["sleep"])
+        for index, (first_id, range_last_id) in enumerate(id_ranges(last_id, workers))
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
 
 
 class StudentModuleHistoryCleaner(object):
     """Logic to clean rows from the StudentModuleHistory table."""
 
-    DELETE_GAP_SECS = 0.5   # Rows this close can be discarded.
+    DELETE_GAP_SECS = DEFAULT_DELETE_GAP_SECS
     STATE_FILE = "clean_history.json"
     BATCH_SIZE = 100
 
-    def __init__(self, dry_run=False):
+    def __init__(
+            self, dry_run=False, delete_gap_secs=None, keep_days=None,
+            first_student_module_id=0, last_student_module_id=None, state_file=None,
+    ):
         self.dry_run = dry_run
-        self.next_student_module_id = 0
-        self.last_student_module_id = 0
+        self.delete_gap_secs = self.DELETE_GAP_SECS if delete_gap_secs is None else delete_gap_secs
+        self.keep_days = keep_days
+        self.first_student_module_id = first_student_module_id
+        self.next_student_module_id = first_student_module_id
+        self.last_student_module_id = last_student_module_id
+        self.state_file = state_file or self.STATE_FILE
 
     def main(self, batch_size=None, sleep=0):
         """Invoked from the management command to do all the work."""
@@ -74,7 +165,8 @@ class StudentModuleHistoryCleaner(object):
 
         connection.enter_transaction_management()
 
-        self.last_student_module_id = self.get_last_student_module_id()
+        if self.last_student_module_id is None:
+            self.last_student_module_id = self.get_last_student_module_id()
         self.load_state()
 
         while self.next_student_module_id <= self.last_student_module_id:
@@ -111,10 +203,10 @@ class StudentModuleHistoryCleaner(object):
         Load the latest state from disk.
         """
         try:
-            state_file = open(self.STATE_FILE)
+            state_file = open(self.state_file)
         except IOError:
             self.say("No stored state")
-            self.next_student_module_id = 0
+            self.next_student_module_id = self.first_student_module_id
         else:
             with state_file:
                 state = json.load(state_file)
@@ -132,7 +224,7 @@ class StudentModuleHistoryCleaner(object):
         state = {
             'next_student_module_id': self.next_student_module_id,
         }
-        with open(self.STATE_FILE, "w") as state_file:
+        with open(self.state_file, "w") as state_file:
             json.dump(state, state_file)
         self.say("Saved state: {}".format(json.dumps(state, sort_keys=True)))
 
@@ -210,7 +302,11 @@ class StudentModuleHistoryCleaner(object):
         `student_module_id`: the id of the StudentModule to process.
 
         """
-        delete_gap = datetime.timedelta(seconds=self.DELETE_GAP_SECS)
+        delete_gap = datetime.timedelta(seconds=self.delete_gap_secs)
+        if self.keep_days is not None:
+            keep_after = timezone.now() - datetime.timedelta(days=self.keep_days)
+        else:
+            keep_after = None
 
         history = self.get_history_for_student_modules(student_module_id)
         if not history:
@@ -226,6 +322,10 @@ class StudentModuleHistoryCleaner(object):
                     # This row is followed closely by another, we can discard
                     # this one.
                     ids_to_delete.append(history_id)
+                elif keep_after is not None and created < keep_after:
+                    # This row is older than the retention period, and isn't
+                    # the latest one.
+                    ids_to_delete.append(history_id)
 
             next_created = created
 
@@ -1,7 +1,7 @@
 """Test the clean_history management command."""
 
 import fnmatch
-from mock import Mock
+from mock import Mock, patch
 import os.path
 import textwrap
 
@@ -10,7 +10,7 @@ import dateutil.parser
 from django.test import TransactionTestCase
 from django.db import connection
 
-from courseware.management.commands.clean_history import StudentModuleHistoryCleaner
+from courseware.management.commands.clean_history import StudentModuleHistoryCleaner, id_ranges
 
 # In lots of places in this file, smhc == StudentModuleHistoryCleaner
 
@@ -207,6 +207,45 @@ class HistoryCleanerNoDbTest(HistoryCleanerTest):
         self.assert_said(smhc, "Deleting 4 rows of 8 for student_module_id 17")
         smhc.delete_history.assert_called_once_with([42, 23, 15, 8])
 
+    def test_keep_days(self):
+        smhc = SmhcDbMocked(keep_days=7)
+        smhc.set_rows([
+            (4, "2013-07-01 16:30:00.000"),
+            (8, "2013-07-02 16:30:00.000"),
+            (15, "2013-07-15 16:30:00.000"),
+            (16, "2013-07-15 16:30:00.100"),    # keep
+            (23, "2013-07-16 16:30:00.000"),    # keep
+        ])
+        with patch('django.utils.timezone.now', return_value=parse_date("2013-07-20 00:00:00.000")):
+            smhc.clean_one_student_module(17)
+        self.assert_said(smhc, "Deleting 3 rows of 5 for student_module_id 17")
+        smhc.delete_history.assert_called_once_with([15, 8, 4])
+
+    def test_keep_days_keeps_latest(self):
+        smhc = SmhcDbMocked(keep_days=7)
+        smhc.set_rows([
+            (4, "2013-07-01 16:30:00.000"),
+            (8, "2013-07-02 16:30:00.000"),    # keep
+        ])
+        with patch('django.utils.timezone.now', return_value=parse_date("2013-07-20 00:00:00.000")):
+            smhc.clean_one_student_module(17)
+        smhc.delete_history.assert_called_once_with([4])
+
+    def test_gap(self):
+        smhc = SmhcDbMocked(delete_gap_secs=5)
+        smhc.set_rows([
+            (4, "2013-07-13 16:30:00.000"),
+            (8, "2013-07-13 16:30:04.000"),
+            (15, "2013-07-13 16:30:08.000"),    # keep
+        ])
+        smhc.clean_one_student_module(17)
+        smhc.delete_history.assert_called_once_with([8, 4])
+
+    def test_id_ranges(self):
+        self.assertEqual(id_ranges(9, 2), [(0, 4), (5, 9)])
+        self.assertEqual(id_ranges(10, 3), [(0, 3), (4, 7), (8, 10)])
+        self.assertEqual(id_ranges(1, 4), [(0, 0), (1, 1)])
+
 
 class HistoryCleanerWitDbTest(HistoryCleanerTest):
     """Tests of StudentModuleHistoryCleaner with a real db."""
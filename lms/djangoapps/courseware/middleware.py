@@ -6,6 +6,7 @@ from django.shortcuts import redirect
 from django.core.urlresolvers import reverse
 
 from courseware.courses import UserNotEnrolled
+from courseware.history import history_writer
 
 
 class RedirectUnenrolledMiddleware(object):
@@ -22,3 +23,13 @@ class RedirectUnenrolledMiddleware(object):
                     args=[course_key.to_deprecated_string()]
                 )
             )
+
+
+class DiscardRolledBackHistoryMiddleware(object):
+    """
+    Discard the StudentModuleHistory entries buffered by a request whose transaction is rolled back by
+    TransactionMiddleware, which must come right after this middleware (even if the exception is then
+    turned into a response by another middleware).
+    """
+    def process_exception(self, request, exception):  # pylint: disable=unused-argument
+        history_writer.discard()
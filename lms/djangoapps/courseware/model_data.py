@@ -16,7 +16,7 @@ from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.block_types import BlockTypeKeyV1
 from opaque_keys.edx.asides import AsideUsageKeyV1
 
-from django.db import DatabaseError
+from django.db import DatabaseError, IntegrityError, transaction
 
 from xblock.runtime import KeyValueStore
 from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
@@ -47,7 +47,7 @@ class FieldDataCache(object):
     A cache of django model objects needed to supply the data
     for a module and its decendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None, lazy_descendants=False):
         '''
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -60,10 +60,14 @@ class FieldDataCache(object):
         user: The user for which to cache data
         select_for_update: True if rows should be locked until end of transaction
         asides: The list of aside types to load, or None to prefetch no asides.
+        lazy_descendants: True if the objects of the descriptors which aren't in descriptors
+            should be loaded when they are bound (see `add_descriptors`)
         '''
         self.cache = {}
-        self.descriptors = descriptors
+        self.descriptors = []
+        self._loaded_usage_ids = set()
         self.select_for_update = select_for_update
+        self.lazy_descendants = lazy_descendants
 
         if asides is None:
             self.asides = []
@@ -74,15 +78,34 @@ class FieldDataCache(object):
         self.course_id = course_id
         self.user = user
 
-        if user.is_authenticated():
-            for scope, fields in self._fields_to_cache().items():
-                for field_object in self._retrieve_fields(scope, fields):
-                    self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
+        self.add_descriptors(descriptors)
+
+    def add_descriptors(self, descriptors):
+        '''
+        Find the courseware.models objects needed by the descriptors which
+        this cache doesn't have yet, and add them to the cache.
+
+        The objects already in the cache are kept, as they may have been
+        changed since they were loaded.
+        '''
+        descriptors = [
+            descriptor for descriptor in descriptors
+            if descriptor.scope_ids.usage_id not in self._loaded_usage_ids
+        ]
+        if not descriptors:
+            return
+        self.descriptors.extend(descriptors)
+        self._loaded_usage_ids.update(descriptor.scope_ids.usage_id for descriptor in descriptors)
+
+        if self.user.is_authenticated():
+            for scope, fields in self._fields_to_cache(descriptors).items():
+                for field_object in self._retrieve_fields(scope, fields, descriptors):
+                    self.cache.setdefault(self._cache_key_from_field_object(scope, field_object), field_object)
 
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
                                          descriptor_filter=lambda descriptor: True,
-                                         select_for_update=False, asides=None):
+                                         select_for_update=False, asides=None, lazy_descendants=False):
         """
         course_id: the course in the context of which we want StudentModules.
         user: the django user for whom to load modules.
@@ -92,6 +115,8 @@ class FieldDataCache(object):
         descriptor_filter is a function that accepts a descriptor and return wether the StudentModule
             should be cached
         select_for_update: Flag indicating whether the rows should be locked until end of transaction
+        lazy_descendants: Flag indicating whether the StudentModules of the other descendents should
+            be loaded when they are bound
         """
 
         def get_child_descriptors(descriptor, depth, descriptor_filter):
@@ -120,7 +145,9 @@ class FieldDataCache(object):
         with modulestore().bulk_operations(descriptor.location.course_key):
             descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
 
-        return FieldDataCache(descriptors, course_id, user, select_for_update, asides=asides)
+        return FieldDataCache(
+            descriptors, course_id, user, select_for_update, asides=asides, lazy_descendants=lazy_descendants
+        )
 
     def _query(self, model_class, **kwargs):
         """
@@ -147,14 +174,13 @@ class FieldDataCache(object):
         )
         return res
 
-    @property
-    def _all_usage_ids(self):
+    def _all_usage_ids(self, descriptors):
         """
-        Return a set of all usage_ids for the descriptors that this FieldDataCache is caching
-        against, and well as all asides for those descriptors.
+        Return a set of all usage_ids for the descriptors, and well as all asides
+        for those descriptors.
         """
         usage_ids = set()
-        for descriptor in self.descriptors:
+        for descriptor in descriptors:
             usage_ids.add(descriptor.scope_ids.usage_id)
 
             for aside_type in self.asides:
@@ -162,13 +188,13 @@ class FieldDataCache(object):
 
         return usage_ids
 
-    @property
-    def _all_block_types(self):
+    def _all_block_types(self, descriptors):
         """
-        Return a set of all block_types that are cached by this FieldDataCache.
+        Return a set of all block_types of the descriptors, and of the asides
+        cached by this FieldDataCache.
         """
         block_types = set()
-        for descriptor in self.descriptors:
+        for descriptor in descriptors:
             block_types.add(BlockTypeKeyV1(descriptor.entry_point, descriptor.scope_ids.block_type))
 
         for aside_type in self.asides:
@@ -176,15 +202,15 @@ class FieldDataCache(object):
 
         return block_types
 
-    def _retrieve_fields(self, scope, fields):
+    def _retrieve_fields(self, scope, fields, descriptors):
         """
-        Queries the database for all of the fields in the specified scope
+        Queries the database for all of the fields of the descriptors in the specified scope
         """
         if scope == Scope.user_state:
             return self._chunked_query(
                 StudentModule,
                 'module_state_key__in',
-                self._all_usage_ids,
+                self._all_usage_ids(descriptors),
                 course_id=self.course_id,
                 student=self.user.pk,
             )
@@ -192,14 +218,14 @@ class FieldDataCache(object):
             return self._chunked_query(
                 XModuleUserStateSummaryField,
                 'usage_id__in',
-                self._all_usage_ids,
+                self._all_usage_ids(descriptors),
                 field_name__in=set(field.name for field in fields),
             )
         elif scope == Scope.preferences:
             return self._chunked_query(
                 XModuleStudentPrefsField,
                 'module_type__in',
-                self._all_block_types,
+                self._all_block_types(descriptors),
                 student=self.user.pk,
                 field_name__in=set(field.name for field in fields),
             )
@@ -212,12 +238,12 @@ class FieldDataCache(object):
         else:
             return []
 
-    def _fields_to_cache(self):
+    def _fields_to_cache(self, descriptors):
         """
-        Returns a map of scopes to fields in that scope that should be cached
+        Returns a map of scopes to fields of the descriptors in that scope that should be cached
         """
         scope_map = defaultdict(set)
-        for descriptor in self.descriptors:
+        for descriptor in descriptors:
             for field in descriptor.fields.values():
                 scope_map[field.scope].add(field)
         return scope_map
@@ -305,6 +331,76 @@ class FieldDataCache(object):
         self.cache[cache_key] = field_object
         return field_object
 
+    def find_or_build(self, key):
+        '''
+        Find a model data object in this cache, or build an unsaved one (to be
+        saved by `create_field_objects`) if it doesn't exist.
+
+        StudentModules are created right away, as by `find_or_create`, as other
+        code relies on their post_save signals and ids.
+        '''
+        field_object = self.find(key)
+
+        if field_object is not None or key.scope == Scope.user_state:
+            return field_object or self.find_or_create(key)
+
+        if key.scope == Scope.user_state_summary:
+            field_object = XModuleUserStateSummaryField(
+                field_name=key.field_name,
+                usage_id=key.block_scope_id
+            )
+        elif key.scope == Scope.preferences:
+            field_object = XModuleStudentPrefsField(
+                field_name=key.field_name,
+                module_type=BlockTypeKeyV1(key.block_family, key.block_scope_id),
+                student_id=key.user_id,
+            )
+        elif key.scope == Scope.user_info:
+            field_object = XModuleStudentInfoField(
+                field_name=key.field_name,
+                student_id=key.user_id,
+            )
+
+        self.cache[self._cache_key_from_kvs_key(key)] = field_object
+        return field_object
+
+    def create_field_objects(self, scope, field_objects):
+        '''
+        Insert the unsaved field objects of `scope` built by `find_or_build`
+        with a single query, and cache them as loaded from the database.
+
+        scope: any scope but Scope.user_state
+        field_objects: a list of objects of the model storing `scope`
+        '''
+        model = type(field_objects[0])
+        unique_fields = [model._meta.get_field(name) for name in model._meta.unique_together[0]]
+
+        savepoint = transaction.savepoint()
+        try:
+            model.objects.bulk_create(field_objects)
+            transaction.savepoint_commit(savepoint)
+        except IntegrityError:
+            # Some of the rows have just been created by another request:
+            # update them one at a time instead.
+            transaction.savepoint_rollback(savepoint)
+            for field_object in field_objects:
+                existing, created = model.objects.get_or_create(
+                    defaults={'value': field_object.value},
+                    **{field.attname: getattr(field_object, field.attname) for field in unique_fields}
+                )
+                if not created:
+                    existing.value = field_object.value
+                    existing.save(force_update=True)
+
+        # bulk_create doesn't set the ids of the objects, so load them again,
+        # for later saves to update them.
+        created_objects = model.objects.filter(**{
+            '{}__in'.format(field.name): set(getattr(field_object, field.attname) for field_object in field_objects)
+            for field in unique_fields
+        })
+        for field_object in created_objects:
+            self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
+
 
 class DjangoKeyValueStore(KeyValueStore):
     """
@@ -357,12 +453,16 @@ class DjangoKeyValueStore(KeyValueStore):
         """
         Provide a bulk save mechanism.
 
+        Existing rows are updated with one query each, and the missing rows
+        of each scope but Scope.user_state are inserted with a single query.
+
         `kv_dict`: A dictionary of dirty fields that maps
           xblock.KvsFieldData._key : value
 
         """
         saved_fields = []
-        # field_objects maps a field_object to a list of associated fields
+        # field_objects maps the id() of a field_object to the field_object and its list of associated
+        # fields: field_objects can't be the keys, as the unsaved ones (without a pk) are all equal
         field_objects = dict()
         for field in kv_dict:
             # Check field for validity
@@ -370,11 +470,9 @@ class DjangoKeyValueStore(KeyValueStore):
                 raise InvalidScopeError(field)
 
             # If the field is valid and isn't already in the dictionary, add it.
-            field_object = self._field_data_cache.find_or_create(field)
-            if field_object not in field_objects.keys():
-                field_objects[field_object] = []
+            field_object = self._field_data_cache.find_or_build(field)
             # Update the list of associated fields
-            field_objects[field_object].append(field)
+            field_objects.setdefault(id(field_object), (field_object, []))[1].append(field)
 
             # Special case when scope is for the user state, because this scope saves fields in a single row
             if field.scope == Scope.user_state:
@@ -386,17 +484,46 @@ class DjangoKeyValueStore(KeyValueStore):
                 # we don't have to worry about conflicts
                 field_object.value = json.dumps(kv_dict[field])
 
-        for field_object in field_objects:
+        # new_field_objects maps a scope to the list of its unsaved field_objects
+        new_field_objects = defaultdict(list)
+        # the rows are updated in the order of their ids, so that concurrent saves lock them in the same order
+        for field_object, fields in sorted(field_objects.itervalues(), key=lambda item: item[0].pk):
+            if field_object.pk is None:
+                new_field_objects[fields[0].scope].append((field_object, fields))
+                continue
             try:
-                # Save the field object that we made above
-                field_object.save()
+                # Save the field object that we made above, which is known to exist
+                self._update_field_object(field_object)
                 # If save is successful on this scope, add the saved fields to
                 # the list of successful saves
-                saved_fields.extend([field.field_name for field in field_objects[field_object]])
+                saved_fields.extend([field.field_name for field in fields])
+            except DatabaseError:
+                log.exception('Error saving fields %r', fields)
+                raise KeyValueMultiSaveError(saved_fields)
+
+        for scope, scope_field_objects in new_field_objects.iteritems():
+            scope_fields = [field for __, fields in scope_field_objects for field in fields]
+            try:
+                self._field_data_cache.create_field_objects(
+                    scope, [field_object for field_object, __ in scope_field_objects]
+                )
+                saved_fields.extend([field.field_name for field in scope_fields])
             except DatabaseError:
-                log.exception('Error saving fields %r', field_objects[field_object])
+                log.exception('Error saving fields %r', scope_fields)
                 raise KeyValueMultiSaveError(saved_fields)
 
+    @staticmethod
+    def _update_field_object(field_object):
+        """
+        Saves the field object loaded from the database, with a single query unless its row has been
+        deleted since (e.g. by another request), in which case it's inserted again.
+        """
+        try:
+            field_object.save(force_update=True)
+        except DatabaseError:
+            # the forced update didn't affect any row
+            field_object.save()
+
     def delete(self, key):
         if key.scope not in self._allowed_scopes:
             raise InvalidScopeError(key)
@@ -18,6 +18,7 @@ from django.db import models
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from courseware.history import history_writer
 from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField
 
 
@@ -119,7 +120,7 @@ class StudentModuleHistory(models.Model):
         """
         Checks the instance's module_type, and creates & saves a
         StudentModuleHistory entry if the module_type is one that
-        we save.
+        we save (see courseware.history for when it is written).
         """
         if instance.module_type in StudentModuleHistory.HISTORY_SAVING_TYPES:
             history_entry = StudentModuleHistory(student_module=instance,
@@ -128,7 +129,7 @@ class StudentModuleHistory(models.Model):
                                                  state=instance.state,
                                                  grade=instance.grade,
                                                  max_grade=instance.max_grade)
-            history_entry.save()
+            history_writer.add(history_entry)
 
 
 class XBlockFieldBase(models.Model):
@@ -170,6 +171,31 @@ class XModuleUserStateSummaryField(XBlockFieldBase):
     usage_id = LocationKeyField(max_length=255, db_index=True)
 
 
+class XModuleUserStateSummaryCounter(models.Model):
+    """
+    One shard of a count aggregated over all the students of an xmodule (e.g. the votes for a poll
+    answer). Each increment updates a random shard in place, so that concurrent submissions don't
+    contend for the same row; the count is the sum of the shards.
+    """
+
+    class Meta:
+        unique_together = (('usage_id', 'field_name', 'key', 'shard'),)
+
+    usage_id = LocationKeyField(max_length=255, db_index=True)
+
+    # The name of the aggregated field (e.g. poll_answers), and the key counted in it (e.g. an answer)
+    field_name = models.CharField(max_length=64)
+    key = models.CharField(max_length=255)
+
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    def __unicode__(self):
+        return u'XModuleUserStateSummaryCounter<{} {} {!r} #{}: {}>'.format(
+            self.usage_id, self.field_name, self.key, self.shard, self.count
+        )
+
+
 class XModuleStudentPrefsField(XBlockFieldBase):
     """
     Stores data set in the Scope.preferences scope by an xmodule field
@@ -22,6 +22,7 @@ from courseware.access import has_access, get_user_role
 from courseware.masquerade import setup_masquerade
 from courseware.model_data import FieldDataCache, DjangoKeyValueStore
 from courseware.models import StudentModule
+from courseware import toc_cache
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
 from lms.djangoapps.lms_xblock.runtime import LmsModuleSystem, unquote_slashes, quote_slashes
 from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
@@ -30,7 +31,7 @@ from eventtracking import tracker
 from psychometrics.psychoanalyze import make_psychometrics_data_update_handler
 from student.models import anonymous_id_for_user, user_by_anonymous_id
 from xblock.core import XBlock
-from xblock.fields import Scope
+from xblock.fields import Date, Scope
 from xblock.runtime import KvsFieldData, KeyValueStore
 from xblock.exceptions import NoSuchHandlerError
 from xblock.django.request import django_to_webob_request, webob_to_django_response
@@ -75,6 +76,17 @@ XQUEUE_INTERFACE = XQueueInterface(
     REQUESTS_AUTH,
 )
 
+# The (handler, suffix) of the XBlock handlers which render descendants of their block: the student's
+# data for the whole subtree is loaded up front for them, in a few queries rather than one per block
+HANDLERS_RENDERING_DESCENDANTS = frozenset([
+    ('xmodule_handler', 'render_unit'),  # SequenceModule renders one of its units
+])
+
+# The block types all of whose handlers render their descendants, as by HANDLERS_RENDERING_DESCENDANTS
+BLOCK_TYPES_RENDERING_DESCENDANTS = frozenset([
+    'conditional',  # ConditionalModule renders its children whatever the dispatch
+])
+
 # TODO: course_id and course_key are used interchangeably in this file, which is wrong.
 # Some brave person should make the variable names consistently someday, but the code's
 # coupled enough that it's kind of tricky--you've been warned!
@@ -149,47 +161,95 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
     '''
 
     with modulestore().bulk_operations(course.id):
-        course_module = get_module_for_descriptor(request.user, request, course, field_data_cache, course.id)
-        if course_module is None:
-            return None
-
         # Check to see if the course is gated on required content (such as an Entrance Exam)
         required_content = _get_required_content(course, request.user)
 
+        # The outline is shared by the users who see the same chapters and sections
+        outline = profile = None
+        if toc_cache.is_enabled():
+            profile = toc_cache.visibility_profile(request.user, course, required_content)
+            outline = toc_cache.get_outline(course, profile)
+            dog_stats_api.increment(
+                'lms.courseware.toc_cache',
+                tags=[u'course_id:{}'.format(course.id), 'result:{}'.format('miss' if outline is None else 'hit')]
+            )
+        if outline is None:
+            course_module = get_module_for_descriptor(request.user, request, course, field_data_cache, course.id)
+            if course_module is None:
+                return None
+            outline = _course_outline(course_module, required_content)
+            toc_cache.set_outline(course, profile, outline)
+
+        kvs = DjangoKeyValueStore(field_data_cache)
         chapters = list()
-        for chapter in course_module.get_display_items():
-            # Only show required content, if there is required content
-            # chapter.hide_from_toc is read-only (boo)
-            local_hide_from_toc = False
-            if len(required_content):
-                if unicode(chapter.location) not in required_content:
-                    local_hide_from_toc = True
-
-            # Skip the current chapter if a hide flag is tripped
-            if chapter.hide_from_toc or local_hide_from_toc:
-                continue
-
+        for chapter in outline:
             sections = list()
-            for section in chapter.get_display_items():
-
-                active = (chapter.url_name == active_chapter and
-                          section.url_name == active_section)
-
-                if not section.hide_from_toc:
-                    sections.append({'display_name': section.display_name_with_default,
-                                     'url_name': section.url_name,
-                                     'format': section.format if section.format is not None else '',
-                                     'due': get_extended_due_date(section),
-                                     'active': active,
-                                     'graded': section.graded,
-                                     })
-            chapters.append({'display_name': chapter.display_name_with_default,
-                             'url_name': chapter.url_name,
+            for section in chapter['sections']:
+                active = (chapter['url_name'] == active_chapter and
+                          section['url_name'] == active_section)
+
+                sections.append({'display_name': section['display_name'],
+                                 'url_name': section['url_name'],
+                                 'format': section['format'],
+                                 'due': _extended_due_date(kvs, request.user, section),
+                                 'active': active,
+                                 'graded': section['graded'],
+                                 })
+            chapters.append({'display_name': chapter['display_name'],
+                             'url_name': chapter['url_name'],
                              'sections': sections,
-                             'active': chapter.url_name == active_chapter})
+                             'active': chapter['url_name'] == active_chapter})
         return chapters
 
 
+def _course_outline(course_module, required_content):
+    """
+    Returns the chapters and sections of the course module shown to its user, without the
+    annotations specific to a request (see toc_for_course).
+    """
+    chapters = list()
+    for chapter in course_module.get_display_items():
+        # Only show required content, if there is required content
+        # chapter.hide_from_toc is read-only (boo)
+        local_hide_from_toc = False
+        if len(required_content):
+            if unicode(chapter.location) not in required_content:
+                local_hide_from_toc = True
+
+        # Skip the current chapter if a hide flag is tripped
+        if chapter.hide_from_toc or local_hide_from_toc:
+            continue
+
+        sections = list()
+        for section in chapter.get_display_items():
+            if not section.hide_from_toc:
+                sections.append({'display_name': section.display_name_with_default,
+                                 'url_name': section.url_name,
+                                 'location': unicode(section.location),
+                                 'format': section.format if section.format is not None else '',
+                                 'due': section.due,
+                                 'graded': section.graded,
+                                 })
+        chapters.append({'display_name': chapter.display_name_with_default,
+                         'url_name': chapter.url_name,
+                         'sections': sections})
+    return chapters
+
+
+def _extended_due_date(kvs, user, section):
+    """
+    Returns the due date of the section of the outline, as extended for the user.
+    """
+    key = DjangoKeyValueStore.Key(
+        Scope.user_state, user.id, UsageKey.from_string(section['location']), 'extended_due'
+    )
+    try:
+        extended_due = Date().from_json(kvs.get(key))
+    except KeyError:
+        extended_due = None
+    return get_extended_due_date({'due': section['due'], 'extended_due': extended_due})
+
+
 def get_module(user, request, usage_key, field_data_cache,
                position=None, log_if_not_found=True, wrap_xmodule_display=True,
                grade_bucket_type=None, depth=0,
@@ -694,6 +754,9 @@ def get_module_for_descriptor_internal(user, descriptor, field_data_cache, cours
         if not has_access(user, 'load', descriptor, course_id):
             return None
 
+    if field_data_cache.lazy_descendants:
+        field_data_cache.add_descriptors([descriptor])
+
     (system, field_data) = get_module_system_for_user(
         user=user,
         field_data_cache=field_data_cache,  # These have implicit user bindings, the rest of args are considered not to
@@ -822,6 +885,14 @@ def xblock_resource(request, block_type, uri):  # pylint: disable=unused-argumen
     return HttpResponse(content, mimetype=mimetype)
 
 
+def _handler_renders_descendants(block_type, handler, suffix):
+    """
+    Returns whether the handler of blocks of block_type renders descendants of its block when called
+    with suffix (see HANDLERS_RENDERING_DESCENDANTS).
+    """
+    return block_type in BLOCK_TYPES_RENDERING_DESCENDANTS or (handler, suffix) in HANDLERS_RENDERING_DESCENDANTS
+
+
 def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, user):
     """
     Invoke an XBlock handler, either authenticated or not.
@@ -871,13 +942,24 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, user):
         tracking_context['module']['original_usage_key'] = unicode(descriptor_orig_usage_key)
         tracking_context['module']['original_usage_version'] = unicode(descriptor_orig_version)
 
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
-        course_id,
-        user,
-        descriptor
+    metric_tags = [u'block_type:{}'.format(usage_key.block_type), u'handler:{}'.format(handler)]
+
+    # Only load the student's data for the block itself: most handlers never
+    # look at its descendants, whose data is loaded as they get bound.
+    lazy_descendants = (
+        settings.FEATURES.get('ENABLE_LAZY_XBLOCK_HANDLER_FIELD_DATA', False) and
+        not _handler_renders_descendants(usage_key.block_type, handler, suffix)
     )
-    setup_masquerade(request, course_id, has_access(user, 'staff', descriptor, course_id))
-    instance = get_module(user, request, usage_key, field_data_cache, grade_bucket_type='ajax')
+    with dog_stats_api.timer('lms.xblock.handler.setup', tags=metric_tags):
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+            course_id,
+            user,
+            descriptor,
+            depth=0 if lazy_descendants else None,
+            lazy_descendants=lazy_descendants,
+        )
+        setup_masquerade(request, course_id, has_access(user, 'staff', descriptor, course_id))
+        instance = get_module(user, request, usage_key, field_data_cache, grade_bucket_type='ajax')
     if instance is None:
         # Either permissions just changed, or someone is trying to be clever
         # and load something they shouldn't have access to.
@@ -887,7 +969,8 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, user):
     req = django_to_webob_request(request)
     try:
         with tracker.get_tracker().context(tracking_context_name, tracking_context):
-            resp = instance.handle(handler, req, suffix)
+            with dog_stats_api.timer('lms.xblock.handler.handle', tags=metric_tags):
+                resp = instance.handle(handler, req, suffix)
 
     except NoSuchHandlerError:
         log.exception("XBlock %s attempted to access missing handler %r", instance, handler)
@@ -0,0 +1,20 @@
+"""
+Background tasks of the courseware.
+"""
+from celery import task
+from dateutil.parser import parse as parse_datetime
+
+from courseware.models import StudentModuleHistory
+
+
+@task()  # pylint: disable=not-callable
+def save_student_module_history(entries):
+    """
+    Inserts the StudentModuleHistory rows described by the list of dicts `entries`.
+
+    Queued by courseware.history in the 'async' STUDENT_MODULE_HISTORY_WRITE_MODE, with the
+    datetimes `created` in the ISO 8601 format.
+    """
+    for entry in entries:
+        entry['created'] = parse_datetime(entry['created'])
+    StudentModuleHistory.objects.bulk_create([StudentModuleHistory(**entry) for entry in entries])
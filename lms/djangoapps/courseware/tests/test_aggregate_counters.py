@@ -0,0 +1,60 @@
+"""
+Tests of the counts aggregated over the students of an xmodule.
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import patch
+
+from courseware import aggregate_counters
+from courseware.models import XModuleUserStateSummaryCounter
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+
+
+class TestAggregateCounters(TestCase):
+    """
+    Tests of incrementing and reading sharded counts.
+    """
+    def setUp(self):
+        super(TestAggregateCounters, self).setUp()
+        cache.clear()
+        course_key = SlashSeparatedCourseKey('edX', 'counters', 'run')
+        self.usage_id = course_key.make_usage_key('poll_question', 'poll')
+        self.other_usage_id = course_key.make_usage_key('poll_question', 'other_poll')
+
+    def test_increment_shards(self):
+        with patch('random.randrange', side_effect=[0, 1, 1, 0]):
+            for __ in range(3):
+                aggregate_counters.increment(self.usage_id, 'poll_answers', 'Yes')
+            aggregate_counters.increment(self.usage_id, 'poll_answers', 'No', 2)
+
+        self.assertEqual(
+            sorted(XModuleUserStateSummaryCounter.objects.values_list('key', 'shard', 'count')),
+            [(u'No', 0, 2), (u'Yes', 0, 1), (u'Yes', 1, 2)]
+        )
+        self.assertEqual(aggregate_counters.get_counts(self.usage_id, 'poll_answers'), {'Yes': 3, 'No': 2})
+        self.assertEqual(aggregate_counters.get_counts(self.usage_id, 'other_field'), {})
+        self.assertEqual(aggregate_counters.get_counts(self.other_usage_id, 'poll_answers'), {})
+
+    def test_decrement(self):
+        aggregate_counters.increment(self.usage_id, 'poll_answers', 'Yes')
+        aggregate_counters.increment(self.usage_id, 'poll_answers', 'Yes', -1)
+        self.assertEqual(aggregate_counters.get_counts(self.usage_id, 'poll_answers'), {'Yes': 0})
+
+    @override_settings(USER_STATE_SUMMARY_COUNTER_CACHE_TIMEOUT=60)
+    def test_cached_counts(self):
+        aggregate_counters.increment(self.usage_id, 'poll_answers', 'Yes')
+        self.assertEqual(aggregate_counters.get_counts(self.usage_id, 'poll_answers'), {'Yes': 1})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(aggregate_counters.get_counts(self.usage_id, 'poll_answers'), {'Yes': 1})
+
+        # the cached counts are invalidated by increments...
+        aggregate_counters.increment(self.usage_id, 'poll_answers', 'No')
+        self.assertEqual(aggregate_counters.get_counts(self.usage_id, 'poll_answers'), {'Yes': 1, 'No': 1})
+
+        # ...and show the rows' other changes once they expire
+        XModuleUserStateSummaryCounter.objects.filter(key='Yes').update(count=5)
+        self.assertEqual(aggregate_counters.get_counts(self.usage_id, 'poll_answers'), {'Yes': 1, 'No': 1})
+        cache.clear()
+        self.assertEqual(aggregate_counters.get_counts(self.usage_id, 'poll_answers'), {'Yes': 5, 'No': 1})
@@ -0,0 +1,122 @@
+"""
+Tests of the writing of StudentModuleHistory rows.
+"""
+from django.core.signals import got_request_exception
+from django.test import TestCase
+from django.test.utils import override_settings
+from kombu.serialization import decode, encode
+from mock import patch
+
+from courseware.history import history_writer
+from courseware.middleware import DiscardRolledBackHistoryMiddleware
+from courseware.models import StudentModuleHistory
+from courseware.tasks import save_student_module_history
+from courseware.tests.factories import StudentModuleFactory
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+
+
+class TestStudentModuleHistoryWriter(TestCase):
+    """
+    Tests of the immediate, batched and async writes of the history of student modules.
+    """
+    def setUp(self):
+        super(TestStudentModuleHistoryWriter, self).setUp()
+        self.course_key = SlashSeparatedCourseKey('edX', 'history', 'run')
+        self.addCleanup(history_writer.stop_buffering)
+
+    def save_student_module(self, name, state='{}'):
+        """
+        Creates a problem StudentModule, saving it a second time with `state`.
+        """
+        student_module = StudentModuleFactory(
+            module_state_key=self.course_key.make_usage_key('problem', name), state=None
+        )
+        student_module.state = state
+        student_module.save()
+        return student_module
+
+    def test_immediate(self):
+        history_writer.start_buffering()
+        student_module = self.save_student_module('immediate')
+        self.assertEqual(StudentModuleHistory.objects.filter(student_module=student_module).count(), 2)
+
+    @override_settings(STUDENT_MODULE_HISTORY_WRITE_MODE='batched')
+    def test_batched(self):
+        history_writer.start_buffering()
+        student_module = self.save_student_module('batched', state='{"attempts": 1}')
+        self.assertFalse(StudentModuleHistory.objects.exists())
+
+        with self.assertNumQueries(1):
+            history_writer.stop_buffering()
+        self.assertEqual(
+            list(StudentModuleHistory.objects.filter(student_module=student_module).order_by('id').values_list(
+                'state', flat=True
+            )),
+            [None, u'{"attempts": 1}']
+        )
+
+        # outside of requests, the history is written immediately
+        self.save_student_module('after_request')
+        self.assertEqual(StudentModuleHistory.objects.count(), 4)
+
+    @override_settings(STUDENT_MODULE_HISTORY_WRITE_MODE='batched', STUDENT_MODULE_HISTORY_BATCH_SIZE=3)
+    def test_batch_size(self):
+        history_writer.start_buffering()
+        self.save_student_module('first')
+        self.assertEqual(StudentModuleHistory.objects.count(), 0)
+        self.save_student_module('second')
+        self.assertEqual(StudentModuleHistory.objects.count(), 3)
+        history_writer.stop_buffering()
+        self.assertEqual(StudentModuleHistory.objects.count(), 4)
+
+    @override_settings(STUDENT_MODULE_HISTORY_WRITE_MODE='async')
+    def test_async(self):
+        history_writer.start_buffering()
+        student_module = self.save_student_module('async')
+        self.assertFalse(StudentModuleHistory.objects.exists())
+
+        history_writer.stop_buffering()
+        self.assertEqual(StudentModuleHistory.objects.filter(student_module=student_module).count(), 2)
+
+    @override_settings(STUDENT_MODULE_HISTORY_WRITE_MODE='async')
+    def test_async_json_serialization(self):
+        def delay(entries):
+            """
+            Runs the task with its arguments serialized as by the LMS's CELERY_TASK_SERIALIZER.
+            """
+            content_type, content_encoding, data = encode([entries], serializer='json')
+            save_student_module_history(*decode(data, content_type, content_encoding))
+
+        history_writer.start_buffering()
+        student_module = self.save_student_module('json', state='{"attempts": 1}')
+        with patch.object(save_student_module_history, 'delay', side_effect=delay):
+            history_writer.stop_buffering()
+        history = StudentModuleHistory.objects.filter(student_module=student_module).order_by('id')
+        self.assertEqual([entry.state for entry in history], [None, u'{"attempts": 1}'])
+        self.assertEqual(history[1].created, student_module.modified)
+
+    @override_settings(STUDENT_MODULE_HISTORY_WRITE_MODE='async', STUDENT_MODULE_HISTORY_BATCH_SIZE=3)
+    def test_async_batch_size(self):
+        history_writer.start_buffering()
+        with patch.object(save_student_module_history, 'delay') as mock_delay:
+            self.save_student_module('first')
+            self.save_student_module('second')
+            # the full buffer is written in the request's transaction, not by the task
+            self.assertEqual(StudentModuleHistory.objects.count(), 3)
+            self.assertFalse(mock_delay.called)
+
+    @override_settings(STUDENT_MODULE_HISTORY_WRITE_MODE='batched')
+    def test_discarded_on_exception(self):
+        history_writer.start_buffering()
+        self.save_student_module('exception')
+        got_request_exception.send(sender=None, request=None)
+        history_writer.stop_buffering()
+        self.assertFalse(StudentModuleHistory.objects.exists())
+
+    @override_settings(STUDENT_MODULE_HISTORY_WRITE_MODE='batched')
+    def test_discarded_on_rollback(self):
+        history_writer.start_buffering()
+        self.save_student_module('rollback')
+        DiscardRolledBackHistoryMiddleware().process_exception(None, Exception())
+        history_writer.stop_buffering()
+        self.assertFalse(StudentModuleHistory.objects.exists())
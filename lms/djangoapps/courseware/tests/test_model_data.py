@@ -179,6 +179,33 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
         self.assertEquals(len(exception_context.exception.saved_field_names), 0)
 
 
+class TestAddDescriptors(TestCase):
+    """Tests of loading the data of more descriptors in a FieldDataCache"""
+
+    def setUp(self):
+        super(TestAddDescriptors, self).setUp()
+        student_module = StudentModuleFactory.create(state=json.dumps({'a_field': 'a_value'}))
+        self.user = student_module.student
+        self.descriptor = mock_descriptor([mock_field(Scope.user_state, 'a_field')])
+        self.other_descriptor = mock_descriptor([mock_field(Scope.user_state, 'a_field')])
+        self.other_descriptor.scope_ids = ScopeIds(
+            'user1', 'mock_problem', location('other_def_id'), location('other_usage_id')
+        )
+        self.field_data_cache = FieldDataCache([self.other_descriptor], course_id, self.user, lazy_descendants=True)
+        self.kvs = DjangoKeyValueStore(self.field_data_cache)
+
+    def test_add_descriptors(self):
+        key = DjangoKeyValueStore.Key(Scope.user_state, self.user.id, location('usage_id'), 'a_field')
+        self.assertRaises(KeyError, self.kvs.get, key)
+
+        self.field_data_cache.add_descriptors([self.descriptor])
+        self.assertEquals('a_value', self.kvs.get(key))
+
+        # the descriptors already loaded aren't loaded again
+        with self.assertNumQueries(0):
+            self.field_data_cache.add_descriptors([self.descriptor, self.other_descriptor])
+
+
 class TestMissingStudentModule(TestCase):
     def setUp(self):
         super(TestMissingStudentModule, self).setUp()
@@ -308,7 +335,8 @@ class StorageTestBase(object):
         for key in kv_dict:
             self.kvs.set(key, 'test value')
 
-        with patch('django.db.models.Model.save', side_effect=[None, DatabaseError]):
+        # the second row's update fails, as does inserting it again
+        with patch('django.db.models.Model.save', side_effect=[None, DatabaseError, DatabaseError]):
             with self.assertRaises(KeyValueMultiSaveError) as exception_context:
                 self.kvs.set_many(kv_dict)
 
@@ -316,6 +344,37 @@ class StorageTestBase(object):
         self.assertEquals(len(exception.saved_field_names), 1)
         self.assertEquals(exception.saved_field_names[0], 'existing_field')
 
+    def test_set_many_missing_fields(self):
+        """Test that setting many missing fields inserts them with a single query"""
+        kv_dict = {
+            self.key_factory('missing_field'): 'new value',
+            self.key_factory('other_missing_field'): 'other new value',
+        }
+        # one query to insert the fields, one to load their ids
+        with self.assertNumQueries(2):
+            self.kvs.set_many(kv_dict)
+        self.assertEquals(3, self.storage_class.objects.all().count())
+        for key in kv_dict:
+            self.assertEquals(self.kvs.get(key), kv_dict[key])
+
+        # the inserted fields are then updated with one query each
+        kv_dict = {key: 'newer value' for key in kv_dict}
+        with self.assertNumQueries(2):
+            self.kvs.set_many(kv_dict)
+        self.assertEquals(3, self.storage_class.objects.all().count())
+        self.assertEquals(
+            ['newer value', 'newer value', 'old_value'],
+            sorted(json.loads(field.value) for field in self.storage_class.objects.all())
+        )
+
+    def test_set_deleted_field(self):
+        """Test that setting a field whose row has been deleted since it was loaded inserts it again"""
+        self.kvs.get(self.key_factory('existing_field'))
+        self.storage_class.objects.all().delete()
+        self.kvs.set(self.key_factory('existing_field'), 'new value')
+        self.assertEquals(1, self.storage_class.objects.all().count())
+        self.assertEquals('new value', json.loads(self.storage_class.objects.get().value))
+
 
 class TestUserStateSummaryStorage(StorageTestBase, TestCase):
     """Tests for UserStateSummaryStorage"""
@@ -2,29 +2,33 @@
 """
 Test for lms courseware app, module render unit
 """
+from datetime import datetime
 from functools import partial
 import json
 
 from bson import ObjectId
 import ddt
+from django.core.cache import cache
 from django.http import Http404, HttpResponse
 from django.core.urlresolvers import reverse
 from django.conf import settings
+from django.db import connection
 from django.test.client import RequestFactory
 from django.test.utils import override_settings
 from django.contrib.auth.models import AnonymousUser
 from mock import MagicMock, patch, Mock
+from pytz import UTC
 from opaque_keys.edx.keys import UsageKey, CourseKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from xblock.field_data import FieldData
 from xblock.runtime import Runtime
-from xblock.fields import ScopeIds
+from xblock.fields import Date, ScopeIds
 from xblock.core import XBlock
 
 from capa.tests.response_xml_factory import OptionResponseXMLFactory
 from courseware import module_render as render
 from courseware.courses import get_course_with_access, course_image_url, get_course_info_section
-from courseware.model_data import FieldDataCache
+from courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from courseware.models import StudentModule
 from courseware.tests.factories import StudentModuleFactory, UserFactory, GlobalStaffFactory
 from courseware.tests.tests import LoginEnrollmentTestCase
@@ -42,6 +46,8 @@ from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import ItemFactory, CourseFactory, check_mongo_calls
 from xmodule.x_module import XModuleDescriptor, XModule, STUDENT_VIEW, CombinedSystem
+import xmodule_modifiers
+from xmodule_modifiers import grade_histogram
 
 TEST_DATA_DIR = settings.COMMON_TEST_DATA_ROOT
 
@@ -247,6 +253,7 @@ class ModuleRenderTestCase(ModuleStoreTestCase, LoginEnrollmentTestCase):
         render.get_module_for_descriptor(self.mock_user, request, descriptor, field_data_cache, self.toy_course.id)
 
 
+@ddt.ddt
 class TestHandleXBlockCallback(ModuleStoreTestCase, LoginEnrollmentTestCase):
     """
     Test the handle_xblock_callback function
@@ -351,6 +358,74 @@ class TestHandleXBlockCallback(ModuleStoreTestCase, LoginEnrollmentTestCase):
         )
         self.assertIsInstance(response, HttpResponse)
 
+    @ddt.data(True, False)
+    def test_lazy_descendants_field_data(self, lazy_descendants):
+        request = self.request_factory.post('dummy_url', data={'position': 1})
+        request.user = self.mock_user
+        with patch.dict(settings.FEATURES, {'ENABLE_LAZY_XBLOCK_HANDLER_FIELD_DATA': lazy_descendants}):
+            with patch('courseware.module_render.get_module', wraps=render.get_module) as mock_get_module:
+                render.handle_xblock_callback(
+                    request,
+                    self.course_key.to_deprecated_string(),
+                    quote_slashes(self.location.to_deprecated_string()),
+                    'xmodule_handler',
+                    'goto_position',
+                )
+        field_data_cache = mock_get_module.call_args[0][3]
+        # goto_position doesn't bind the children of the chapter, so their data isn't loaded
+        loaded_locations = set(descriptor.location for descriptor in field_data_cache.descriptors)
+        self.assertEqual(loaded_locations == {self.location}, lazy_descendants)
+
+    @ddt.data(
+        ('sequential', 'xmodule_handler', 'render_unit', True),
+        ('sequential', 'xmodule_handler', 'goto_position', False),
+        ('conditional', 'xmodule_handler', 'conditional_get', True),
+        ('problem', 'xmodule_handler', 'problem_check', False),
+    )
+    @ddt.unpack
+    def test_handler_renders_descendants(self, block_type, handler, suffix, renders_descendants):
+        self.assertEqual(render._handler_renders_descendants(block_type, handler, suffix), renders_descendants)
+
+    def _render_unit(self, sequential):
+        """
+        Calls the render_unit handler of sequential for its first unit.
+        """
+        request = self.request_factory.post('dummy_url', data={'position': '1'})
+        request.user = self.mock_user
+        return render.handle_xblock_callback(
+            request,
+            sequential.location.course_key.to_deprecated_string(),
+            quote_slashes(sequential.location.to_deprecated_string()),
+            'xmodule_handler',
+            'render_unit',
+        )
+
+    @patch.dict(settings.FEATURES, {'ENABLE_LAZY_XBLOCK_HANDLER_FIELD_DATA': True})
+    def test_render_unit_queries(self):
+        # the student's data for the unit is loaded in bulk, so the queries don't grow with its size
+        course = CourseFactory.create()
+        chapter = ItemFactory.create(category='chapter', parent=course)
+        sequentials = []
+        for num_problems in (1, 4):
+            sequential = ItemFactory.create(category='sequential', parent=chapter)
+            vertical = ItemFactory.create(category='vertical', parent=sequential)
+            for __ in range(num_problems):
+                ItemFactory.create(category='problem', parent=vertical)
+            sequentials.append(sequential)
+            # the first render may save the student's state of the problems
+            self._render_unit(sequential)
+
+        use_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        try:
+            queries_before = len(connection.queries)
+            self.assertIn('html', json.loads(self._render_unit(sequentials[0]).content))
+            num_queries = len(connection.queries) - queries_before
+        finally:
+            connection.use_debug_cursor = use_debug_cursor
+        with self.assertNumQueries(num_queries):
+            self._render_unit(sequentials[1])
+
     def test_bad_course_id(self):
         request = self.request_factory.post('dummy_url')
         request.user = self.mock_user
@@ -495,6 +570,73 @@ class TestTOC(ModuleStoreTestCase):
             for toc_section in expected:
                 self.assertIn(toc_section, actual)
 
+    @override_settings(COURSE_TOC_CACHE_TIMEOUT=300)
+    def test_toc_cached_outline(self):
+        self.setup_modulestore(ModuleStoreEnum.Type.mongo, 3, 0)
+        cache.clear()
+        render.toc_for_course(self.request, self.toy_course, self.chapter, None, self.field_data_cache)
+
+        # another student sees the same sections: the outline is rendered from the cache
+        other_request = RequestFactory().get('/')
+        other_request.user = UserFactory()
+        other_field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+            self.toy_loc, other_request.user, self.toy_course, depth=2
+        )
+        with patch('courseware.module_render.get_module_for_descriptor') as mock_get_module:
+            with check_mongo_calls(0):
+                actual = render.toc_for_course(
+                    other_request, self.toy_course, self.chapter, 'Welcome', other_field_data_cache
+                )
+        self.assertFalse(mock_get_module.called)
+
+        overview = [chapter for chapter in actual if chapter['url_name'] == self.chapter][0]
+        self.assertTrue(overview['active'])
+        self.assertEqual(
+            [section['url_name'] for section in overview['sections'] if section['active']],
+            ['Welcome']
+        )
+
+    @override_settings(COURSE_TOC_CACHE_TIMEOUT=0)
+    def test_toc_cache_disabled(self):
+        self.setup_modulestore(ModuleStoreEnum.Type.mongo, 3, 0)
+        with patch('courseware.toc_cache.visibility_profile') as mock_visibility_profile:
+            with patch('courseware.toc_cache.cache') as mock_cache:
+                render.toc_for_course(self.request, self.toy_course, self.chapter, None, self.field_data_cache)
+        # the users' visibility profiles aren't worked out for nothing
+        self.assertFalse(mock_visibility_profile.called)
+        self.assertFalse(mock_cache.get.called)
+        self.assertFalse(mock_cache.set.called)
+
+    def test_toc_extended_due(self):
+        self.setup_modulestore(ModuleStoreEnum.Type.mongo, 3, 0)
+        due = datetime(2015, 1, 1, tzinfo=UTC)
+        extended_due = datetime(2015, 2, 1, tzinfo=UTC)
+        welcome = self.course_key.make_usage_key('sequential', 'Welcome')
+        StudentModuleFactory.create(
+            student=self.request.user,
+            course_id=self.course_key,
+            module_state_key=welcome,
+            module_type='sequential',
+            state=json.dumps({'extended_due': Date().to_json(extended_due)}),
+        )
+        kvs = DjangoKeyValueStore(FieldDataCache.cache_for_descriptor_descendents(
+            self.toy_loc, self.request.user, self.toy_course, depth=2
+        ))
+        extended_due_date = partial(
+            render._extended_due_date, kvs, self.request.user  # pylint: disable=protected-access
+        )
+
+        # the due dates of the cached outline are extended for each student
+        self.assertEqual(
+            extended_due_date({'location': unicode(welcome), 'due': due}),
+            extended_due
+        )
+        toy_videos = self.course_key.make_usage_key('sequential', 'Toy_Videos')
+        self.assertEqual(
+            extended_due_date({'location': unicode(toy_videos), 'due': due}),
+            due
+        )
+
 
 class TestHtmlModifiers(ModuleStoreTestCase):
     """
@@ -864,6 +1006,52 @@ class TestStaffDebugInfo(ModuleStoreTestCase):
             module.render(STUDENT_VIEW)
             self.assertTrue(mock_grade_histogram.called)
 
+    @override_settings(GRADE_HISTOGRAM_CACHE_TIMEOUT=60)
+    def test_grade_histograms_cached(self):
+        cache.clear()
+        other_location = self.course.id.make_usage_key('problem', 'other_problem')
+        for location, grade in ((self.location, 1), (self.location, 1), (other_location, 0)):
+            StudentModuleFactory.create(
+                course_id=self.course.id,
+                module_state_key=location,
+                student=UserFactory(),
+                grade=grade,
+                max_grade=1,
+                state="{}",
+            )
+
+        # the histograms of the siblings are computed in the same query
+        with self.assertNumQueries(1):
+            self.assertEqual(grade_histogram(self.location, [other_location]), [(1.0, 2)])
+        with self.assertNumQueries(0):
+            self.assertEqual(grade_histogram(other_location), [(0.0, 1)])
+            self.assertEqual(grade_histogram(self.location), [(1.0, 2)])
+
+    @override_settings(GRADE_HISTOGRAM_CACHE_TIMEOUT=60)
+    def test_unit_grade_histograms_queried_once(self):
+        cache.clear()
+        vertical = ItemFactory.create(category='vertical', parent_location=self.course.location)
+        for __ in range(3):
+            ItemFactory.create(category='problem', parent_location=vertical.location)
+        vertical = modulestore().get_item(vertical.location)
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(self.course.id, self.user, vertical)
+        with patch(
+            'xmodule_modifiers._query_grade_histograms', wraps=xmodule_modifiers._query_grade_histograms
+        ) as mock_query_grade_histograms:
+            module = render.get_module(self.user, self.request, vertical.location, field_data_cache)
+            module.render(STUDENT_VIEW)
+        # the histograms of all the problems of the unit are computed with the first one's
+        self.assertEqual(mock_query_grade_histograms.call_count, 1)
+        self.assertEqual(len(mock_query_grade_histograms.call_args[0][0]), 3)
+
+    @override_settings(GRADE_HISTOGRAM_CACHE_TIMEOUT=0)
+    def test_grade_histogram_siblings_uncached(self):
+        with patch('xmodule_modifiers._sibling_ids') as mock_sibling_ids:
+            module = render.get_module(self.user, self.request, self.location, self.field_data_cache)
+            module.render(STUDENT_VIEW)
+        # the parent isn't read when the siblings' histograms wouldn't be cached
+        self.assertFalse(mock_sibling_ids.called)
+
 
 PER_COURSE_ANONYMIZED_DESCRIPTORS = (LTIDescriptor, )
 
@@ -0,0 +1,115 @@
+"""
+A cache of the course outlines shown in the courseware navigation (the table of contents), shared
+across the users who see the same chapters and sections of a course.
+
+Which chapters and sections a user sees depends on their visibility profile: whether they are course
+staff or a beta tester, their groups in the course's content group partitions (e.g. their cohort's
+group), and the content they are required to complete first (e.g. an entrance exam). The outline
+is cached for settings.COURSE_TOC_CACHE_TIMEOUT seconds (0 disables the cache) under that profile,
+and for no longer than until the next chapter or section is released to it. Changes to the course
+content show up in the navigation once the cached outlines expire.
+
+The parts of the table of contents that are specific to a request, the active chapter and section
+and the due dates extended for the user, aren't cached.
+"""
+import hashlib
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import UTC
+
+from courseware.access import has_access
+from courseware.masquerade import get_course_masquerade
+from student.roles import CourseBetaTesterRole
+from xmodule.split_test_module import get_split_user_partitions
+
+
+def is_enabled():
+    """
+    Returns whether the outlines are cached: when they aren't, there's no need for visibility profiles.
+    """
+    return bool(settings.COURSE_TOC_CACHE_TIMEOUT)
+
+
+def visibility_profile(user, course, required_content):
+    """
+    Returns a tuple identifying the chapters and sections of the course that the user sees, or
+    None if the user's outline mustn't be shared (e.g. when staff are masquerading).
+    """
+    if get_course_masquerade(user, course.id) is not None:
+        return None
+
+    if has_access(user, 'staff', course, course.id):
+        # staff see all the content, whatever their groups and the release dates
+        return ('staff', tuple(sorted(required_content)))
+
+    split_partitions = get_split_user_partitions(course.user_partitions)
+    groups = tuple(
+        (partition.id, _group_id(partition.scheme.get_group_for_user(course.id, user, partition)))
+        for partition in course.user_partitions
+        if partition not in split_partitions
+    )
+    return (
+        'beta' if CourseBetaTesterRole(course.id).has_user(user) else 'student',
+        groups,
+        tuple(sorted(required_content)),
+    )
+
+
+def _group_id(group):
+    """
+    Returns the id of the group, or None if the user isn't in a group.
+    """
+    return group.id if group is not None else None
+
+
+def _cache_key(course, profile):
+    """
+    Returns the cache key of the outline of the course for the visibility profile.
+    """
+    return 'courseware.toc.{}'.format(hashlib.md5(repr((unicode(course.id), profile))).hexdigest())
+
+
+def get_outline(course, profile):
+    """
+    Returns the cached outline of the course for the visibility profile, or None.
+    """
+    if profile is None or not is_enabled():
+        return None
+    return cache.get(_cache_key(course, profile))
+
+
+def set_outline(course, profile, outline):
+    """
+    Caches the outline of the course for the visibility profile, until the next chapter or
+    section is released to it.
+    """
+    if profile is None or not is_enabled():
+        return
+
+    timeout = settings.COURSE_TOC_CACHE_TIMEOUT
+
+    if profile[0] != 'staff':
+        next_release = _next_release(course, is_beta_tester=profile[0] == 'beta')
+        if next_release is not None:
+            timeout = min(timeout, int((next_release - datetime.now(UTC())).total_seconds()) + 1)
+    cache.set(_cache_key(course, profile), outline, timeout)
+
+
+def _next_release(course, is_beta_tester):
+    """
+    Returns the first start date to come of the chapters and sections of the course, or None.
+    """
+    now = datetime.now(UTC())
+    starts = []
+    for chapter in course.get_children():
+        for descriptor in [chapter] + chapter.get_children():
+            start = descriptor.start
+            if start is None:
+                continue
+            if is_beta_tester and descriptor.days_early_for_beta is not None:
+                start -= timedelta(descriptor.days_early_for_beta)
+            if start > now:
+                starts.append(start)
+    return min(starts) if starts else None
@@ -7,6 +7,7 @@ import xblock.reference.plugins
 
 from django.core.urlresolvers import reverse
 from django.conf import settings
+from courseware import aggregate_counters
 from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
 from openedx.core.djangoapps.user_api.api import course_tag as user_course_tag_api
 from xmodule.modulestore.django import modulestore
@@ -188,6 +189,25 @@ class UserTagsService(object):
         )
 
 
+class CountersService(object):
+    """
+    A runtime service storing counts aggregated over all the students of a block (e.g. the votes
+    for each answer of a poll), which can be incremented concurrently without contention.
+    """
+
+    def increment(self, block, name, key, delta=1):
+        """
+        Adds delta to the count of key in the counts called name of block.
+        """
+        aggregate_counters.increment(block.scope_ids.usage_id, name, key, delta)
+
+    def get_counts(self, block, name):
+        """
+        Returns the {key: count} dict of the counts called name of block.
+        """
+        return aggregate_counters.get_counts(block.scope_ids.usage_id, name)
+
+
 class LmsModuleSystem(LmsHandlerUrls, ModuleSystem):  # pylint: disable=abstract-method
     """
     ModuleSystem specialized to the LMS
@@ -202,6 +222,7 @@ class LmsModuleSystem(LmsHandlerUrls, ModuleSystem):  # pylint: disable=abstract
         )
         services['library_tools'] = LibraryToolsService(modulestore())
         services['fs'] = xblock.reference.plugins.FSService()
+        services['counters'] = CountersService()
         self.request_token = kwargs.pop('request_token', None)
         super(LmsModuleSystem, self).__init__(**kwargs)
 
@@ -122,6 +122,11 @@ STATIC_ROOT_BASE = ENV_TOKENS.get('STATIC_ROOT_BASE', None)
 if STATIC_ROOT_BASE:
     STATIC_ROOT = path(STATIC_ROOT_BASE)
 
+# The templates are compiled ahead of time for each revision (see the compile_templates command), and
+# not checked for changes once loaded
+MAKO_MODULE_DIR = os.path.join(ENV_TOKENS.get('MAKO_MODULE_DIR', MAKO_MODULE_DIR), EDX_PLATFORM_REVISION)
+MAKO_FILESYSTEM_CHECKS = ENV_TOKENS.get('MAKO_FILESYSTEM_CHECKS', False)
+
 
 # STATIC_URL_BASE specifies the base url to use for static files
 STATIC_URL_BASE = ENV_TOKENS.get('STATIC_URL_BASE', None)
@@ -487,6 +492,20 @@ API_DATE_FORMAT = ENV_TOKENS.get('API_DATE_FORMAT', API_DATE_FORMAT)
 # Enrollment API Cache Timeout
 ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT = ENV_TOKENS.get('ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT', 60)
 
+# Courseware history writes
+STUDENT_MODULE_HISTORY_WRITE_MODE = ENV_TOKENS.get(
+    'STUDENT_MODULE_HISTORY_WRITE_MODE', STUDENT_MODULE_HISTORY_WRITE_MODE
+)
+STUDENT_MODULE_HISTORY_BATCH_SIZE = ENV_TOKENS.get(
+    'STUDENT_MODULE_HISTORY_BATCH_SIZE', STUDENT_MODULE_HISTORY_BATCH_SIZE
+)
+
+# Courseware navigation cache timeout
+COURSE_TOC_CACHE_TIMEOUT = ENV_TOKENS.get('COURSE_TOC_CACHE_TIMEOUT', COURSE_TOC_CACHE_TIMEOUT)
+
+# Staff grade histograms cache timeout
+GRADE_HISTOGRAM_CACHE_TIMEOUT = ENV_TOKENS.get('GRADE_HISTOGRAM_CACHE_TIMEOUT', GRADE_HISTOGRAM_CACHE_TIMEOUT)
+
 # PDF RECEIPT/INVOICE OVERRIDES
 PDF_RECEIPT_TAX_ID = ENV_TOKENS.get('PDF_RECEIPT_TAX_ID', PDF_RECEIPT_TAX_ID)
 PDF_RECEIPT_FOOTER_TEXT = ENV_TOKENS.get('PDF_RECEIPT_FOOTER_TEXT', PDF_RECEIPT_FOOTER_TEXT)
@@ -335,6 +335,11 @@ FEATURES = {
 
     # Courseware search feature
     'ENABLE_COURSEWARE_SEARCH': False,
+
+    # Load the student's data for the descendants of a block whose handler is called
+    # only when the handler binds them, rather than for the whole subtree up front
+    # (except for the handlers which render descendants, see courseware.module_render.HANDLERS_RENDERING_DESCENDANTS)
+    'ENABLE_LAZY_XBLOCK_HANDLER_FIELD_DATA': True,
 }
 
 # Ignore static asset files on import which match this pattern
@@ -413,6 +418,8 @@ OAUTH_OIDC_USERINFO_HANDLERS = (
 # templates
 import tempfile
 MAKO_MODULE_DIR = os.path.join(tempfile.gettempdir(), 'mako_lms')
+# Whether the templates are checked for changes each time they are used
+MAKO_FILESYSTEM_CHECKS = True
 MAKO_TEMPLATES = {}
 MAKO_TEMPLATES['main'] = [PROJECT_ROOT / 'templates',
                           COMMON_ROOT / 'templates',
@@ -1005,6 +1012,8 @@ MIDDLEWARE_CLASSES = (
     # Detects user-requested locale from 'accept-language' header in http request
     'django.middleware.locale.LocaleMiddleware',
 
+    # must be right before TransactionMiddleware, to see the exceptions it rolls back
+    'courseware.middleware.DiscardRolledBackHistoryMiddleware',
     'django.middleware.transaction.TransactionMiddleware',
     # 'debug_toolbar.middleware.DebugToolbarMiddleware',
 
@@ -1038,6 +1047,9 @@ X_FRAME_OPTIONS = 'ALLOW'
 
 STATICFILES_STORAGE = 'pipeline.storage.PipelineCachedStorage'
 
+# Number of static url lookups and rewritten texts memoized by static_replace in each process (0 disables it)
+STATIC_URL_REWRITE_MEMO_SIZE = 1000
+
 from rooted_paths import rooted_glob
 
 courseware_js = (
@@ -2002,6 +2014,20 @@ API_DATE_FORMAT = '%Y-%m-%d'
 # Enrollment API Cache Timeout
 ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT = 60
 
+# Number of seconds the counts aggregated over the students of a poll or word cloud are cached for
+USER_STATE_SUMMARY_COUNTER_CACHE_TIMEOUT = 5
+
+# Number of seconds the course outlines shown in the courseware navigation are cached for (0 disables the cache)
+COURSE_TOC_CACHE_TIMEOUT = 300
+
+# Number of seconds the grade histograms shown to staff in the courseware are cached for (0 disables the cache)
+GRADE_HISTOGRAM_CACHE_TIMEOUT = 60
+
+# How the StudentModuleHistory rows are written: 'immediate' (on each StudentModule save), 'batched' (in bulk
+# at the end of the request) or 'async' (in bulk by a celery task queued at the end of the request)
+STUDENT_MODULE_HISTORY_WRITE_MODE = 'immediate'
+STUDENT_MODULE_HISTORY_BATCH_SIZE = 100
+
 # for Student Notes we would like to avoid too frequent token refreshes (default is 30 seconds)
 if FEATURES['ENABLE_EDXNOTES']:
     OAUTH_ID_TOKEN_EXPIRATION = 60 * 60
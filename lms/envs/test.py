@@ -140,6 +140,9 @@ STATICFILES_DIRS += [
 STATICFILES_STORAGE = 'pipeline.storage.NonPackagingPipelineStorage'
 PIPELINE_ENABLED = False
 
+# The tests of static_replace mock staticfiles_storage
+STATIC_URL_REWRITE_MEMO_SIZE = 0
+
 update_module_store_settings(
     MODULESTORE,
     module_store_options={
@@ -210,6 +213,11 @@ CACHES = {
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
+# The cache outlives the database of each test
+USER_STATE_SUMMARY_COUNTER_CACHE_TIMEOUT = 0
+COURSE_TOC_CACHE_TIMEOUT = 0
+GRADE_HISTOGRAM_CACHE_TIMEOUT = 0
+
 # hide ratelimit warnings while running tests
 filterwarnings('ignore', message='No request passed to the backend, unable to rate-limit')
 
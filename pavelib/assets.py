@@ -168,6 +168,16 @@ def collect_assets(systems, settings):
         sh(django_cmd(sys, settings, "collectstatic --noinput > /dev/null"))
 
 
+def compile_templates(systems, settings):
+    """
+    Compile the Mako templates, so that the server processes don't compile them on first use.
+    `systems` is a list of systems (e.g. 'lms' or 'studio' or both)
+    `settings` is the Django settings module to use.
+    """
+    for sys in systems:
+        sh(django_cmd(sys, settings, "compile_templates"))
+
+
 @task
 @cmdopts([('background', 'b', 'Background mode')])
 def watch_assets(options):
@@ -201,7 +211,7 @@ def watch_assets(options):
 @consume_args
 def update_assets(args):
     """
-    Compile CoffeeScript and Sass, then collect static assets.
+    Compile CoffeeScript and Sass, then collect static assets and compile the Mako templates.
     """
     parser = argparse.ArgumentParser(prog='paver update_assets')
     parser.add_argument(
@@ -233,6 +243,7 @@ def update_assets(args):
 
     if args.collect:
         collect_assets(args.system, args.settings)
+        compile_templates(args.system, args.settings)
 
     if args.watch:
         call_task('watch_assets', options={'background': not args.debug})